@@ -1,10 +1,195 @@
 # app.py - nowa, w pełni interaktywna wersja
+import os
+import uuid
+
 import streamlit as st
-from config import SITES
+from config import METRICS_SETTINGS, LOGGING_SETTINGS, OUTPUT_SETTINGS
+from sites import SITES
+import generator
+import metrics
+import profiling
+import sinks
 from generator import run_generation_process, run_news_process, fetch_categories, find_pexels_images_list
 
+# Jak długo trzymamy w cache dane pobierane z WordPressa / Pexels (sekundy)
+CATEGORIES_TTL_SECONDS = 15 * 60
+PEXELS_TTL_SECONDS = 60 * 60
+
 st.set_page_config(page_title="Generator Treści AI", layout="wide")
 
+
+# --- Warstwa cache (przeżywa kolejne reruny Streamlita) ---
+@st.cache_resource(show_spinner=False)
+def bootstrap_app():
+    """Jednorazowa inicjalizacja procesu: logowanie i klient OpenAI."""
+    generator.setup_logging()
+    try:
+        generator.get_openai_client()
+    except Exception:
+        pass  # błąd został zalogowany; ponowna próba nastąpi przy pierwszym użyciu
+    return True
+
+
+@st.cache_data(ttl=CATEGORIES_TTL_SECONDS, show_spinner=False)
+def load_site_categories(site_key, refresh_token=0):
+    """Lista kategorii portalu; `refresh_token` pozwala unieważnić cache tylko dla jednego portalu."""
+    return fetch_categories(SITES[site_key])
+
+
+@st.cache_data(ttl=PEXELS_TTL_SECONDS, show_spinner=False)
+def search_pexels_cached(query):
+    return find_pexels_images_list(query)
+
+
+bootstrap_app()
+
+
+# --- Strona „Ops”: przepustowość i opóźnienia pipeline'u ---
+def load_metric_samples(scrape_url):
+    """Próbki metryk z demona (endpoint /metrics) albo – gdy brak adresu – z procesu aplikacji."""
+    if scrape_url:
+        import requests
+        r = requests.get(scrape_url, timeout=5)
+        r.raise_for_status()
+        return metrics.parse_prometheus_text(r.text)
+    return metrics.parse_prometheus_text(metrics.render())
+
+
+def render_ops_page():
+    st.title("📈 Ops: przepustowość i opóźnienia")
+    scrape_url = st.text_input("Adres /metrics demona (puste = metryki tej aplikacji):", value=METRICS_SETTINGS.get("scrape_url") or "")
+    st.button("🔄 Odśwież")
+    try:
+        samples = load_metric_samples(scrape_url.strip())
+    except Exception as e:
+        st.error(f"Nie udało się pobrać metryk: {e}")
+        return
+
+    def values(name):
+        return [(labels, value) for metric, labels, value in samples if metric == name]
+
+    uptime_h = max(sum(v for _, v in values("writerpro_process_uptime_seconds")) / 3600.0, 1e-9)
+    last_hour = {labels.get("site"): v for labels, v in values("writerpro_articles_last_hour")}
+    articles = {}
+    for labels, v in values("writerpro_articles_total"):
+        row = articles.setdefault(labels.get("site"), {"portal": labels.get("site"), "udane": 0, "błędy": 0})
+        row["udane" if labels.get("status") == "ok" else "błędy"] += int(v)
+    for site, row in articles.items():
+        row["ostatnia godzina"] = int(last_hour.get(site, 0))
+        row["średnio / h"] = round(row["udane"] / uptime_h, 2)
+
+    st.subheader("Artykuły")
+    st.caption(f"Czas działania procesu: {uptime_h:.1f} h")
+    st.dataframe(sorted(articles.values(), key=lambda r: r["portal"] or ""))
+
+    st.subheader("Opóźnienia etapów")
+    stages = metrics.summarize_histogram(samples, "writerpro_stage_duration_seconds", ("site", "stage"))
+    st.dataframe([
+        {"portal": site, "etap": stage, "n": h["count"], "śr. [s]": round(h["avg"], 2),
+         "p50 [s]": round(h["p50"], 2), "p95 [s]": round(h["p95"], 2)}
+        for (site, stage), h in sorted(stages.items())
+    ])
+
+    st.subheader("Wywołania LLM")
+    llm = {}
+    for labels, v in values("writerpro_llm_requests_total"):
+        row = llm.setdefault((labels["provider"], labels["stage"]), {"ok": 0, "error": 0, "prompt": 0, "completion": 0})
+        row[labels["outcome"]] = row.get(labels["outcome"], 0) + int(v)
+    for labels, v in values("writerpro_llm_tokens_total"):
+        row = llm.setdefault((labels["provider"], labels["stage"]), {"ok": 0, "error": 0, "prompt": 0, "completion": 0})
+        row[labels["type"]] += int(v)
+    latency = metrics.summarize_histogram(samples, "writerpro_llm_duration_seconds", ("provider", "stage"))
+    st.dataframe([
+        {"dostawca": provider, "etap": stage, "zapytania": row["ok"] + row["error"],
+         "% błędów": round(100.0 * row["error"] / max(1, row["ok"] + row["error"]), 1),
+         "tokeny wej.": row["prompt"], "tokeny wyj.": row["completion"],
+         "p50 [s]": round(latency.get((provider, stage), {}).get("p50", 0.0), 2),
+         "p95 [s]": round(latency.get((provider, stage), {}).get("p95", 0.0), 2)}
+        for (provider, stage), row in sorted(llm.items())
+    ])
+
+    routed = {}
+    for field, name in (("p50 [s]", "writerpro_llm_latency_p50_seconds"), ("p95 [s]", "writerpro_llm_latency_p95_seconds"),
+                        ("% błędów", "writerpro_llm_error_rate")):
+        for labels, v in values(name):
+            row = routed.setdefault((labels["provider"], labels["model"]), {"dostawca": labels["provider"], "model": labels["model"]})
+            row[field] = round(100.0 * v, 1) if field == "% błędów" else round(v, 2)
+    if routed:
+        st.subheader("Modele (router, ostatnie wywołania)")
+        st.dataframe([routed[key] for key in sorted(routed)])
+        hedges = values("writerpro_llm_hedges_total")
+        failovers = values("writerpro_llm_failovers_total")
+        st.caption(f"Zdublowane zapytania: {int(sum(v for _, v in hedges))}, "
+                   f"przejścia do kolejnego modelu: {int(sum(v for _, v in failovers))}")
+
+    structured_outputs = {}
+    for labels, v in values("writerpro_structured_output_total"):
+        row = structured_outputs.setdefault(labels["prompt"], {"prompt": labels["prompt"], "ok": 0, "extracted": 0, "repaired": 0, "failed": 0})
+        row[labels["outcome"]] += int(v)
+    if structured_outputs:
+        st.subheader("Odpowiedzi JSON (wg promptu)")
+        for row in structured_outputs.values():
+            total = row["ok"] + row["extracted"] + row["repaired"] + row["failed"]
+            row["% naprawionych"] = round(100.0 * row["repaired"] / total, 1)
+            row["% błędów"] = round(100.0 * row["failed"] / total, 1)
+        st.dataframe([structured_outputs[key] for key in sorted(structured_outputs)])
+        st.caption("extracted – JSON wyciągnięty z tekstu lub uciętej odpowiedzi, repaired – po tanim wywołaniu naprawczym.")
+
+    seo_issues = {}
+    for labels, v in values("writerpro_seo_issues_total"):
+        row = seo_issues.setdefault(labels["rule"], {"reguła": labels["rule"], "fixed": 0, "llm_fixed": 0, "remaining": 0})
+        row[labels["outcome"]] += int(v)
+    if seo_issues:
+        st.subheader("Reguły SEO (seo_gate)")
+        st.dataframe([seo_issues[key] for key in sorted(seo_issues)])
+        st.caption("fixed – poprawione lokalnie, llm_fixed – wąskie wywołanie LLM dla jednego fragmentu, remaining – bez poprawki.")
+
+    rss = sum(v for _, v in values("writerpro_process_rss_bytes"))
+    if rss:
+        budget = sum(v for _, v in values("writerpro_memory_budget_bytes"))
+        waits = sum(v for _, v in values("writerpro_memory_waits_total"))
+        st.caption(
+            f"Pamięć procesu: RSS {rss / 2**20:.0f} MB, budżet workera "
+            f"{f'{budget / 2**20:.0f} MB' if budget else 'bez limitu'}, zadania wstrzymane przez budżet: {int(waits)}."
+        )
+
+    retries = values("writerpro_retries_total")
+    if retries:
+        st.subheader("Ponowienia")
+        st.dataframe([{"operacja": labels.get("operation"), "liczba": int(v)} for labels, v in sorted(retries, key=lambda x: x[0].get("operation", ""))])
+
+    col_http, col_cache = st.columns(2)
+    with col_http:
+        st.subheader("HTTP")
+        hosts = {}
+        for labels, v in values("writerpro_http_requests_total"):
+            row = hosts.setdefault(labels["host"], {"host": labels["host"], "zapytania": 0, "błędy (4xx/5xx)": 0})
+            row["zapytania"] += int(v)
+            if labels["status"].isdigit() and int(labels["status"]) >= 400:
+                row["błędy (4xx/5xx)"] += int(v)
+        http_latency = metrics.summarize_histogram(samples, "writerpro_http_duration_seconds", ("host",))
+        wp_limits = {labels["host"]: v for labels, v in values("writerpro_wp_concurrency_limit")}
+        for host, row in hosts.items():
+            row["p95 [s]"] = round(http_latency.get((host,), {}).get("p95", 0.0), 2)
+            if host in wp_limits:
+                row["limit WP"] = int(wp_limits[host])
+        st.dataframe(sorted(hosts.values(), key=lambda r: r["host"]))
+    with col_cache:
+        st.subheader("Cache")
+        caches = {}
+        for labels, v in values("writerpro_cache_requests_total"):
+            caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += int(v)
+        st.dataframe([
+            {"cache": name, "trafienia": c["hit"], "chybienia": c["miss"],
+             "% trafień": round(100.0 * c["hit"] / max(1, c["hit"] + c["miss"]), 1)}
+            for name, c in sorted(caches.items())
+        ])
+
+
+if st.sidebar.radio("Widok:", ("Generator", "Ops"), key="view") == "Ops":
+    render_ops_page()
+    st.stop()
+
 st.title("🤖 Generator Treści AI")
 st.write("Narzędzie do tworzenia i publikacji artykułów na wybranych portalach.")
 
@@ -17,6 +202,8 @@ if 'selected_image_url' not in st.session_state:
     st.session_state.selected_image_url = None
 if 'image_search_query' not in st.session_state:
     st.session_state.image_search_query = ""
+if 'site_refresh_tokens' not in st.session_state:
+    st.session_state.site_refresh_tokens = {}
 
 # --- KROK 1: Wybór portalu ---
 st.header("Krok 1: Wybierz portal")
@@ -31,7 +218,7 @@ st.header("Krok 2: Wybierz temat i obrazek")
 source_tab, image_tab = st.tabs(["Źródło Tematu", "Obrazek Wyróżniający"])
 
 with source_tab:
-    topic_source = st.radio("Źródło tematu:", ('Automatycznie (z Event Registry)', 'Ręcznie'), horizontal=True, key="topic_source")
+    topic_source = st.radio("Źródło tematu:", ('Automatycznie (z Event Registry)', 'AI (propozycje modelu)', 'Ręcznie'), horizontal=True, key="topic_source")
     if topic_source == 'Ręcznie':
         st.subheader("Wprowadź dane ręcznie")
         with st.form("manual_topic_form"):
@@ -66,7 +253,7 @@ with image_tab:
         if st.button("Szukaj zdjęć w Pexels"):
             st.session_state.selected_image_url = None # Czyścimy poprzedni wybór
             with st.spinner("Szukanie propozycji..."):
-                st.session_state.pexels_results = find_pexels_images_list(query)
+                st.session_state.pexels_results = search_pexels_cached(query)
 
         if st.session_state.pexels_results:
             st.write("Wybierz jedno ze zdjęć klikając przycisk:")
@@ -94,8 +281,11 @@ with col2:
 
 chosen_category_id = None
 if category_mode == "Ręcznie":
+    if st.button("🔄 Odśwież kategorie"):
+        tokens = st.session_state.site_refresh_tokens
+        tokens[site_key] = tokens.get(site_key, 0) + 1
     with st.spinner("Pobieranie kategorii..."):
-        category_options = fetch_categories(SITES[site_key])
+        category_options = load_site_categories(site_key, st.session_state.site_refresh_tokens.get(site_key, 0))
     if category_options:
         category_names = [name for (_, name) in category_options]
         selected_name = st.selectbox("Wybierz kategorię:", options=category_names)
@@ -105,6 +295,18 @@ if category_mode == "Ręcznie":
 
 # --- KROK 4: Generowanie ---
 st.header("Krok 4: Generuj!")
+site_output = SITES[site_key].get("output") or OUTPUT_SETTINGS["sink"]
+output = st.selectbox(
+    "Zapisz artykuł do:",
+    options=list(sinks.SINKS),
+    index=list(sinks.SINKS).index(site_output),
+    help="wordpress – publikacja; directory / jsonl / wxr – pliki w katalogu OUTPUT_SETTINGS['dir'] (bez WordPressa).",
+)
+st.checkbox(
+    "🔬 Profiluj etapy (cProfile + tracemalloc)",
+    key="profile_stages",
+    help="Wolniejsze generowanie; raporty per etap trafiają do katalogu profiles/.",
+)
 if st.button("🚀 Uruchom proces generowania"):
     if topic_source == 'Ręcznie' and not st.session_state.manual_topic_data.get('title'):
         st.error("Przy ręcznym wprowadzaniu temat jest wymagany! Wypełnij i zatwierdź formularz w Kroku 2.")
@@ -113,13 +315,19 @@ if st.button("🚀 Uruchom proces generowania"):
         if st.session_state.get('selected_image_url'):
             st.session_state.manual_topic_data['image_url'] = st.session_state.selected_image_url
         
+        # Profilowanie tylko tego uruchomienia (osobny katalog) – nie wpływa na innych użytkowników
+        profile_dir = None
+        if st.session_state.get("profile_stages"):
+            generator.warm_up()
+            profile_dir = os.path.join(LOGGING_SETTINGS["profile_dir"], f"app-{uuid.uuid4().hex[:8]}")
+
         with st.spinner("Trwa proces generowania... To może zająć od 1 do 3 minut."):
             topic_src_simple = topic_source.split(' ')[0]
             
             if article_type.startswith("Premium"):
-                result = run_generation_process(site_key, topic_src_simple, st.session_state.manual_topic_data, category_id=chosen_category_id)
+                result = run_generation_process(site_key, topic_src_simple, st.session_state.manual_topic_data, category_id=chosen_category_id, output=output, profile=profile_dir or False)
             else:
-                result = run_news_process(site_key, topic_src_simple, st.session_state.manual_topic_data, category_id=chosen_category_id)
+                result = run_news_process(site_key, topic_src_simple, st.session_state.manual_topic_data, category_id=chosen_category_id, output=output, profile=profile_dir or False)
 
             if not result or "BŁĄD" in result:
                 st.error(f"BŁĄD: {result}")
@@ -127,3 +335,9 @@ if st.button("🚀 Uruchom proces generowania"):
                 st.success("Gotowe!")
                 st.info(result)
                 st.balloons()
+
+        if profile_dir:
+            with st.expander("🔬 Profil etapów", expanded=True):
+                for summary in profiling.read_summaries(profile_dir):
+                    st.code(summary)
+                st.caption(f"Raporty cProfile / tracemalloc: {profile_dir}")
@@ -0,0 +1,566 @@
+# bench/mock_servers.py — lokalne atrapy Perplexity, OpenAI, WordPressa i EventRegistry
+#
+# Jeden ThreadingHTTPServer obsługuje wszystkie usługi pod osobnymi prefiksami:
+#   /perplexity/chat/completions          – Perplexity (research, outline, artykuł, news)
+#   /openai/v1/chat/completions           – OpenAI (kategoria, tagi JSON, poprawa tytułu)
+#   /wp/<portal>/wp-json/wp/v2/...        – WordPress REST: posts, media, tags, categories
+#   /wp/<portal>/wp-json/batch/v1         – WordPress REST batch (wyłączany: wp_batch=False)
+#   /er/api/v1/article/getArticles        – EventRegistry (zapytania o artykuły)
+#   /images/<nazwa>.jpg                   – obrazki „źródłowe” z EventRegistry
+#
+# Opóźnienie i odsetek błędów (HTTP 503) ustawia się per usługa (ServiceProfile).
+# wp_capacity > 0 symuluje słaby hosting: ponad tyle równoległych zapytań WP – 429.
+# Treści są losowe, ale unikalne, więc indeksy duplikatów nie odrzucają artykułów.
+#
+# Samodzielnie (np. do ręcznych testów app.py):
+#   python bench/mock_servers.py --port 8765 --latency-scale 0.1
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SERVICES = ("perplexity", "openai", "wordpress", "eventregistry", "images")
+
+
+@dataclass
+class ServiceProfile:
+    latency: float = 0.0        # średnie opóźnienie odpowiedzi [s] (przed skalowaniem)
+    jitter: float = 0.3         # rozrzut opóźnienia jako ułamek średniej
+    failure_rate: float = 0.0   # odsetek odpowiedzi 503
+
+
+# Opóźnienia zbliżone do produkcyjnych; w benchmarku skalowane przez --latency-scale
+DEFAULT_PROFILES = {
+    "perplexity": ServiceProfile(latency=25.0),
+    "openai": ServiceProfile(latency=1.5),
+    "wordpress": ServiceProfile(latency=0.4),
+    "eventregistry": ServiceProfile(latency=0.8),
+    "images": ServiceProfile(latency=0.3),
+}
+
+_WORDS = (
+    "rynek samochód cena analiza kierowca miasto inwestycja raport dane region rozwój "
+    "mieszkanie kredyt ustawa rząd samorząd mieszkańcy transport energia podatek firma "
+    "eksperci prognoza sprzedaż budowa droga województwo statystyka wzrost spadek "
+    "decyzja program projekt technologia bezpieczeństwo klient usługa przepisy zmiany "
+    "gospodarka inflacja praca wynagrodzenie edukacja zdrowie kultura sport pogoda"
+).split()
+
+_SYLLABLES = "ba be bi bo ka ke ko ma me mo na ne no pa po ra re ro sa so ta te to wa we za ze".split()
+
+_JPEG = (
+    b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    + b"\x00" * 2048
+    + b"\xff\xd9"
+)
+
+_CATEGORY_LIST_RE = re.compile(r"Dostępne kategorie: \[(.*?)\]")
+_KEYWORD_RE = re.compile(r"FRAZA: (.*)")
+
+
+# -----------------------
+# GENEROWANIE TREŚCI
+# -----------------------
+class _TextFactory:
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+
+    def sentence(self, words=14):
+        with self.lock:
+            picked = [self.random.choice(_WORDS) for _ in range(words)]
+        return " ".join(picked).capitalize() + "."
+
+    def word(self):
+        """Losowe „słowo” z sylab – unikalne tytuły nie wyglądają jak duplikaty tematów."""
+        with self.lock:
+            return "".join(self.random.choice(_SYLLABLES) for _ in range(self.random.randint(3, 5)))
+
+    def title(self):
+        return f"{self.word().capitalize()} {self.word()} {self.word()} {self.word()} nr {next(self.counter)}"
+
+    def paragraphs(self, count, sentences=4):
+        return "\n".join(f"<p>{' '.join(self.sentence() for _ in range(sentences))}</p>" for _ in range(count))
+
+    def research(self):
+        return "\n".join(f"- {self.sentence(18)}" for _ in range(25))
+
+    def outline(self):
+        parts = [f"<h2>{self.title()}</h2>"]
+        for _ in range(6):
+            parts.append(f"<h3>{self.title()}</h3>\n{self.sentence(20)}")
+        return "\n".join(parts)
+
+    def article(self, sections=6):
+        parts = [f"<h2>{self.title()}</h2>", self.paragraphs(1, 3)]
+        for _ in range(sections):
+            parts.append(f"<h3>{self.title()}</h3>")
+            parts.append(self.paragraphs(3))
+        parts.append("<ul>" + "".join(f"<li>{self.sentence(8)}</li>" for _ in range(5)) + "</ul>")
+        parts.append('<p>Źródło: <a href="https://example.com/raport">raport</a>.</p>')
+        return "\n".join(parts)
+
+    def news(self):
+        return self.article(sections=2)
+
+
+# -----------------------
+# STAN (WordPress / EventRegistry)
+# -----------------------
+class _WordPressSite:
+    def __init__(self, categories):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(100)
+        self.posts = {}
+        self.media = {}
+        self.terms = {
+            "categories": {i + 1: {"id": i + 1, "name": name, "slug": name.lower()} for i, name in enumerate(categories)},
+            "tags": {},
+        }
+
+    def next_id(self):
+        return next(self.ids)
+
+
+class MockState:
+    def __init__(self, profiles=None, latency_scale=1.0, seed=None, wp_batch=True, wp_capacity=0):
+        self.wp_batch = wp_batch
+        self.wp_capacity = wp_capacity  # >0: tyle zapytań WP naraz, ponad to 429 (przeciążony hosting)
+        self.wp_in_flight = 0
+        self.wp_rejected = 0
+        self.profiles = {name: ServiceProfile(**vars(p)) for name, p in DEFAULT_PROFILES.items()}
+        self.profiles.update(profiles or {})
+        self.latency_scale = latency_scale
+        self.text = _TextFactory(seed)
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.sites = {}
+        self.sites_lock = threading.Lock()
+        self.event_counter = itertools.count(1)
+        self.requests = {name: 0 for name in SERVICES}
+        self.failures = {name: 0 for name in SERVICES}
+        self.counter_lock = threading.Lock()
+        self.base_url = None
+
+    def site(self, key):
+        with self.sites_lock:
+            if key not in self.sites:
+                self.sites[key] = _WordPressSite(["Bez kategorii", "Wiadomości", "Poradniki", "Rynek", "Region"])
+            return self.sites[key]
+
+    def simulate(self, service):
+        """Odczekuje opóźnienie usługi; zwraca True, jeśli zapytanie ma się „nie udać”."""
+        profile = self.profiles[service]
+        with self.random_lock:
+            delay = max(0.0, self.random.gauss(profile.latency, profile.latency * profile.jitter))
+            fail = self.random.random() < profile.failure_rate
+        with self.counter_lock:
+            self.requests[service] += 1
+            if fail:
+                self.failures[service] += 1
+        if delay:
+            time.sleep(delay * self.latency_scale)
+        return fail
+
+    def stats(self):
+        with self.counter_lock:
+            stats = {name: {"requests": self.requests[name], "failures": self.failures[name]} for name in SERVICES}
+            stats["wordpress"]["rejected_429"] = self.wp_rejected
+            return stats
+
+    def wp_enter(self):
+        """Zajmuje miejsce w pojemności WP; False, gdy host jest „przeciążony”."""
+        with self.counter_lock:
+            if self.wp_capacity and self.wp_in_flight >= self.wp_capacity:
+                self.wp_rejected += 1
+                return False
+            self.wp_in_flight += 1
+            return True
+
+    def wp_exit(self):
+        with self.counter_lock:
+            self.wp_in_flight -= 1
+
+
+# -----------------------
+# HANDLER
+# -----------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "WriterProMock/1.0"
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def log_message(self, *args):
+        pass
+
+    # --- odpowiedzi ---
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self, raw):
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        raw = self._read_body()
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+
+        if path.startswith("/perplexity/"):
+            service, handler = "perplexity", self._perplexity
+        elif path.startswith("/openai/"):
+            service, handler = "openai", self._openai
+        elif path.startswith("/wp/"):
+            service, handler = "wordpress", self._wordpress
+        elif path.startswith("/er/"):
+            service, handler = "eventregistry", self._eventregistry
+        elif path.startswith("/images/"):
+            service, handler = "images", self._image
+        else:
+            self._send(404, {"error": "not found"})
+            return
+
+        if service == "wordpress":
+            if not self.state.wp_enter():
+                self._send(429, {"code": "too_many_requests"}, headers={"Retry-After": 1})
+                return
+            try:
+                if self.state.simulate(service):
+                    self._send(503, {"error": f"mock {service}: simulated failure"})
+                    return
+                handler(method, path, query, raw)
+            finally:
+                self.state.wp_exit()
+            return
+        if self.state.simulate(service):
+            self._send(503, {"error": f"mock {service}: simulated failure"})
+            return
+        handler(method, path, query, raw)
+
+    # --- LLM ---
+    def _chat_response(self, prompt, content, model):
+        return {
+            "id": f"mock-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            },
+        }
+
+    @staticmethod
+    def _prompt(payload):
+        return "\n".join(str(m.get("content") or "") for m in payload.get("messages") or [])
+
+    def _perplexity(self, method, path, query, raw):
+        payload = self._json_body(raw)
+        prompt = self._prompt(payload)
+        text = self.state.text
+        if "NAPISZ JEDNĄ SEKCJĘ" in prompt:
+            heading = re.search(r"\*\*TWOJA SEKCJA:\*\* (.+)", prompt)
+            content = f"<h3>{heading.group(1).strip() if heading else text.title()}</h3>\n{text.paragraphs(3)}"
+        elif "PROPOZYCJE TEMATÓW" in prompt:
+            requested = re.search(r"zaproponuj\s+(\d+)", prompt)
+            count = int(requested.group(1)) if requested else 5
+            content = json.dumps({"topics": [
+                {"title": text.title(), "context": text.sentence(), "score": text.random.randint(1, 10)}
+                for _ in range(count)
+            ]}, ensure_ascii=False)
+            # Jak prawdziwe modele: czasem JSON w bloku kodu z komentarzem, czasem ucięty
+            shape = text.random.randrange(3)
+            if shape == 1:
+                content = f"Oto propozycje:\n```json\n{content}\n```\nDaj znać, jeśli potrzebujesz więcej."
+            elif shape == 2:
+                content = content[:-40]
+        elif "TRYB AKTUALIZACJI" in prompt:
+            sections = re.findall(r"^\s*(\d+)\. ", prompt, re.MULTILINE)
+            content = "\n".join(f"SEKCJA {n}: {text.sentence()}" for n in sections[1::2]) or "BRAK ZMIAN"
+        elif "DODAJ TABELĘ DO SEKCJI" in prompt:
+            rows = "".join(f"<tr><td>{text.word()}</td><td>{text.random.randint(1, 999)}</td></tr>" for _ in range(4))
+            content = f"{text.paragraphs(2)}\n<table><tr><th>Pozycja</th><th>Wartość</th></tr>{rows}</table>\n{text.paragraphs(1)}"
+        elif "PRZEPISZ SEKCJĘ" in prompt:
+            content = f"<h3>{text.title()}</h3>\n{text.paragraphs(2)}"
+        elif "NIE PISZ ARTYKUŁU" in prompt:
+            content = text.research()
+        elif "plan artykułu premium" in prompt:
+            content = text.outline()
+        elif "dziennikarzem newsowym" in prompt:
+            content = text.news()
+        else:
+            content = text.article()
+        self._send(200, self._chat_response(prompt, content, payload.get("model", "sonar-pro")))
+
+    def _openai(self, method, path, query, raw):
+        payload = self._json_body(raw)
+        prompt = self._prompt(payload)
+        schema_name = ((payload.get("response_format") or {}).get("json_schema") or {}).get("name")
+        if schema_name == "tags":
+            content = json.dumps({"tags": [w for w in self.state.text.sentence(5)[:-1].lower().split()][:5]})
+        elif schema_name == "key_points":  # box „Najważniejsze informacje” (seo_gate.py)
+            content = json.dumps({"points": [self.state.text.sentence(10) for _ in range(4)]}, ensure_ascii=False)
+        elif schema_name == "topics":  # wywołanie naprawcze structured.py
+            text = self.state.text
+            content = json.dumps({"topics": [
+                {"title": text.title(), "context": text.sentence(), "score": text.random.randint(1, 10)} for _ in range(3)
+            ]}, ensure_ascii=False)
+        elif _CATEGORY_LIST_RE.search(prompt):
+            names = [n.strip() for n in _CATEGORY_LIST_RE.search(prompt).group(1).split(",") if n.strip()]
+            content = names[-1] if names else "Bez kategorii"
+        elif _KEYWORD_RE.search(prompt):
+            content = f"<h2>{_KEYWORD_RE.search(prompt).group(1).strip().capitalize()}</h2>"
+        else:
+            content = self.state.text.sentence()
+        self._send(200, self._chat_response(prompt, content, payload.get("model", "gpt-4o-mini")))
+
+    # --- WordPress ---
+    def _wordpress(self, method, path, query, raw):
+        parts = path.strip("/").split("/")
+        # wp/<portal>/wp-json/batch/v1
+        if parts[2:5] == ["wp-json", "batch", "v1"] and self.state.wp_batch and method == "POST":
+            status, body, headers = self._wp_batch(self.state.site(parts[1]), self._json_body(raw))
+            self._send(status, body, headers=headers)
+            return
+        # wp/<portal>/wp-json/wp/v2/<zasób>[/<id>]
+        if len(parts) < 6 or parts[2:5] != ["wp-json", "wp", "v2"]:
+            self._send(404, {"code": "rest_no_route"})
+            return
+        status, body, headers = self._wp_route(self.state.site(parts[1]), method, parts[5:], query, raw)
+        self._send(status, body, headers=headers)
+
+    def _wp_route(self, site, method, route, query, raw):
+        """Obsługa /wp/v2/<zasób>[/<id>]; zwraca (status, body, nagłówki)."""
+        resource = route[0]
+        item_id = int(route[1]) if len(route) > 1 and route[1].isdigit() else None
+        if resource == "posts":
+            return self._wp_posts(site, method, item_id, query, raw)
+        if resource in ("categories", "tags"):
+            return self._wp_terms(site, resource, method, query, raw)
+        if resource == "users" and route[1:] == ["me"]:
+            return 200, {"id": 1, "name": "bench"}, None
+        if resource == "media" and method == "POST":
+            with site.lock:
+                media_id = site.next_id()
+                site.media[media_id] = len(raw)
+            return 201, {"id": media_id, "media_type": "image"}, None
+        return 404, {"code": "rest_no_route"}, None
+
+    def _wp_batch(self, site, payload):
+        requests = payload.get("requests") or []
+        if len(requests) > 25:
+            return 400, {"code": "rest_batch_max_requests_exceeded"}, None
+        responses = []
+        for sub in requests:
+            route = (sub.get("path") or "").split("?", 1)[0].strip("/").split("/")
+            if route[:2] != ["wp", "v2"] or len(route) < 3:
+                responses.append({"status": 404, "body": {"code": "rest_no_route"}, "headers": {}})
+                continue
+            raw = json.dumps(sub.get("body") or {}).encode("utf-8")
+            status, body, _ = self._wp_route(site, sub.get("method", "POST"), route[2:], {}, raw)
+            responses.append({"status": status, "body": body, "headers": {}})
+        return 207, {"responses": responses}, None
+    def _page(self, items, query):
+        per_page = int(query.get("per_page", 10))
+        page = int(query.get("page", 1))
+        total_pages = max(1, -(-len(items) // per_page))
+        if page > total_pages and items:
+            return None, {}
+        chunk = items[(page - 1) * per_page:page * per_page]
+        return chunk, {"X-WP-Total": len(items), "X-WP-TotalPages": total_pages}
+
+    def _wp_posts(self, site, method, item_id, query, raw):
+        if method == "GET" and item_id is not None:
+            with site.lock:
+                post = site.posts.get(item_id)
+            return (200, post, None) if post else (404, {"code": "rest_post_invalid_id"}, None)
+        if method == "GET":
+            with site.lock:
+                posts = sorted(site.posts.values(), key=lambda p: p["modified_gmt"])
+            if query.get("modified_after"):
+                posts = [p for p in posts if p["modified_gmt"] > query["modified_after"]]
+            chunk, headers = self._page(posts, query)
+            if chunk is None:
+                return 400, {"code": "rest_post_invalid_page_number"}, None
+            return 200, chunk, headers
+
+        data = self._json_body(raw)
+        with site.lock:
+            if item_id is not None and item_id not in site.posts:
+                return 404, {"code": "rest_post_invalid_id"}, None
+            post_id = item_id if item_id is not None else site.next_id()
+            post = site.posts.get(post_id, {"id": post_id, "link": f"{self.state.base_url}/?p={post_id}"})
+            for key in ("title", "content"):
+                if key in data:
+                    post[key] = {"raw": data[key], "rendered": data[key]}
+            for key in ("status", "categories", "tags", "featured_media", "date", "date_gmt", "slug", "excerpt"):
+                if key in data:
+                    post[key] = data[key]
+            post.setdefault("status", "publish")
+            post["modified_gmt"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+            site.posts[post_id] = post
+        return (200 if item_id is not None else 201), post, None
+
+    def _wp_terms(self, site, resource, method, query, raw):
+        with site.lock:
+            terms = site.terms[resource]
+            if method == "GET":
+                items = list(terms.values())
+                search = (query.get("search") or "").lower()
+                if search:
+                    items = [t for t in items if search in t["name"].lower()]
+            else:
+                data = self._json_body(raw)
+                name = data.get("name") or ""
+                existing = [t for t in terms.values() if t["name"].lower() == name.lower()]
+                if existing:
+                    return 400, {"code": "term_exists", "message": "Term already exists.",
+                                 "data": {"status": 400, "term_id": existing[0]["id"]}}, None
+                term_id = site.next_id()
+                terms[term_id] = {"id": term_id, "name": name, "slug": data.get("slug") or name.lower()}
+                return 201, terms[term_id], None
+        chunk, headers = self._page(items, query)
+        return 200, chunk or [], headers
+
+    # --- EventRegistry / obrazki ---
+    def _eventregistry(self, method, path, query, raw):
+        payload = self._json_body(raw)
+        count = int(payload.get("articlesCount") or 10)
+        results = []
+        for _ in range(min(count, 20)):
+            n = next(self.state.event_counter)
+            results.append({
+                "uri": f"mock-{n}",
+                "eventUri": f"mock-event-{n}",
+                "title": self.state.text.title(),
+                "body": " ".join(self.state.text.sentence() for _ in range(6)),
+                "url": f"https://example.com/news/{n}",
+                "image": f"{self.state.base_url}/images/{n}.jpg",
+                "source": {"title": "Mock News"},
+                "lang": "pol",
+            })
+        self._send(200, {"articles": {"results": results, "totalResults": len(results), "page": 1, "pages": 1}})
+
+    def _image(self, method, path, query, raw):
+        self._send(200, _JPEG, content_type="image/jpeg")
+
+
+# -----------------------
+# SERWER
+# -----------------------
+class MockServer:
+    """Uruchamia atrapy w wątku w tle; `base_url` to adres do podstawienia w konfiguracji."""
+
+    def __init__(self, host="127.0.0.1", port=0, profiles=None, latency_scale=1.0, seed=None, wp_batch=True, wp_capacity=0):
+        self.state = MockState(profiles, latency_scale, seed, wp_batch, wp_capacity)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.state.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return self.state.base_url
+
+    def endpoints(self):
+        """Zmienne środowiskowe dla config.ENDPOINTS."""
+        return {
+            "PERPLEXITY_API_URL": f"{self.base_url}/perplexity/chat/completions",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "EVENTREGISTRY_HOST": f"{self.base_url}/er",
+        }
+
+    def wp_api_url_base(self, site_key):
+        return f"{self.base_url}/wp/{site_key}/wp-json/wp/v2"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="writerpro-mocks", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_profiles(latency_args=(), failure_args=()):
+    """Z listy 'usługa=wartość' (np. perplexity=10, openai=0.05) buduje profile usług."""
+    profiles = {name: ServiceProfile(**vars(p)) for name, p in DEFAULT_PROFILES.items()}
+    for args, field in ((latency_args, "latency"), (failure_args, "failure_rate")):
+        for item in args or ():
+            name, _, value = item.partition("=")
+            targets = SERVICES if name == "all" else (name,)
+            for target in targets:
+                if target not in profiles:
+                    raise ValueError(f"Nieznana usługa: {name} (dostępne: {', '.join(SERVICES)}, all)")
+                setattr(profiles[target], field, float(value))
+    return profiles
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalne atrapy API dla benchmarku WriterPro.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Mnożnik opóźnień (0 = bez opóźnień).")
+    parser.add_argument("--latency", action="append", metavar="USŁUGA=S", help="Średnie opóźnienie usługi [s].")
+    parser.add_argument("--failure-rate", action="append", metavar="USŁUGA=P", help="Odsetek błędów 503 (0–1).")
+    parser.add_argument("--no-wp-batch", action="store_true", help="WordPress bez /batch/v1 (jak WP < 5.6).")
+    parser.add_argument("--wp-capacity", type=int, default=0, help="Maks. równoległych zapytań WP, ponad to 429 (0 = bez limitu).")
+    args = parser.parse_args(argv)
+
+    server = MockServer(port=args.port, profiles=parse_profiles(args.latency, args.failure_rate),
+                        latency_scale=args.latency_scale, wp_batch=not args.no_wp_batch, wp_capacity=args.wp_capacity)
+    print(f"Atrapy nasłuchują na {server.base_url}")
+    for key, value in server.endpoints().items():
+        print(f"  export {key}={value}")
+    print(f"  WordPress: {server.wp_api_url_base('<portal>')}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# bench/run_bench.py — benchmark pipeline'u na lokalnych atrapach API (bez kredytów i publikacji)
+#
+# Użycie (z katalogu głównego repo):
+#   python bench/run_bench.py                                  # 12 zadań, równoległość 1,4,8
+#   python bench/run_bench.py --jobs 40 --concurrency 2,8,16 --kinds news
+#   python bench/run_bench.py --latency-scale 0.05 --failure-rate perplexity=0.1
+#   python bench/run_bench.py --wp-capacity 3                  # słaby hosting WP: 429 ponad 3 zapytania naraz
+#   python bench/run_bench.py --json bench-results.json        # wynik do porównań między commitami
+#   python bench/run_bench.py --jobs 200 --memory-budget 300   # duża partia z budżetem RSS workera
+#
+# Dla każdego poziomu równoległości uruchamia run_generation_process /
+# run_news_process (źródło „Automatycznie”) na portalach z config.SITES
+# przepiętych na atrapy z bench/mock_servers.py i raportuje:
+#   - przepustowość (artykuły/min) i liczbę błędów,
+#   - p50/p95 czasu zadania i każdego etapu (z surowych zdarzeń stage_end
+#     w generator.jsonl – kubełki histogramów metrics.py są za grube na atrapy),
+#   - pamięć: szczyt tracemalloc, maksymalne RSS procesu, szczyt RSS procesu
+#     w trakcie zadania (process_peak_rss_mb ze zdarzeń job_end, memory.py –
+#     przy równoległych zadaniach to nie koszt jednego artykułu) oraz liczba
+#     zadań wstrzymanych przez budżet pamięci.
+# Stan (SQLite, logi, artefakty) trafia do katalogu tymczasowego.
+
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_servers import SERVICES, MockServer, parse_profiles  # noqa: E402
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: bajty
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def read_stage_durations(path, offset):
+    """{etap: [sekundy, ...]} ze zdarzeń stage_end dopisanych do logu JSON od `offset`."""
+    durations = {}
+    if not os.path.exists(path):
+        return durations
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("event") == "stage_end":
+                durations.setdefault(entry.get("stage"), []).append((entry.get("duration_ms") or 0.0) / 1000.0)
+    return durations
+
+
+def read_job_memory(path, offset):
+    """
+    ([szczyt RSS procesu w trakcie zadania w MB, ...], liczba zadań wstrzymanych przez budżet pamięci)
+    dla artykułów premium/news ze zdarzeń job_start/job_end dopisanych do logu JSON od `offset`.
+    """
+    peaks, waits = [], 0
+    if not os.path.exists(path):
+        return peaks, waits
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("kind") not in ("premium", "news"):
+                continue
+            if entry.get("event") == "job_end" and entry.get("process_peak_rss_mb"):
+                peaks.append(entry["process_peak_rss_mb"])
+            elif entry.get("event") == "job_start" and entry.get("memory_wait_ms"):
+                waits += 1
+    return peaks, waits
+
+
+def prepare_environment(server, workdir):
+    """
+    Kieruje konfigurację na atrapy. Musi być wywołane przed pierwszym importem
+    config/generator – ENDPOINTS i DATA_DIR czytane są ze zmiennych środowiskowych.
+    """
+    os.environ.update(server.endpoints())
+    os.environ["WRITERPRO_DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("PERPLEXITY_API_KEY", "bench")
+    os.chdir(workdir)  # generator.log, generator.jsonl i artifacts/ lądują w katalogu tymczasowym
+
+    import config
+    config.LOGGING_SETTINGS["max_bytes"] = 0  # bez rotacji – run_level czyta log od zapamiętanej pozycji
+    for site_key, site in config.SITES.items():
+        site.update({
+            "wp_api_url_base": server.wp_api_url_base(site_key),
+            "event_registry_key": "bench",
+            "wp_username": "bench",
+            "wp_password": "bench",
+            "wp_bearer_token": "bench",
+        })
+    return config
+
+
+def run_level(generator, metrics, jobs, concurrency):
+    """Wykonuje listę zadań (site_key, kind) z zadaną równoległością; zwraca wyniki poziomu."""
+    runners = {"premium": generator.run_generation_process, "news": generator.run_news_process}
+    metrics.reset()
+    json_log = generator.LOGGING_SETTINGS["json_log"]
+    log_offset = os.path.getsize(json_log) if os.path.exists(json_log) else 0
+
+    def one(job):
+        site_key, kind = job
+        start = time.perf_counter()
+        try:
+            result = runners[kind](site_key, "Automatycznie", None)
+            ok = bool(result) and "BŁĄD" not in str(result)
+        except Exception as e:
+            result, ok = f"{type(e).__name__}: {e}", False
+        return {"site": site_key, "kind": kind, "ok": ok, "seconds": time.perf_counter() - start, "result": str(result)}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, jobs))
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stages = read_stage_durations(json_log, log_offset)
+    peaks, memory_waits = read_job_memory(json_log, log_offset)
+    durations = [r["seconds"] for r in results]
+    ok = sum(1 for r in results if r["ok"])
+    return {
+        "concurrency": concurrency,
+        "jobs": len(results),
+        "ok": ok,
+        "errors": len(results) - ok,
+        "wall_seconds": round(wall, 3),
+        "articles_per_minute": round(ok / wall * 60, 2) if wall else 0.0,
+        "job_p50": round(_percentile(durations, 50), 3),
+        "job_p95": round(_percentile(durations, 95), 3),
+        "job_mean": round(statistics.mean(durations), 3) if durations else 0.0,
+        "stages": {
+            name: {
+                "count": len(values),
+                "p50": round(_percentile(values, 50), 4),
+                "p95": round(_percentile(values, 95), 4),
+                "avg": round(statistics.mean(values), 4),
+            }
+            for name, values in sorted(stages.items(), key=lambda kv: str(kv[0]))
+        },
+        "tracemalloc_peak_mb": round(peak / (1024 * 1024), 2),
+        "max_rss_mb": round(_max_rss_mb(), 1) if resource else None,
+        "job_process_rss_mb": {
+            "p50": round(_percentile(peaks, 50), 1),
+            "p95": round(_percentile(peaks, 95), 1),
+            "max": max(peaks) if peaks else 0.0,
+        },
+        "memory_waits": memory_waits,
+        "failures": [r for r in results if not r["ok"]][:5],
+    }
+
+
+def print_level(level):
+    print(
+        f"\n=== równoległość {level['concurrency']}: {level['ok']}/{level['jobs']} OK, "
+        f"{level['wall_seconds']:.1f} s, {level['articles_per_minute']:.1f} art./min ==="
+    )
+    print(f"zadanie: p50 {level['job_p50']:.2f} s, p95 {level['job_p95']:.2f} s")
+    print(f"pamięć: szczyt tracemalloc {level['tracemalloc_peak_mb']:.1f} MB, max RSS {level['max_rss_mb']} MB")
+    rss = level["job_process_rss_mb"]
+    print(f"szczyt RSS procesu w trakcie zadania: p50 {rss['p50']:.1f} MB, p95 {rss['p95']:.1f} MB, max {rss['max']:.1f} MB"
+          f"  |  wstrzymane przez budżet pamięci: {level['memory_waits']}")
+    print(f"{'etap':<14} {'n':>5} {'p50 [ms]':>9} {'p95 [ms]':>9} {'śr. [ms]':>9}")
+    for stage_name, s in level["stages"].items():
+        print(f"{stage_name:<14} {s['count']:>5} {s['p50'] * 1000:>9.1f} {s['p95'] * 1000:>9.1f} {s['avg'] * 1000:>9.1f}")
+    for failure in level["failures"]:
+        print(f"  BŁĄD [{failure['site']}/{failure['kind']}]: {failure['result'][:160]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline'u WriterPro na lokalnych atrapach API.")
+    parser.add_argument("--jobs", type=int, default=12, help="Liczba artykułów na poziom równoległości.")
+    parser.add_argument("--concurrency", default="1,4,8", help="Poziomy równoległości, np. 1,4,8.")
+    parser.add_argument("--kinds", default="premium,news", help="Typy artykułów (premium, news), przeplatane.")
+    parser.add_argument("--sites", default="", help="Portale (domyślnie wszystkie z config.SITES).")
+    parser.add_argument("--latency-scale", type=float, default=0.02,
+                        help="Mnożnik opóźnień atrap względem produkcyjnych (domyślnie 0.02).")
+    parser.add_argument("--latency", action="append", metavar="USŁUGA=S",
+                        help=f"Średnie opóźnienie usługi przed skalowaniem ({', '.join(SERVICES)}, all).")
+    parser.add_argument("--failure-rate", action="append", metavar="USŁUGA=P", help="Odsetek odpowiedzi 503 (0–1).")
+    parser.add_argument("--wp-capacity", type=int, default=0,
+                        help="Atrapa WP przyjmuje tyle zapytań naraz, ponad to 429 (0 = bez limitu).")
+    parser.add_argument("--rate-limits", action="store_true", help="Zostaw config.RATE_LIMITS (domyślnie wyłączone).")
+    parser.add_argument("--writing-mode", choices=("single", "sections"),
+                        help="Tryb pisania artykułów premium (domyślnie z config.WRITING_SETTINGS).")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="Budżet RSS workera (config.MEMORY_SETTINGS, 0 = bez limitu).")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PLIK", help="Zapisz wyniki do pliku JSON.")
+    parser.add_argument("--keep", action="store_true", help="Nie usuwaj katalogu roboczego (logi, artefakty).")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="writerpro-bench-")
+    server = MockServer(profiles=parse_profiles(args.latency, args.failure_rate),
+                        latency_scale=args.latency_scale, seed=args.seed, wp_capacity=args.wp_capacity).start()
+    try:
+        config = prepare_environment(server, workdir)
+        if not args.rate_limits:
+            config.RATE_LIMITS.clear()
+        if args.writing_mode:
+            config.WRITING_SETTINGS["mode"] = args.writing_mode
+        if args.memory_budget is not None:
+            config.MEMORY_SETTINGS["worker_budget_mb"] = args.memory_budget
+        import generator
+        import metrics
+
+        # Rozgrzewka: leniwe importy (openai, bs4) nie powinny zawyżać pierwszego poziomu
+        generator.warm_up()
+
+        site_keys = [s.strip() for s in args.sites.split(",") if s.strip()] or list(config.SITES)
+        jobs = [(site_keys[i % len(site_keys)], kinds[i % len(kinds)]) for i in range(args.jobs)]
+
+        print(f"Atrapy: {server.base_url}  |  skala opóźnień {args.latency_scale}  |  katalog: {workdir}")
+        report = {"args": vars(args), "levels": []}
+        for concurrency in levels:
+            level = run_level(generator, metrics, jobs, concurrency)
+            print_level(level)
+            report["levels"].append(level)
+        report["mock_requests"] = server.state.stats()
+    finally:
+        server.stop()
+        os.chdir(cwd)
+        if args.keep:
+            print(f"\nKatalog roboczy zachowany: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nWyniki zapisane do {json_path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
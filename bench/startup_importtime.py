@@ -0,0 +1,98 @@
+# bench/startup_importtime.py — pomiar czasu startu generatora (python -X importtime)
+#
+# Użycie (z katalogu głównego repo):
+#   python bench/startup_importtime.py            # pomiar + porównanie z bazą
+#   python bench/startup_importtime.py --update   # zapis nowej bazy do startup_baseline.json
+#
+# Kod wyjścia 1 oznacza regresję: czas importu lub `--help` przekroczył bazę
+# o więcej niż --tolerance (domyślnie 50%, bo pomiary na CI są zaszumione).
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Moduły, których koszt importu śledzimy, oraz polecenia CLI mierzone „na zegarek”
+MODULES = ["generator"]
+COMMANDS = {
+    "generator --help": [sys.executable, "generator.py", "--help"],
+}
+
+
+def measure_import_us(module):
+    """Zwraca skumulowany czas importu modułu (µs) wg `python -X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import {module} nie powiódł się:\n{proc.stderr}")
+    for line in reversed(proc.stderr.splitlines()):
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f"Brak wpisu importtime dla modułu {module}")
+
+
+def measure_command_ms(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=REPO_ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def run(repeat):
+    results = {}
+    for module in MODULES:
+        samples = [measure_import_us(module) for _ in range(repeat)]
+        results[f"import {module} [us]"] = int(statistics.median(samples))
+    for name, cmd in COMMANDS.items():
+        samples = [measure_command_ms(cmd) for _ in range(repeat)]
+        results[f"{name} [ms]"] = round(statistics.median(samples), 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark czasu startu generatora.")
+    parser.add_argument("--repeat", type=int, default=5, help="Liczba powtórzeń (mediana).")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Dopuszczalny wzrost względem bazy (0.5 = +50%%).")
+    parser.add_argument("--update", action="store_true", help="Zapisz wynik jako nową bazę.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    regressions = []
+    print(f"{'metryka':<32} {'wynik':>12} {'baza':>12}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        print(f"{name:<32} {value:>12} {base if base is not None else '-':>12}")
+        if base and value > base * (1 + args.tolerance):
+            regressions.append(name)
+
+    if args.update:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Zapisano bazę: {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print("REGRESJA czasu startu: " + ", ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# bench/title_keyword_eval.py — trafność kontroli „tytuł zgodny z frazą” (generator.title_respects_keyword)
+#
+# Użycie (z katalogu głównego repo):
+#   python bench/title_keyword_eval.py                     # korpus bench/title_keyword_corpus.jsonl
+#   python bench/title_keyword_eval.py --verbose           # także lista pomyłek
+#   python bench/title_keyword_eval.py --max-false-rewrite 0.05
+#
+# Korpus: pary {"keyword", "title", "match"} – "match": true, gdy tytuł zgadza
+# się z frazą i poprawka tytułu byłaby zbędna. Dla porównania liczone są dwie
+# wersje kontroli: dawna (dokładne słowa, krótka lista stopwords) i bieżąca
+# (tematy z polish.py):
+#   - false rewrite  – zgodny tytuł odrzucony (zbędne wywołanie rewrite_title_to_match_keyword),
+#   - missed rewrite – niezgodny tytuł przepuszczony.
+# Kod wyjścia 1, gdy odsetek false rewrite bieżącej wersji przekracza próg.
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import polish  # noqa: E402
+
+CORPUS_PATH = os.path.join(BENCH_DIR, "title_keyword_corpus.jsonl")
+
+# Kontrola sprzed polish.py – punkt odniesienia
+_LEGACY_STOPWORDS = {
+    "i", "oraz", "w", "we", "na", "do", "z", "ze", "o", "u", "od", "pod", "nad",
+    "przy", "po", "za", "jest", "są", "to", "tych", "ten", "ta", "te", "tę",
+    "naj", "dla", "roku", "województwa"
+}
+
+
+def legacy_respects_keyword(title, keyword):
+    def words(s):
+        found = re.findall(r"[A-Za-zĄĆĘŁŃÓŚŹŻąćęłńóśźż0-9]+", (s or "").lower())
+        return {w for w in found if len(w) >= 4 and w not in _LEGACY_STOPWORDS}
+
+    kw_set = words(keyword)
+    if not kw_set:
+        return True
+    return len(kw_set & words(title)) >= max(1, len(kw_set) - 1)
+
+
+def evaluate(corpus, check):
+    """(false rewrite, missed rewrite, pomyłki, µs na parę) dla funkcji check(title, keyword)."""
+    errors, false_rewrite, missed = [], 0, 0
+    start = time.perf_counter()
+    verdicts = [check(item["title"], item["keyword"]) for item in corpus]
+    per_pair_us = (time.perf_counter() - start) / max(1, len(corpus)) * 1e6
+    for item, ok in zip(corpus, verdicts):
+        if item["match"] and not ok:
+            false_rewrite += 1
+            errors.append(("false rewrite", item))
+        elif not item["match"] and ok:
+            missed += 1
+            errors.append(("missed rewrite", item))
+    return false_rewrite, missed, errors, per_pair_us
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trafność kontroli zgodności tytułu z frazą kluczową.")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="Plik JSONL z parami fraza–tytuł.")
+    parser.add_argument("--max-false-rewrite", type=float, default=0.05,
+                        help="Próg odsetka zbędnych poprawek tytułu (domyślnie 0.05).")
+    parser.add_argument("--verbose", action="store_true", help="Wypisz pomyłki bieżącej wersji.")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    positives = sum(1 for item in corpus if item["match"]) or 1
+    negatives = sum(1 for item in corpus if not item["match"]) or 1
+
+    print(f"Korpus: {len(corpus)} par ({positives} zgodnych, {len(corpus) - positives} niezgodnych)")
+    print(f"{'wersja':<10} {'false rewrite':>15} {'missed rewrite':>16} {'µs/para':>9}")
+    results = {}
+    for name, check in (("dawna", legacy_respects_keyword), ("polish.py", polish.covers)):
+        false_rewrite, missed, errors, per_pair_us = evaluate(corpus, check)
+        results[name] = false_rewrite / positives
+        print(f"{name:<10} {false_rewrite:>4} ({false_rewrite / positives:6.1%}) {missed:>5} ({missed / negatives:6.1%}) "
+              f"{per_pair_us:>9.1f}")
+        if args.verbose and name == "polish.py":
+            for kind, item in errors:
+                print(f"  {kind}: '{item['keyword']}' ↔ '{item['title']}'")
+    info = polish.stem.cache_info()
+    print(f"Cache tematów: {info.hits} trafień, {info.misses} chybień")
+
+    if results["polish.py"] > args.max_false_rewrite:
+        print(f"REGRESJA: false rewrite {results['polish.py']:.1%} > {args.max_false_rewrite:.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# bulk_import.py — import gotowych artykułów z JSONL (ujście "jsonl") do WordPressa
+#
+# Artykuły wygenerowane offline (generator.py --output jsonl) trafiają na portal
+# hurtowo, zamiast jeden po drugim:
+#   1. kategorie i tagi całego pliku rozwiązywane raz per portal
+#      (wp_batch.resolve_terms – brakujące terminy jednym batch/v1),
+#   2. obrazki wgrywane równolegle (upload_image_to_wp), każdy raz na bazę
+#      WP: ten sam URL u kilku artykułów albo portali z jednego WP to jedno media,
+#   3. wpisy w porcjach po WP_BATCH_SETTINGS["max_requests"] przez
+#      wp_batch.publish_many (batch/v1 albo równoległe publish_to_wp), kilka
+#      porcji naraz (BULK_IMPORT_SETTINGS["max_workers"]). Zapytania i tak
+#      ogranicza limiter hosta (wp_limiter.py).
+# Postęp (zaimportowane artykuły, wgrane obrazki) zapisywany jest po każdej
+# porcji w SQLite w DATA_DIR. Przerwany import wystarczy uruchomić ponownie:
+# gotowe artykuły są pomijane, a te z błędem próbowane jeszcze raz.
+#
+#   python bulk_import.py data/output/tylkoslask.jsonl [--site tylkoslask] [--status draft]
+#   python bulk_import.py data/output/tylkoslask.jsonl --progress   # tylko stan importu
+
+import argparse
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from config import BULK_IMPORT_SETTINGS, DATA_DIR, WP_BATCH_SETTINGS
+from sites import SITES, config_error
+
+IMPORTED = metrics.Counter("writerpro_bulk_import_total", "Artykuły z bulk importu wg portalu i wyniku.", ("site", "outcome"))
+
+
+def article_key(record):
+    """Klucz artykułu w stanie importu: portal + tytuł + treść (ta sama linia w innym pliku to ten sam artykuł)."""
+    raw = "\x1f".join((record["site_key"], record.get("title") or "", record.get("content") or ""))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _LocalImage:
+    """Plik z katalogu media/ ujścia jsonl w kształcie pliku wgranego w app.py (getvalue(), type)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.type = mimetypes.guess_type(path)[0] or "image/jpeg"
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+class ImportProgress:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " key TEXT PRIMARY KEY, site_key TEXT, title TEXT, state TEXT, post_id INTEGER, link TEXT, updated REAL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS media (base TEXT, ref TEXT, media_id INTEGER, PRIMARY KEY (base, ref))"
+            )
+
+    def done(self, keys):
+        """Podzbiór `keys` już zaimportowanych."""
+        with self.lock:
+            rows = self.conn.execute("SELECT key FROM articles WHERE state='done'").fetchall()
+        return {key for (key,) in rows} & set(keys)
+
+    def mark(self, items):
+        """Zapisuje wynik porcji: [(klucz, rekord, wpis WP albo None)]."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO articles (key, site_key, title, state, post_id, link, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, record["site_key"], record.get("title"), "done" if wp_post else "failed",
+                     (wp_post or {}).get("id"), (wp_post or {}).get("link"), time.time())
+                    for key, record, wp_post in items
+                ],
+            )
+
+    def media(self, base):
+        """{ref: media_id} obrazków wgranych już do bazy WP `base`."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT ref, media_id FROM media WHERE base=?", (base,)).fetchall())
+
+    def save_media(self, base, ref, media_id):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO media (base, ref, media_id) VALUES (?, ?, ?)", (base, ref, media_id))
+
+    def summary(self, keys):
+        """{(site_key, stan): liczba} dla artykułów z `keys`."""
+        with self.lock:
+            rows = self.conn.execute("SELECT key, site_key, state FROM articles").fetchall()
+        keys, counts = set(keys), {}
+        for key, site_key, state in rows:
+            if key in keys:
+                counts[(site_key, state)] = counts.get((site_key, state), 0) + 1
+        return counts
+
+
+_progress = None
+_progress_lock = threading.Lock()
+
+
+def get_import_progress() -> ImportProgress:
+    """Współdzielony stan importu (SQLite w DATA_DIR), tworzony przy pierwszym użyciu."""
+    global _progress
+    if _progress is None:
+        with _progress_lock:
+            if _progress is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _progress = ImportProgress(os.path.join(DATA_DIR, "bulk_import.sqlite3"))
+    return _progress
+
+
+# -----------------------
+# ODCZYT PLIKU
+# -----------------------
+def read_articles(path, site_key=None):
+    """Rekordy z pliku JSONL (`site_key` nadpisuje portal z pliku); błędne linie są logowane i pomijane."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logging.error(f"[IMPORT] {path}:{line_no}: niepoprawny JSON ({e}) – pomijam.")
+                continue
+            if site_key:
+                record["site_key"] = site_key
+            if record.get("site_key") not in SITES or not record.get("title") or not record.get("content"):
+                logging.error(f"[IMPORT] {path}:{line_no}: brak tytułu, treści albo znanego site_key – pomijam.")
+                continue
+            records.append(record)
+    return records
+
+
+def _image_source(ref, media_dir):
+    if not ref or ref.startswith("http"):
+        return ref
+    path = os.path.join(media_dir, ref)
+    if not os.path.isfile(path):
+        logging.warning(f"[IMPORT] Brak pliku obrazka {path} – artykuł bez obrazka wyróżnionego.")
+        return None
+    return _LocalImage(path)
+
+
+# -----------------------
+# IMPORT
+# -----------------------
+def upload_media(site_config, records, media_dir, progress, workers):
+    """{ref: media_id} dla obrazków z `records` – każdy wgrany raz na bazę WP, równolegle."""
+    from generator import upload_image_to_wp
+
+    base = site_config["wp_api_url_base"]
+    known = progress.media(base)
+    todo = {}
+    for record in records:
+        ref = record.get("image")
+        if ref and ref not in known:
+            todo.setdefault(ref, record["title"])
+    if not todo:
+        return known
+
+    logging.info(f"[IMPORT] {site_config['site_key']}: wgrywam {len(todo)} obrazków ({len(known)} już w WP).")
+
+    def upload(item):
+        ref, title = item
+        source = _image_source(ref, media_dir)
+        media_id = upload_image_to_wp(source, title, site_config) if source else None
+        if media_id:
+            progress.save_media(base, ref, media_id)
+        return ref, media_id
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        known.update((ref, media_id) for ref, media_id in pool.map(upload, todo.items()) if media_id)
+    return known
+
+
+def import_site(site_config, records, media_dir, status="publish", progress=None):
+    """Importuje `records` jednego portalu; zwraca (zaimportowane, błędy)."""
+    from generator import index_published_post
+    from wp_batch import publish_many, resolve_terms
+
+    progress = progress or get_import_progress()
+    site_key = site_config["site_key"]
+    workers = BULK_IMPORT_SETTINGS.get("max_workers", 4)
+
+    # 1. Terminy całego pliku naraz
+    category_ids = resolve_terms(site_config, "categories", [r.get("category") for r in records])
+    tag_ids = resolve_terms(site_config, "tags", [t for r in records for t in r.get("tags") or ()])
+    # 2. Obrazki
+    media_ids = upload_media(site_config, records, media_dir, progress, BULK_IMPORT_SETTINGS.get("media_workers", 8))
+
+    def item(record):
+        category = (record.get("category") or "").strip().lower()
+        tags = [tag_ids.get(t.strip().lower()) for t in record.get("tags") or () if t and t.strip()]
+        post = {
+            "title": record["title"],
+            "content": record["content"],
+            "status": status,
+            "categories": [category_ids[category]] if category in category_ids else [],
+            "tags": list(dict.fromkeys(t for t in tags if t)),
+        }
+        if record.get("slug"):
+            post["slug"] = record["slug"]
+        if media_ids.get(record.get("image")):
+            post["featured_media"] = media_ids[record["image"]]
+        return {"site_config": site_config, "post": post, "tags": ()}
+
+    # 3. Wpisy porcjami, kilka porcji równolegle; stan zapisany po każdej porcji
+    size = WP_BATCH_SETTINGS["max_requests"]
+    chunks = [records[i:i + size] for i in range(0, len(records), size)]
+    counts = {"done": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    def run(chunk):
+        results = publish_many([item(record) for record in chunk])
+        progress.mark([(article_key(record), record, wp_post) for record, wp_post in zip(chunk, results)])
+        for wp_post in results:
+            IMPORTED.inc(site=site_key, outcome="done" if wp_post else "failed")
+            if wp_post:
+                index_published_post(site_config, wp_post)
+        with counts_lock:
+            for wp_post in results:
+                counts["done" if wp_post else "failed"] += 1
+            logging.info(f"[IMPORT] {site_key}: {counts['done'] + counts['failed']}/{len(records)} "
+                         f"(błędy: {counts['failed']})")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, chunks))
+    return counts["done"], counts["failed"]
+
+
+def run_import(path, site_key=None, status="publish"):
+    """Importuje plik JSONL; zwraca {site_key: (zaimportowane, błędy, pominięte)}."""
+    records = read_articles(path, site_key)
+    media_dir = os.path.join(os.path.dirname(os.path.abspath(path)), "media")
+    progress = get_import_progress()
+    done = progress.done(article_key(r) for r in records)
+
+    by_site = {}
+    for record in records:
+        by_site.setdefault(record["site_key"], []).append(record)
+
+    report = {}
+    for key, site_records in by_site.items():
+        skipped = sum(1 for r in site_records if article_key(r) in done)
+        pending = [r for r in site_records if article_key(r) not in done]
+        error = config_error(SITES[key])
+        if error:
+            logging.error(f"[IMPORT] {error}")
+            report[key] = (0, len(pending), skipped)
+            continue
+        if skipped:
+            logging.info(f"[IMPORT] {key}: {skipped} artykułów już zaimportowanych – pomijam.")
+        imported, failed = import_site(SITES[key], pending, media_dir, status, progress) if pending else (0, 0)
+        report[key] = (imported, failed, skipped)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import artykułów z pliku JSONL (ujście jsonl) do WordPressa.")
+    parser.add_argument("path", help="Plik JSONL, np. data/output/tylkoslask.jsonl.")
+    parser.add_argument("--site", choices=list(SITES), help="Importuj na ten portal (zamiast site_key z pliku).")
+    parser.add_argument("--status", choices=["publish", "draft"], default="publish", help="Status nowych wpisów.")
+    parser.add_argument("--workers", type=int, help="Porcje wpisów wysyłane równolegle (domyślnie z config).")
+    parser.add_argument("--progress", action="store_true", help="Tylko wypisz stan importu tego pliku.")
+    args = parser.parse_args(argv)
+
+    from generator import setup_logging
+    setup_logging()
+    if args.workers:
+        BULK_IMPORT_SETTINGS["max_workers"] = args.workers
+    if args.progress:
+        keys = [article_key(r) for r in read_articles(args.path, args.site)]
+        for (site_key, state), count in sorted(get_import_progress().summary(keys).items()):
+            print(f"{site_key:<28} {state:<7} {count}")
+        print(f"{'razem w pliku':<36} {len(keys)}")
+        return
+
+    started = time.monotonic()
+    report = run_import(args.path, args.site, args.status)
+    for site_key, (imported, failed, skipped) in report.items():
+        print(f"{site_key:<28} zaimportowano {imported}, błędy {failed}, pominięte (już w WP) {skipped}")
+    print(f"Czas: {time.monotonic() - started:.1f} s")
+    sys.exit(1 if any(failed for _, failed, _ in report.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,206 @@ COMMON_KEYS = {
     "PEXELS_API_KEY": os.getenv("PEXELS_API_KEY") # <-- To jest nowa, dodana linia
 }
 
+# Adresy usług zewnętrznych; zmienne środowiskowe pozwalają podmienić je na
+# lokalne atrapy (bench/mock_servers.py) bez zmian w kodzie
+ENDPOINTS = {
+    "perplexity": os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions"),
+    "openai_base_url": os.getenv("OPENAI_BASE_URL"),       # None = domyślny adres OpenAI
+    "eventregistry_host": os.getenv("EVENTREGISTRY_HOST"), # None = https://eventregistry.org
+}
+
+# Katalog na lokalny stan (rejestr tematów, indeksy podobieństwa itp.)
+DATA_DIR = os.getenv("WRITERPRO_DATA_DIR", "data")
+
+# Logi: generator.log (tekst) + generator.jsonl (zdarzenia JSON z job_id/etapem/czasem),
+# oba rotowane po rozmiarze; duże treści (research, outline, HTML) jako osobne pliki
+LOGGING_SETTINGS = {
+    "json_log": "generator.jsonl",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "artifacts_dir": "artifacts",
+    "artifacts_keep_days": 14,          # starsze katalogi artifacts/<data>/ są usuwane (0 = bez usuwania)
+    "profile_dir": "profiles",          # tryb --profile: cProfile + tracemalloc per etap
+    "profile_top": 25,                  # ile funkcji / miejsc alokacji w raportach etapów
+}
+
+# Rejestr tematów współdzielony przez portale publikujące na ten sam host WP
+TOPIC_REGISTRY_SETTINGS = {
+    "threshold": 0.5,        # szacowane podobieństwo Jaccarda (tytuł + zajawka), od którego temat to duplikat
+    "lookback_days": 14,     # starsze tematy nie blokują nowych
+    "candidates": 10,        # ile artykułów z EventRegistry sprawdzamy, zanim się poddamy
+    "claim_ttl_minutes": 120,  # rezerwacja tematu przed publikacją; po awarii wygasa po tym czasie
+}
+
+# Kolejka tematów ze źródła "AI" (topic_backlog.py): jedno wywołanie modelu daje
+# batch_size tematów; kolejne zadania biorą je z kolejki zamiast pytać model od nowa
+TOPIC_BACKLOG_SETTINGS = {
+    "batch_size": 10,             # ile tematów zamawiamy jednym wywołaniem
+    "min_queued": 3,              # poniżej – uzupełnienie w tle (bieżące zadanie nie czeka)
+    "max_age_hours": 48,          # starsze tematy są nieaktualne i wypadają z kolejki
+    "dedup_threshold": 0.5,       # podobieństwo tytułów (MinHash), od którego propozycja to duplikat
+    "dedup_window_days": 7,       # z iloma dniami użytych tematów porównujemy nowe propozycje
+}
+
+# Metryki Prometheus: port endpointu /metrics demona oraz adres, z którego
+# strona „Ops” w app.py pobiera metryki (None = tylko metryki procesu aplikacji)
+METRICS_SETTINGS = {
+    "port": 9108,
+    "scrape_url": os.getenv("WRITERPRO_METRICS_URL"),
+}
+
+# Wykrywanie prawie-duplikatów względem wpisów już obecnych na portalu
+SIMILARITY_SETTINGS = {
+    "title_threshold": 0.6,        # tytuł/temat vs tytuły istniejących wpisów (przed outline'em)
+    "content_threshold": 0.5,      # gotowy artykuł vs treść istniejących wpisów (przed publikacją)
+    "action": "flag",              # "reject" – przerwij generowanie, "flag" – tylko ostrzeżenie w logu
+    "sync_interval_minutes": 30,   # jak często dociągać nowe wpisy z WP do indeksu
+}
+
+# Limity zapytań do dostawców LLM (zapytania na minutę, wspólne dla całego procesu)
+RATE_LIMITS = {
+    "perplexity": 40,
+    "openai": 300,
+}
+
+# Modele per etap (llm.py): kandydaci w kolejności preferencji. Router wybiera
+# najszybszego zdrowego (p50 z ostatnich wywołań), po błędzie przechodzi do
+# kolejnego, a przy długim ogonie dubluje zapytanie. Per portal:
+# SITES[...]["models"] = {"write": [{"provider": ..., "model": ...}]} nadpisuje trasę.
+# Research wymaga wyszukiwania w sieci – tylko modele Perplexity.
+LLM_ROUTES = {
+    "research": [
+        {"provider": "perplexity", "model": "sonar-pro"},
+        {"provider": "perplexity", "model": "sonar"},
+    ],
+    "outline": [
+        {"provider": "perplexity", "model": "sonar-pro"},
+        {"provider": "openai", "model": "gpt-4o"},
+    ],
+    "write": [
+        {"provider": "perplexity", "model": "sonar-pro"},
+        {"provider": "openai", "model": "gpt-4o"},
+    ],
+    "classify": [                 # tytuły, kategorie, tagi, lead przy pisaniu sekcjami
+        {"provider": "openai", "model": "gpt-4o-mini"},
+        {"provider": "perplexity", "model": "sonar"},
+    ],
+}
+
+LLM_ROUTING = {
+    "window": 50,                 # ile ostatnich wywołań kandydata liczy się do p50/p95 i odsetka błędów
+    "min_samples": 5,             # poniżej – brak statystyk: kolejność z konfiguracji, bez dublowania
+    "max_error_rate": 0.5,        # powyżej – kandydat niezdrowy (na koniec kolejki)
+    "cooldown_seconds": 60,       # po tylu sekundach bez wywołań niezdrowy kandydat dostaje znowu szansę
+    "hedge": True,
+    "hedge_after_p95": 1.0,       # drugi kandydat startuje po p95 × mnożnik bez odpowiedzi…
+    "hedge_min_seconds": 5,       # …ale nie wcześniej niż po tylu sekundach
+    "timeout_seconds": 400,
+    "max_workers": 32,            # wątki wywołań LLM (łącznie z dublowanymi)
+}
+
+# Zbiorcze zapisy do WordPressa (wp_batch.py): publikacje tego samego hosta
+# zebrane w oknie czasowym idą jednym zapytaniem /wp-json/batch/v1
+WP_BATCH_SETTINGS = {
+    "enabled": True,
+    "window_seconds": 1.0,        # ile pierwsza publikacja czeka na kolejne do tego samego hosta
+    "max_requests": 25,           # limit podzapytań WP w jednym batchu (domyślny max_batch_size)
+    "max_workers": 4,             # równoległe pojedyncze zapytania, gdy host nie obsługuje batch/v1
+}
+
+# Limit równoległych zapytań per host WordPressa (wp_limiter.py), wspólny dla
+# wszystkich portali z tego hosta. Limit rośnie o ~1 na „rundę” udanych zapytań,
+# po 429/503 lub błędzie połączenia spada o połowę (plus pauza hosta), przy
+# zapytaniach dużo wolniejszych niż zwykle – łagodniej
+WP_HOST_LIMITS = {
+    "initial": 4,                 # limit na starcie procesu
+    "min": 1,
+    "max": 16,
+    "increase": 1.0,              # addytywny wzrost na rundę
+    "decrease": 0.5,              # mnożnik po 429/503/błędzie
+    "slow_factor": 3.0,           # „wolne” = ponad 3× średni czas zapytań tej metody HTTP…
+    "slow_decrease": 0.8,         # …i wtedy limit ×0.8
+    "retries": 2,                 # ponowienia zapytania po 429/503
+    "backoff_seconds": 2,         # pauza hosta bez Retry-After: 2, 4, 8… s
+    "max_backoff_seconds": 60,
+}
+
+# Dokąd trafia gotowy artykuł (sinks.py): "wordpress" – publikacja, albo pliki
+# w katalogu "dir": "directory" (HTML + metadane), "jsonl" (do bulk importu),
+# "wxr" (eksport WordPressa). Per portal: "output" nadpisuje "sink"; CLI: --output.
+OUTPUT_SETTINGS = {
+    "sink": "wordpress",
+    "dir": os.path.join(DATA_DIR, "output"),
+}
+
+# Kontrola reguł SEO z promptów po wygenerowaniu (seo_gate.py): lokalne poprawki
+# (kapitalizacja, długość tytułu, niedozwolone tagi), a brakujący box lub tabela
+# uzupełniane wąskim wywołaniem LLM dla jednego fragmentu ("llm_fixes")
+SEO_SETTINGS = {
+    "enabled": True,
+    "llm_fixes": True,
+    "title_max_chars": 70,
+    "require_table": True,        # tylko premium i tylko gdy sekcja ma min. table_min_numbers liczb
+    "table_min_numbers": 4,
+}
+
+# Import gotowych artykułów z JSONL do WP (bulk_import.py)
+BULK_IMPORT_SETTINGS = {
+    "max_workers": 4,             # porcje wpisów (po WP_BATCH_SETTINGS["max_requests"]) wysyłane równolegle
+    "media_workers": 8,           # równoległe uploady obrazków
+}
+
+# Pamięć workera przy dużych partiach (memory.py): obrazki w plikach tymczasowych
+# (do spool_max_kb w pamięci), budżet RSS procesu – ponad nim
+# nowe zadania czekają na koniec trwających (0 = bez limitu)
+MEMORY_SETTINGS = {
+    "worker_budget_mb": 1024,
+    "spool_max_kb": 64,
+    "admit_timeout_seconds": 600,  # dłużej nie czekamy – zadanie startuje mimo przekroczenia
+    "sample_seconds": 0.05,        # próbkowanie RSS (szczyt procesu w trakcie zadania, job_end)
+}
+
+# Pisanie artykułu premium: "single" – cały tekst jednym wywołaniem, "sections" –
+# sekcje z planu pisane równolegle + lekki przebieg spinający (lead, powtórzenia).
+# Per portal: "writing_mode" nadpisuje "mode".
+WRITING_SETTINGS = {
+    "mode": "single",
+    "max_parallel_sections": 6,
+    "min_sections": 3,            # plan z mniejszą liczbą sekcji → zwykłe pisanie jednym wywołaniem
+}
+
+# Fan-out (generator.run_fanout_process): temat i research raz, potem artykuły dla
+# kilku portali równolegle. Każdy portal dostaje własny kąt – SITES[...]["fanout_angle"]
+# albo kolejny z listy – i wie, jakie kąty mają pozostałe teksty.
+FANOUT_SETTINGS = {
+    "max_workers": 4,
+    "angles": [
+        "praktyczny: co to zmienia dla czytelnika i co powinien zrobić",
+        "analityczny: przyczyny, skutki i szerszy kontekst",
+        "liczby: najważniejsze dane, porównania i trendy",
+        "ludzki: historie, opinie ekspertów i reakcje zainteresowanych",
+        "prognoza: co będzie dalej, scenariusze i terminy",
+    ],
+}
+
+# Tryb publikacji (release.py): "publish" – od razu, "draft" – szkic promowany
+# zbiorczo przez demon w zaplanowanym slocie, "future" – wpis zaplanowany po
+# stronie WP (status future). Per portal: "publish_mode" nadpisuje "mode".
+RELEASE_SETTINGS = {
+    "mode": "publish",
+    "hours": (7, 22),             # okno publikacji (czas lokalny); sloty spoza okna przechodzą na jego początek
+    "min_gap_minutes": 45,        # minimalny odstęp między publikacjami na jednym hoście WP
+    "reserved_ttl_minutes": 60,   # slot bez zapisu w WP (np. proces padł w trakcie) zwalniany po tym czasie
+}
+
+# Ustawienia demona publikacji (scheduler.py)
+SCHEDULER_SETTINGS = {
+    "quiet_hours": (23, 6),       # w godz. 23:00–06:00 (czas lokalny) nic nie publikujemy
+    "max_concurrent_jobs": 2,     # ile artykułów generujemy równolegle
+    "tick_seconds": 30,           # jak często demon sprawdza kolejkę
+    "jitter_minutes": 10,         # losowe przesunięcie startów, żeby portale nie startowały razem
+}
+
 # --- SZABLON PROMPTU PREMIUM (z jednoznacznym zakazem przypisów i linków) ---
 PREMIUM_PROMPT_TEMPLATE = """
 ### GŁÓWNE ZADANIE I PERSPEKTYWA
@@ -99,7 +299,10 @@ Artykuł musi być **analitycznym ROZWINIĘCIEM TEMATU** z poniższych informacj
 - Sprawdź, że każde odwołanie do „danych”, „raportu”, „statystyk” zawiera **konkret** (liczbę/rok/instytucję) i **nazwę źródła w tekście**.
 """
 
-# Konfiguracja poszczególnych portali wczytująca dane z sekretów
+# Konfiguracja poszczególnych portali wczytująca dane z sekretów.
+# "extends": "<portal>" – profil przejmuje pola wskazanego portalu (poza "schedule"
+# i "ai_topic_prompt") i nadpisuje tylko podane. Profile kompiluje i sprawdza
+# sites.py; reszta kodu korzysta z sites.SITES (python sites.py --check).
 SITES = {
     "autozakup": {
         "friendly_name": "Autozakup.com.pl",
@@ -109,9 +312,15 @@ SITES = {
         "auth_method": "basic",
         "event_registry_key": os.getenv("AUTOZAKUP_ER_KEY"),
         "er_concept_uri": "http://pl.wikipedia.org/wiki/Motoryzacja",
+        # Źródło tematów "AI" (topic_sources.py); bez tego pola prompt powstaje z thematic_focus
+        "ai_topic_prompt": "Angażujące tematy dla portalu motoryzacyjnego. Skup się na nowościach rynkowych, testach popularnych modeli aut, zmianach w przepisach drogowych lub praktycznych poradach dla kierowców w Polsce.",
         "thematic_focus": "motoryzacji (samochody, przepisy, testy, nowości rynkowe)",
         "prompt_template": PREMIUM_PROMPT_TEMPLATE,
-        "author_id": 1
+        "author_id": 1,
+        # Harmonogram demona (scheduler.py): typ artykułu + co ile godzin
+        "schedule": [
+            {"type": "premium", "every_hours": 24},
+        ],
     },
     "krakowskiryneknieruchomosci": {
         "friendly_name": "Krakowski Rynek Nieruchomości",
@@ -121,6 +330,7 @@ SITES = {
         "auth_method": "basic",
         "event_registry_key": os.getenv("KRN_ER_KEY"),
         "er_concept_uri": "http://pl.wikipedia.org/wiki/Rynek_nieruchomości",
+        "ai_topic_prompt": "Tematy dla portalu o nieruchomościach w Krakowie. Mogą dotyczyć analizy cen w dzielnicach, nowych inwestycji deweloperskich, porad dla kupujących pierwsze mieszkanie lub trendów na rynku najmu.",
         "thematic_focus": "nieruchomości (ceny mieszkań, porady dla kupujących, nowe inwestycje, prawo budowlane)",
         "prompt_template": PREMIUM_PROMPT_TEMPLATE,
         "author_id": 2
@@ -200,18 +410,18 @@ SITES = {
             "http://en.wikipedia.org/wiki/Jastrzębie-Zdrój",
             "http://en.wikipedia.org/wiki/Mysłowice"
         ],
+        "ai_topic_prompt": "Aktualne, interesujące i lokalne tematy dla regionalnego portalu informacyjnego o Górnym Śląsku i Zagłębiu. Skup się na sprawach ważnych dla mieszkańców Katowic, Częstochowy, Sosnowca, Gliwic. Tematy powinny być świeże i dotyczyć ostatnich wydarzeń, np. z ostatniego tygodnia.",
         "thematic_focus": "Górnego Śląska i Zagłębia (portal regionalny)",
         "prompt_template": PREMIUM_PROMPT_TEMPLATE,
-        "author_id": 3
+        "author_id": 3,
+        "schedule": [
+            {"type": "news", "every_hours": 2},
+        ],
     },
 
     "tylkoslask2": {
+        "extends": "tylkoslask",
         "friendly_name": "TylkoSlask.pl2",
-        "wp_api_url_base": "https://tylkoslask.pl/wp-json/wp/v2",
-        "wp_username": os.getenv("TYLKOSLASK_USER"),
-        "wp_password": os.getenv("TYLKOSLASK_PASS"),
-        "auth_method": "basic",
-        "event_registry_key": os.getenv("TYLKOSLASK_ER_KEY"),
         "er_concept_uris": [
             "http://en.wikipedia.org/wiki/Jaworzno",
             "http://en.wikipedia.org/wiki/Siemianowice_Śląskie",
@@ -229,18 +439,11 @@ SITES = {
             "http://en.wikipedia.org/wiki/Cieszyn",
             "http://en.wikipedia.org/wiki/Czeladź"
         ],
-        "thematic_focus": "Górnego Śląska i Zagłębia (portal regionalny)",
-        "prompt_template": PREMIUM_PROMPT_TEMPLATE,
-        "author_id": 3
     },
 
     "tylkoslask3": {
+        "extends": "tylkoslask",
         "friendly_name": "TylkoSlask.pl3",
-        "wp_api_url_base": "https://tylkoslask.pl/wp-json/wp/v2",
-        "wp_username": os.getenv("TYLKOSLASK_USER"),
-        "wp_password": os.getenv("TYLKOSLASK_PASS"),
-        "auth_method": "basic",
-        "event_registry_key": os.getenv("TYLKOSLASK_ER_KEY"),
         "er_concept_uris": [
             "http://en.wikipedia.org/wiki/Łaziska_Górne",
             "http://en.wikipedia.org/wiki/Żywiec",
@@ -258,18 +461,11 @@ SITES = {
             "http://en.wikipedia.org/wiki/Miasteczko_Śląskie",
             "http://en.wikipedia.org/wiki/Kuźnia_Raciborska"
         ],
-        "thematic_focus": "Górnego Śląska i Zagłębia (portal regionalny)",
-        "prompt_template": PREMIUM_PROMPT_TEMPLATE,
-        "author_id": 3
     },
 
     "tylkoslask4": {
+        "extends": "tylkoslask",
         "friendly_name": "TylkoSlask.pl4",
-        "wp_api_url_base": "https://tylkoslask.pl/wp-json/wp/v2",
-        "wp_username": os.getenv("TYLKOSLASK_USER"),
-        "wp_password": os.getenv("TYLKOSLASK_PASS"),
-        "auth_method": "basic",
-        "event_registry_key": os.getenv("TYLKOSLASK_ER_KEY"),
         "er_concept_uris": [
             "http://en.wikipedia.org/wiki/Sośnicowice",
             "http://en.wikipedia.org/wiki/Siewierz",
@@ -287,9 +483,6 @@ SITES = {
             "http://en.wikipedia.org/wiki/Poraj",
             "http://en.wikipedia.org/wiki/Skoczów"
         ],
-        "thematic_focus": "Górnego Śląska i Zagłębia (portal regionalny)",
-        "prompt_template": PREMIUM_PROMPT_TEMPLATE,
-        "author_id": 3
     },
     "ogrodzeniapanelowe": {
         "friendly_name": "OgrodzeniaPanelowePolska.pl",
@@ -2,76 +2,127 @@
 
 import json
 import logging
-import base64
+import os
 import argparse
 import textwrap
 import re
+import sys
 import time
-from datetime import datetime, timedelta
-from typing import Optional, List
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Optional
 
-import requests
-import openai
-from bs4 import BeautifulSoup
-from eventregistry import EventRegistry, QueryArticlesIter
+# Ciężkie biblioteki (requests, openai, bs4, eventregistry) są importowane
+# dopiero przy pierwszym użyciu – dzięki temu `--help` i krótkie zadania z crona
+# nie płacą pełnego kosztu importu. Pomiar: bench/startup_importtime.py
 
 # -----------------------
 # KONFIG / LOGOWANIE
 # -----------------------
 try:
-    from config import SITES, COMMON_KEYS
+    from config import (
+        COMMON_KEYS, DATA_DIR, ENDPOINTS, SIMILARITY_SETTINGS,
+        LOGGING_SETTINGS, WRITING_SETTINGS, FANOUT_SETTINGS, OUTPUT_SETTINGS,
+    )
 except ImportError:
     print("BŁĄD: Nie znaleziono pliku config.py.")
     exit(1)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("generator.log", encoding="utf-8"),
-        logging.StreamHandler()
-    ],
-)
+import llm
+import memory
+import metrics
+import polish
+import seo_gate
+import sinks
+import structured
+import topic_sources
+import tracing
+from sites import SITES, config_error
+from tracing import save_artifact, traced_job, traced_stage
+from wp_http import get_auth_header
+from wp_http import session as _http
+from wp_http import soup as _soup
+from wp_http import term_ids as _term_id_cache
+
+_logging_ready = False
+
+
+def setup_logging():
+    """
+    Konfiguruje logowanie (generator.log + konsola + log JSON z tracing.py,
+    wszystkie pliki rotowane po rozmiarze) przy pierwszym użyciu, a nie
+    w momencie importu modułu. Wywołania kolejne są no-op.
+    """
+    global _logging_ready
+    if _logging_ready:
+        return
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            RotatingFileHandler(
+                "generator.log",
+                maxBytes=LOGGING_SETTINGS["max_bytes"],
+                backupCount=LOGGING_SETTINGS["backup_count"],
+                encoding="utf-8",
+            ),
+            logging.StreamHandler(),
+            tracing.setup_json_logging(),
+        ],
+    )
+    _logging_ready = True
 
 # -----------------------
-# KLIENCI API
+# KLIENCI API (leniwa inicjalizacja)
 # -----------------------
-try:
-    openai_client = openai.OpenAI(api_key=COMMON_KEYS.get("OPENAI_API_KEY"))
-except Exception as e:
-    logging.error(f"Nie udało się zainicjować klienta OpenAI: {e}")
-    exit(1)
+_clients_lock = threading.Lock()
+_openai_client = None
+_er_clients = {}
 
-# -----------------------
-# STAŁE / STOPWORDS
-# -----------------------
-STOPWORDS_PL = {
-    "i", "oraz", "w", "we", "na", "do", "z", "ze", "o", "u", "od", "pod", "nad",
-    "przy", "po", "za", "jest", "są", "to", "tych", "ten", "ta", "te", "tę",
-    "naj", "dla", "roku", "województwa"
-}
 
-# -----------------------
-# POMOCNICZE: Perplexity
-# -----------------------
-def _call_perplexity_api(prompt: str) -> Optional[str]:
-    headers = {
-        "Authorization": f"Bearer {COMMON_KEYS.get('PERPLEXITY_API_KEY')}",
-        "Content-Type": "application/json",
-    }
-    payload = {"model": "sonar-pro", "messages": [{"role": "user", "content": prompt}]}
+def warm_up():
+    """
+    Wykonuje leniwe importy i inicjalizację klientów z góry (openai, bs4).
+    Przydatne przed profilowaniem i benchmarkami, żeby koszt jednorazowego
+    importu nie trafiał do pierwszego etapu, który z nich skorzysta.
+    """
     try:
-        r = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=400,
-        )
-        r.raise_for_status()
-        return r.json()["choices"][0]["message"]["content"]
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Błąd API Perplexity: {e}")
-        return None
+        get_openai_client()
+    except Exception:
+        pass  # błąd został zalogowany; ponowna próba nastąpi przy pierwszym użyciu
+    _soup("")
+
+
+def get_openai_client():
+    """Zwraca współdzielonego klienta OpenAI, tworząc go przy pierwszym wywołaniu."""
+    global _openai_client
+    if _openai_client is None:
+        with _clients_lock:
+            if _openai_client is None:
+                import openai
+                try:
+                    _openai_client = openai.OpenAI(
+                        api_key=COMMON_KEYS.get("OPENAI_API_KEY"),
+                        base_url=ENDPOINTS.get("openai_base_url"),
+                    )
+                except Exception as e:
+                    logging.error(f"Nie udało się zainicjować klienta OpenAI: {e}")
+                    raise
+    return _openai_client
+
+
+def get_event_registry_client(api_key):
+    """Zwraca klienta EventRegistry dla danego klucza (jeden na klucz, tworzony leniwie)."""
+    er = _er_clients.get(api_key)
+    if er is None:
+        with _clients_lock:
+            er = _er_clients.get(api_key)
+            if er is None:
+                from eventregistry import EventRegistry
+                er = EventRegistry(apiKey=api_key, host=ENDPOINTS.get("eventregistry_host"))
+                _er_clients[api_key] = er
+    return er
 
 # -----------------------
 # SANITIZERY / TEKST
@@ -118,7 +169,7 @@ def enforce_anchor_nofollow(html: str) -> str:
     """
     if not html:
         return html
-    soup = BeautifulSoup(html, "html.parser")
+    soup = _soup(html)
     for a in soup.find_all("a", href=True):
         href = (a.get("href") or "").strip()
         if href.startswith("http"):
@@ -129,47 +180,42 @@ def enforce_anchor_nofollow(html: str) -> str:
             a["rel"] = " ".join(sorted(rel_set))
             if not a.get("target"):
                 a["target"] = "_blank"
-    return str(soup)
-
-
-def _extract_keywords_pl(s: str) -> List[str]:
-    words = re.findall(r"[A-Za-zĄĆĘŁŃÓŚŹŻąćęłńóśźż0-9]+", (s or "").lower())
-    return [w for w in words if len(w) >= 4 and w not in STOPWORDS_PL]
+    html = str(soup)
+    soup.decompose()
+    return html
 
 
 def title_respects_keyword(generated_title: str, manual_kw: str) -> bool:
-    """Sprawdza semantyczną zgodność tytułu z frazą użytkownika."""
-    kw_set = set(_extract_keywords_pl(manual_kw))
-    gen_set = set(_extract_keywords_pl(generated_title))
-    if not kw_set:
-        return True
-    common = len(kw_set & gen_set)
-    return common >= max(1, len(kw_set) - 1)
+    """
+    Sprawdza zgodność tytułu z frazą użytkownika: tematy słów (polish.py, więc
+    „ceny mieszkań” pasuje do „Cena mieszkania…”), najwyżej jednego może brakować.
+    """
+    return polish.covers(generated_title, manual_kw)
 
 
+@traced_stage("title_fix")
 def rewrite_title_to_match_keyword(bad_title: str, keyword: str) -> str:
     """
     Próbuje poprawić tytuł przez OpenAI; jeśli się nie uda – bezpieczny fallback.
     Zwraca gotowy <h2>...</h2>.
     """
     try:
-        resp = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
+        fixed = llm.complete(
+            "classify",
+            (
+                "Popraw tytuł artykułu tak, aby był zgodny z frazą kluczową "
+                "(lub jej bardzo bliskim wariantem), nie zawężał zakresu, "
+                "stosował polskie zasady kapitalizacji i miał maks. 70 znaków. "
+                "Zwróć wyłącznie tytuł w tagu <h2>.\n"
+                "FRAZA: " + keyword + "\n"
+                "AKTUALNY TYTUŁ: " + bad_title
+            ),
             temperature=0.1,
             max_tokens=60,
-            messages=[{
-                "role": "user",
-                "content": (
-                    "Popraw tytuł artykułu tak, aby był zgodny z frazą kluczową "
-                    "(lub jej bardzo bliskim wariantem), nie zawężał zakresu, "
-                    "stosował polskie zasady kapitalizacji i miał maks. 70 znaków. "
-                    "Zwróć wyłącznie tytuł w tagu <h2>.\n"
-                    "FRAZA: " + keyword + "\n"
-                    "AKTUALNY TYTUŁ: " + bad_title
-                )
-            }]
         )
-        fixed = resp.choices[0].message.content.strip()
+        if not fixed:
+            raise RuntimeError("brak odpowiedzi modelu")
+        fixed = fixed.strip()
         if not fixed.lower().startswith("<h2"):
             fixed_text = re.sub(r"</?h2[^>]*>", "", fixed).strip()
             return f"<h2>{fixed_text[:70]}</h2>"
@@ -184,14 +230,6 @@ def rewrite_title_to_match_keyword(bad_title: str, keyword: str) -> str:
 # -----------------------
 # WORDPRESS / EVENT REG.
 # -----------------------
-def get_auth_header(site_config):
-    if site_config.get("auth_method") == "bearer":
-        return {"Authorization": f"Bearer {site_config.get('wp_bearer_token')}"}
-    credentials = f"{site_config.get('wp_username')}:{site_config.get('wp_password')}"
-    token = base64.b64encode(credentials.encode()).decode("utf-8")
-    return {"Authorization": f"Basic {token}"}
-
-
 def fetch_categories(site_config):
     """
     Pobiera wszystkie dostępne kategorie z WordPressa (lista krotek: [(id, name), ...]).
@@ -209,7 +247,7 @@ def fetch_categories(site_config):
     page = 1
     while True:
         try:
-            r = requests.get(
+            r = _http().get(
                 url,
                 headers=headers,
                 params={"per_page": 100, "page": page},
@@ -228,55 +266,85 @@ def fetch_categories(site_config):
     return all_categories
 
 
-def get_event_registry_topics(site_config):
-    logging.info("Pobieranie tematów z EventRegistry...")
-    try:
-        er = EventRegistry(apiKey=site_config["event_registry_key"])
-
-        date_end = datetime.now().date()
-        date_start = (date_end - timedelta(days=3)).isoformat()
-        date_end = date_end.isoformat()
-
-        uris = site_config.get("er_concept_uris") or [site_config["er_concept_uri"]]
-
-        complex_query = {
-            "$query": {
-                "$and": [
-                    {"$or": [{"conceptUri": uri} for uri in uris]},
-                    {"dateStart": date_start, "dateEnd": date_end, "lang": "pol"},
-                ]
-            }
-        }
+# Cache taksonomii WP w obrębie procesu (demon/aplikacja nie pobiera ich przy każdym artykule)
+CATEGORIES_CACHE_TTL = 15 * 60
+_categories_cache = {}
 
-        qiter = QueryArticlesIter.initWithComplexQuery(complex_query)
 
-        for article in qiter.execQuery(er, sortBy="date", maxItems=1):
-            return {
-                "title": article.get("title"),
-                "body_snippet": article.get("body", "")[:700],
-                "url": article.get("url"),
-                "image_url": article.get("image"),
-                "source_name": article.get("source", {}).get("title"),
-            }
-        return None
-    except Exception as e:
-        logging.error(f"Błąd podczas pobierania tematów z EventRegistry: {e}")
-        return None
+@traced_stage("topic")
+def get_topic(site_config, topic_source, manual_topic_data):
+    """
+    Temat do artykułu ze źródła `topic_source` (topic_sources.py: EventRegistry,
+    AI, ręczny), zarejestrowany w rejestrze tematów hosta (ochrona przed
+    duplikatami między portalami z tej samej rodziny, np. tylkoslask*).
+    Rezerwacja staje się trwała dopiero po udanym zadaniu; nieudane zadanie ją zwalnia.
+    """
+    from topic_registry import get_topic_registry
+    registry = get_topic_registry()
+    topic_data = topic_sources.fetch(topic_source, site_config, manual_topic_data, claim=registry.claim)
+    if topic_data and topic_data.get("claim_id"):
+        tracing.on_job_end(
+            lambda ok: registry.commit(site_config, topic_data) if ok else registry.release(site_config, topic_data)
+        )
+    return topic_data
 
 
+@traced_stage("categories")
 def get_all_wp_categories(site_config):
+    import requests
+    cache_key = site_config["wp_api_url_base"]
+    cached = _categories_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < CATEGORIES_CACHE_TTL:
+        metrics.record_cache("wp_categories", hit=True)
+        return cached[1]
+    metrics.record_cache("wp_categories", hit=False)
+
     logging.info(f"Pobieranie kategorii z {site_config['friendly_name']}...")
     url = f"{site_config['wp_api_url_base']}/categories?per_page=100"
     headers = get_auth_header(site_config)
     try:
-        r = requests.get(url, headers=headers, timeout=20)
+        r = _http().get(url, headers=headers, timeout=20)
         r.raise_for_status()
-        return {cat["name"]: cat["id"] for cat in r.json()}
+        categories = {cat["name"]: cat["id"] for cat in r.json()}
+        _categories_cache[cache_key] = (time.monotonic(), categories)
+        _save_categories_snapshot(site_config, categories)
+        return categories
     except requests.exceptions.RequestException as e:
         logging.error(f"Nie udało się pobrać listy kategorii: {e}")
         return None
 
 
+def _categories_snapshot_path(site_config):
+    return os.path.join(DATA_DIR, "wp_categories", re.sub(r"\W+", "_", site_config["wp_api_url_base"]) + ".json")
+
+
+def _save_categories_snapshot(site_config, categories):
+    try:
+        path = _categories_snapshot_path(site_config)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(categories, f, ensure_ascii=False)
+    except OSError as e:
+        logging.warning(f"Nie udało się zapisać listy kategorii na dysku: {e}")
+
+
+def known_categories(site_config):
+    """
+    Kategorie {nazwa: id} bez zapytania do WP (ujścia plikowe z sinks.py):
+    cache procesu, ostatni odczyt z WP zapisany w DATA_DIR albo
+    SITES[...]["categories"] (same nazwy, id = None).
+    """
+    cached = _categories_cache.get(site_config["wp_api_url_base"])
+    if cached:
+        return cached[1]
+    try:
+        with open(_categories_snapshot_path(site_config), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {name: None for name in site_config.get("categories") or ()}
+
+
+@traced_stage("category_ai")
 def choose_category_ai(title, content_snippet, available_categories_names, fallback_category="Bez kategorii"):
     if not available_categories_names or len(available_categories_names) <= 1:
         return list(available_categories_names)[:1] if available_categories_names else [fallback_category]
@@ -292,13 +360,7 @@ def choose_category_ai(title, content_snippet, available_categories_names, fallb
         f"Zwróć tylko same nazwy kategorii (maksymalnie 2)."
     )
     try:
-        resp = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt_content}],
-            temperature=0.0,
-            max_tokens=30,
-        )
-        raw_output = resp.choices[0].message.content.strip()
+        raw_output = (llm.complete("classify", prompt_content, temperature=0.0, max_tokens=30) or "").strip()
         selected = [c.strip() for c in raw_output.split(",") if c.strip() in available_categories_names]
         return selected[:2] if selected else [fallback_category]
     except Exception as e:
@@ -306,47 +368,70 @@ def choose_category_ai(title, content_snippet, available_categories_names, fallb
         return [fallback_category]
 
 
+TAGS_SCHEMA = {
+    "type": "object",
+    "properties": {"tags": {"type": "array", "items": {"type": "string"}}},
+    "required": ["tags"],
+    "additionalProperties": False,
+}
+
+
+@traced_stage("tags_ai")
 def generate_tags_ai(title, content):
     logging.info("Generowanie tagów AI...")
     prompt = [
-        {"role": "system", "content": "Wygeneruj 5-7 trafnych tagów (1-2 słowa każdy, po polsku) do artykułu. Zwróć jako listę JSON, np. [\"tag1\", \"tag2\"]."},
+        {"role": "system", "content": "Wygeneruj 5-7 trafnych tagów (1-2 słowa każdy, po polsku) do artykułu. Zwróć JSON, np. {\"tags\": [\"tag1\", \"tag2\"]}."},
         {"role": "user", "content": f"Tytuł: {title}\nFragment:{content[:1000]}"},
     ]
     try:
-        resp = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=prompt,
-            temperature=0.2,
-            max_tokens=100,
-            response_format={"type": "json_object"},
+        data = structured.complete_json(
+            "tags", "classify", messages=prompt, schema=TAGS_SCHEMA, temperature=0.2, max_tokens=100
         )
-        tags_data = json.loads(resp.choices[0].message.content)
-        return tags_data if isinstance(tags_data, list) else tags_data.get("tags", [])
+        return [tag.strip() for tag in data["tags"] if tag.strip()] if data else []
     except Exception as e:
         logging.error(f"Błąd podczas generowania tagów AI: {e}")
         return []
 
 
+@traced_stage("term")
 def get_or_create_term_id(name, term_type, site_config):
+    import requests
     headers = get_auth_header(site_config)
     url = f"{site_config['wp_api_url_base']}/{term_type}"
+    cache_key = (url, name.lower())
+    if cache_key in _term_id_cache:
+        metrics.record_cache("wp_terms", hit=True)
+        return _term_id_cache[cache_key]
+    metrics.record_cache("wp_terms", hit=False)
     try:
-        r = requests.get(url, headers=headers, params={"search": name}, timeout=20)
+        r = _http().get(url, headers=headers, params={"search": name}, timeout=20)
         r.raise_for_status()
         for term in r.json():
             if term.get("name", "").lower() == name.lower():
+                _term_id_cache[cache_key] = term["id"]
                 return term["id"]
         logging.info(f"Termin '{name}' nie istnieje. Tworzenie nowego ({term_type})...")
-        create_resp = requests.post(
+        create_resp = _http().post(
             url, headers=headers, json={"name": name, "slug": name.lower().replace(" ", "-")}, timeout=20
         )
         create_resp.raise_for_status()
-        return create_resp.json()["id"]
+        term_id = create_resp.json()["id"]
+        _term_id_cache[cache_key] = term_id
+        return term_id
     except requests.exceptions.RequestException as e:
         logging.error(f"Błąd podczas obsługi terminu '{name}': {e}")
         return None
 
 
+@traced_stage("media")
+def featured_image_source(topic_data):
+    """Obrazek tematu, a dla tematów bez obrazka (np. od AI) – pierwsze zdjęcie z Pexels dla `image_query`."""
+    if topic_data.get("image_url") or not topic_data.get("image_query"):
+        return topic_data.get("image_url")
+    photos = find_pexels_images_list(topic_data["image_query"], count=1)
+    return photos[0]["original_url"] if photos else None
+
+
 def upload_image_to_wp(image_source, article_title, site_config):
     """
     Próbuje wgrać media do WP:
@@ -355,25 +440,26 @@ def upload_image_to_wp(image_source, article_title, site_config):
 
     Zwraca ID media lub None.
     """
+    import requests
     if not image_source:
         return None
 
-    # 1) Zdobądź bytes i content_type
-    img_content, content_type = None, "image/jpeg"
+    # 1) Zdobądź bytes (w spoolu – duże obrazki lądują w pliku tymczasowym) i content_type
+    image, content_type = None, "image/jpeg"
     if isinstance(image_source, str) and image_source.startswith("http"):
         logging.info(f"Pobieranie obrazka z URL: {image_source}")
         try:
-            img_r = requests.get(image_source, stream=True, timeout=30)
-            img_r.raise_for_status()
-            img_content = img_r.content
-            content_type = img_r.headers.get("content-type", "image/jpeg")
+            with _http().get(image_source, stream=True, timeout=30) as img_r:
+                img_r.raise_for_status()
+                image = memory.Spooled(img_r.iter_content(64 * 1024))
+                content_type = img_r.headers.get("content-type", "image/jpeg")
         except requests.exceptions.RequestException as e:
             logging.error(f"Błąd podczas pobierania obrazka z URL: {e}")
             return None
     else:
         logging.info("Przetwarzanie wgranego obrazka...")
         try:
-            img_content = image_source.getvalue()
+            image = memory.Spooled(image_source.getvalue())
             # np. 'image/jpeg', 'image/png', 'image/webp'
             content_type = getattr(image_source, "type", None) or "image/jpeg"
         except Exception as e:
@@ -398,15 +484,21 @@ def upload_image_to_wp(image_source, article_title, site_config):
     safe_filename_base = "".join(c for c in ascii_title if c.isalnum() or c in " ").strip().replace(" ", "_") or "image"
     filename = f"{safe_filename_base[:50]}_img{ext}"
 
+    try:
+        return _upload_media(image, filename, content_type, site_config)
+    finally:
+        image.close()
+
+
+def _upload_media(image, filename, content_type, site_config):
+    """Wysyłka obrazka ze spoolu: multipart, a po błędzie surowe body. Bajty czytane dopiero na czas zapytania."""
+    import requests
     base = site_config["wp_api_url_base"]
     headers = get_auth_header(site_config)
 
     # 4) Próba A: multipart/form-data (zalecane przez wiele hostingów)
-    files = {
-        "file": (filename, img_content, content_type),
-    }
     try:
-        r = requests.post(f"{base}/media", headers=headers, files=files, timeout=60)
+        r = _http().post(f"{base}/media", headers=headers, files={"file": (filename, image.read(), content_type)}, timeout=60)
         r.raise_for_status()
         media_id = r.json().get("id")
         logging.info(f"Obrazek przesłany (multipart). ID={media_id}")
@@ -414,15 +506,21 @@ def upload_image_to_wp(image_source, article_title, site_config):
     except requests.exceptions.HTTPError as e:
         body = e.response.text if getattr(e, "response", None) is not None else ""
         logging.error(f"Upload multipart nieudany: {e}  Odpowiedź: {body}")
+        status = e.response.status_code if getattr(e, "response", None) is not None else None
+        if status is None or status == 429 or status >= 500:
+            # Przeciążony host mógł już zapisać plik – drugi upload zdublowałby media
+            return None
     except requests.exceptions.RequestException as e:
         logging.error(f"Upload multipart błąd sieci: {e}")
+        return None
 
     # 5) Próba B: surowe body + Content-Disposition (fallback)
+    metrics.RETRIES.inc(operation="media_raw_upload")
     try:
         headers2 = headers.copy()
         headers2["Content-Disposition"] = f'attachment; filename="{filename}"'
         headers2["Content-Type"] = content_type
-        r2 = requests.post(f"{base}/media", headers=headers2, data=img_content, timeout=60)
+        r2 = _http().post(f"{base}/media", headers=headers2, data=image.read(), timeout=60)
         r2.raise_for_status()
         media_id = r2.json().get("id")
         logging.info(f"Obrazek przesłany (raw fallback). ID={media_id}")
@@ -438,12 +536,14 @@ def upload_image_to_wp(image_source, article_title, site_config):
 
 
 def publish_to_wp(data_to_publish, site_config):
+    """Pojedynczy POST /posts (zadania publikują przez wp_batch.publish, które tu wraca bez batch/v1)."""
+    import requests
     logging.info(f"Publikowanie na {site_config['friendly_name']}: '{data_to_publish['title']}'")
     url = f"{site_config['wp_api_url_base']}/posts"
     headers = get_auth_header(site_config)
     headers["Content-Type"] = "application/json"
     try:
-        r = requests.post(url, headers=headers, json=data_to_publish, timeout=60)
+        r = _http().post(url, headers=headers, json=data_to_publish, timeout=60)
         r.raise_for_status()
         logging.info(f"Artykuł opublikowany pomyślnie! URL: {r.json().get('link')}")
         return r.json()
@@ -455,9 +555,105 @@ def publish_to_wp(data_to_publish, site_config):
             pass
         return None
 
+def update_wp_post(post_id, fields, site_config):
+    """Pojedynczy POST /posts/<id> – zmiana istniejącego wpisu (status, treść...)."""
+    import requests
+    url = f"{site_config['wp_api_url_base']}/posts/{post_id}"
+    headers = get_auth_header(site_config)
+    headers["Content-Type"] = "application/json"
+    try:
+        r = _http().post(url, headers=headers, json=fields, timeout=60)
+        r.raise_for_status()
+        return r.json()
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Błąd podczas aktualizacji wpisu {post_id} w WordPress: {e}")
+        return None
+
+# -----------------------
+# DUPLIKATY WZGLĘDEM ISTNIEJĄCYCH WPISÓW
+# -----------------------
+def check_existing_posts(site_config, title=None, html=None, sync=True):
+    """
+    Porównuje planowany tytuł (lub gotowy artykuł, gdy podano `html`) z wpisami
+    obecnymi już na portalu. Zwraca komunikat "BŁĄD: ..." gdy znaleziono
+    duplikat i SIMILARITY_SETTINGS["action"] == "reject"; w pozostałych
+    przypadkach None (duplikat jest tylko logowany). `sync=False` – bez
+    dociągania nowych wpisów z WP (ujścia plikowe), tylko lokalny indeks.
+    """
+    try:
+        from post_index import get_post_index
+        index = get_post_index()
+        if sync:
+            index.sync(site_config)
+        matches = index.similar_content(site_config, html) if html else index.similar_titles(site_config, title or "")
+    except Exception as e:
+        logging.warning(f"[DEDUP] Sprawdzenie duplikatów nie powiodło się: {e}")
+        return None
+    if not matches:
+        return None
+
+    best = matches[0]
+    what = "Treść artykułu" if html else f"Temat '{title}'"
+    msg = (
+        f"{what} pokrywa się z istniejącym wpisem '{best['meta'].get('title')}' "
+        f"({best['meta'].get('link')}), podobieństwo {best['score']:.2f}."
+    )
+    if SIMILARITY_SETTINGS.get("action") == "reject":
+        logging.warning(f"[DEDUP] {msg} Przerywam.")
+        return f"BŁĄD: {msg}"
+    logging.warning(f"[DEDUP] {msg} Kontynuuję (action=flag).")
+    return None
+
+
+def publish_article(site_config, data_to_publish, tags_list):
+    """
+    Zapis artykułu w WP przez wp_batch (grupowanie per host). W trybie
+    "draft"/"future" (release.py) wpis dostaje slot publikacji zamiast statusu
+    publish. Zwraca (wpis WP albo None, ReleaseTicket albo None).
+    """
+    from release import get_release_queue, publish_mode
+    from wp_batch import publish
+
+    ticket = None
+    if publish_mode(site_config) != "publish":
+        ticket = get_release_queue().prepare(site_config, data_to_publish)
+    result = None
+    try:
+        result = publish(site_config, data_to_publish, tags=tags_list)
+    finally:
+        # Także po wyjątku: inaczej zarezerwowany slot przesuwałby kolejne publikacje na hoście
+        if ticket:
+            ticket.finish(result)
+    if result:
+        index_published_post(site_config, result)
+    return result, ticket
+
+
+def index_published_post(site_config, wp_post):
+    try:
+        from post_index import get_post_index
+        get_post_index().add_published(site_config, wp_post)
+    except Exception as e:
+        logging.warning(f"[DEDUP] Nie udało się dodać wpisu do indeksu podobieństwa: {e}")
+
 # -----------------------
 # KROK 1/2/3 GENEROWANIA
 # -----------------------
+def _angle_rule(angle):
+    """Blok promptu z kątem tekstu w trybie fan-out (jeden research, kilka portali)."""
+    if not angle:
+        return ""
+    siblings = "; ".join(angle.get("siblings") or []) or "brak"
+    return textwrap.dedent(f"""
+        ---
+        **KĄT TEGO TEKSTU (KRYTYCZNE):** {angle['focus']}
+        Ten sam research posłuży też innym portalom ({siblings}). Twój tekst musi być od nich wyraźnie
+        różny: własny tytuł, inne otwarcie, inna struktura i dobór faktów zgodny z kątem. Nie przepisuj
+        zdań z researchu dosłownie.
+    """)
+
+
+@traced_stage("research")
 def step1_research(topic_data, site_config):
     """Krok 1: research; bez przypisów numerycznych, dopuszczalne linki <a>."""
     logging.info("--- KROK 1: Rozpoczynam research i syntezę danych... ---")
@@ -485,10 +681,11 @@ def step1_research(topic_data, site_config):
 
         Zwróć odpowiedź jako zwięzłą, dobrze zorganizowaną listę punktów.
     """)
-    return _call_perplexity_api(prompt)
+    return llm.complete("research", prompt, site_config=site_config)
 
 
-def step2_create_outline(research_data, site_config, keyword=None):
+@traced_stage("outline")
+def step2_create_outline(research_data, site_config, keyword=None, angle=None):
     """Krok 2: outline; pilnowanie frazy kluczowej i braku zawężania tematu."""
     logging.info("--- KROK 2: Tworzę kreatywny i szczegółowy plan artykułu... ---")
 
@@ -516,13 +713,14 @@ def step2_create_outline(research_data, site_config, keyword=None):
         4.  **Inteligentnie dobierz elementy z bardzo wartościowym contentem.** Zastanów się, czy do TEGO KONKRETNEGO tematu pasują takie bloki jak: **tabela porównawcza**, **analiza historyczna**, **praktyczne porady** lub **box z kluczowymi informacjami**. Włącz je do planu **tylko wtedy, gdy mają sens**.
         5.  Pod każdym nagłówkiem napisz w 1–2 zdaniach, co dokładnie zostanie w tej sekcji opisane.
         6.  Nie używaj w podtytułach słów: "Wstęp", "Zakończenie", "Prolog", "Epilog" "Premium", "Box".
-        
+        {_angle_rule(angle)}
         Zwróć tylko i wyłącznie kompletny, gotowy do realizacji plan artykułu.
     """)
-    return _call_perplexity_api(prompt)
+    return llm.complete("outline", prompt, site_config=site_config)
 
 
-def step3_write_article(research_data, outline, site_config, keyword=None):
+@traced_stage("write")
+def step3_write_article(research_data, outline, site_config, keyword=None, angle=None):
     """Krok 3: finalny artykuł; zakaz przypisów numerycznych, dozwolone linki HTML."""
     logging.info("--- KROK 3: Piszę finalny artykuł... To może potrwać kilka minut. ---")
     prompt_template = site_config["prompt_template"]
@@ -561,13 +759,150 @@ def step3_write_article(research_data, outline, site_config, keyword=None):
         {prompt_template}
         {manual_title_rule}
         {anti_footnotes_rule}
+        {_angle_rule(angle)}
 
         Napisz kompletny artykuł w HTML, zaczynając od tytułu w `<h2>`.
     """)
-    return _call_perplexity_api(final_prompt)
+    return llm.complete("write", final_prompt, site_config=site_config)
+
+
+# -----------------------
+# KROK 3 (tryb "sections"): SEKCJE RÓWNOLEGLE
+# -----------------------
+_OUTLINE_HEADING_RE = re.compile(
+    r"<h([23])[^>]*>(.*?)</h\1>|^\s*(#{2,3})\s+(.+?)\s*$", re.IGNORECASE | re.MULTILINE | re.DOTALL
+)
 
 
-def step_news_article(research_data, site_config, topic_data, keyword=None):
+def parse_outline(outline):
+    """
+    Plan z kroku 2 -> (tytuł, [{"heading", "level", "brief"}]). Nagłówki jako
+    <h2>/<h3> albo markdown ##/###; pierwszy <h2> to tytuł artykułu, tekst pod
+    nagłówkiem to opis sekcji.
+    """
+    matches = list(_OUTLINE_HEADING_RE.finditer(outline or ""))
+    title, sections = None, []
+    for i, m in enumerate(matches):
+        level = int(m.group(1)) if m.group(1) else len(m.group(3))
+        heading = re.sub(r"<[^>]+>|\*\*", "", m.group(2) or m.group(4) or "").strip()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(outline)
+        brief = re.sub(r"<[^>]+>", " ", outline[m.end():end])
+        brief = re.sub(r"\s+", " ", brief).strip()
+        if title is None and level == 2 and not sections:
+            title = heading
+            continue
+        if heading:
+            sections.append({"heading": heading, "level": level, "brief": brief})
+    return title, sections
+
+
+def writing_mode(site_config):
+    return site_config.get("writing_mode") or WRITING_SETTINGS.get("mode", "single")
+
+
+@traced_stage("section")
+def step3_write_section(index, section, title, sections, research_data, site_config, keyword=None):
+    """Jedna sekcja artykułu premium (nagłówek <h3> + treść), z pełnym planem jako kontekstem."""
+    plan = "\n".join(
+        f"{'→ ' if i == index else '  '}{i + 1}. {s['heading']}" for i, s in enumerate(sections)
+    )
+    prompt = textwrap.dedent(f"""
+        NAPISZ JEDNĄ SEKCJĘ artykułu premium "{title}" dla portalu {site_config['friendly_name']}.
+        Pozostałe sekcje piszą równolegle inni autorzy – nie powtarzaj ich treści, nie pisz wstępu
+        całego artykułu ani podsumowania całości (chyba że to jest ta sekcja).
+
+        **PLAN CAŁEGO ARTYKUŁU (Twoja sekcja oznaczona →):**
+        {plan}
+
+        **TWOJA SEKCJA:** {section['heading']}
+        **CO MA ZAWIERAĆ:** {section['brief'] or 'zgodnie z nagłówkiem'}
+        {f"**FRAZA KLUCZOWA ARTYKUŁU:** {keyword}" if keyword else ""}
+
+        **ZEBRANE DANE:**
+        {research_data}
+
+        ---
+        **ZASADY PISANIA:**
+        {site_config['prompt_template']}
+
+        ---
+        **ZASADY CYTOWANIA:** zakaz przypisów numerycznych ([1], (1), [^1], <sup>1</sup>) i sekcji „Źródła”;
+        źródła podawaj deskryptywnie lub jako link HTML <a href="https://..." rel="nofollow">Nazwa</a>.
+
+        Zwróć wyłącznie HTML tej sekcji, zaczynając od <h3>{section['heading']}</h3>.
+    """)
+    return llm.complete("write", prompt, site_config=site_config)
+
+
+@traced_stage("stitch")
+def step3_stitch(title, sections_html):
+    """
+    Lekki przebieg spinający: lead artykułu (tani model) i usunięcie powtórzeń
+    między niezależnie pisanymi sekcjami. Zwraca gotowy HTML z <h2>-tytułem.
+    """
+    parts, seen_paragraphs = [], set()
+    for html in sections_html:
+        soup = _soup(html)
+        for tag in soup.find_all("h2"):
+            tag.name = "h3"  # tytuł artykułu jest jeden – sekcje mają <h3>
+        for p in soup.find_all("p"):
+            key = re.sub(r"\W+", " ", p.get_text()).strip().lower()
+            if len(key) > 80 and key in seen_paragraphs:
+                p.decompose()
+            elif key:
+                seen_paragraphs.add(key)
+        parts.append(str(soup).strip())
+        soup.decompose()
+
+    lead = ""
+    first_lines = "\n".join(f"- {re.sub(r'<[^>]+>', ' ', html)[:300]}" for html in parts)
+    response = llm.complete(
+        "classify",
+        (
+            "Napisz LEAD (2–3 zdania, konkretny, bez ogólników i bez przypisów) do artykułu "
+            f"\"{title}\". Początki sekcji artykułu:\n{first_lines}\n"
+            "Zwróć wyłącznie tekst leadu, bez tagów."
+        ),
+        temperature=0.4,
+        max_tokens=220,
+    )
+    if response:
+        lead = re.sub(r"<[^>]+>", "", response).strip()
+    else:
+        logging.warning("Lead artykułu nie powstał – pierwszy akapit sekcji pełni jego rolę.")
+    return f"<h2>{title}</h2>\n" + (f"<p><strong>{lead}</strong></p>\n" if lead else "") + "\n".join(parts)
+
+
+@traced_stage("write", profile=False)
+def step3_write_sections(research_data, outline, site_config, keyword=None):
+    """
+    Krok 3 w trybie "sections": sekcje planu pisane równolegle (czas ≈ najwolniejsza
+    sekcja), potem step3_stitch. None, gdy plan ma za mało sekcji albo
+    któraś sekcja się nie udała – wywołujący wraca wtedy do step3_write_article.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    title, sections = parse_outline(outline)
+    if len(sections) < WRITING_SETTINGS.get("min_sections", 3):
+        logging.info(f"Plan ma {len(sections)} sekcji – piszę artykuł jednym wywołaniem.")
+        return None
+    title = title or sections[0]["heading"]
+    logging.info(f"--- KROK 3: Piszę {len(sections)} sekcji równolegle... ---")
+    with ThreadPoolExecutor(max_workers=WRITING_SETTINGS.get("max_parallel_sections", 6)) as pool:
+        futures = [
+            tracing.submit(pool, step3_write_section, i, s, title, sections, research_data, site_config, keyword)
+            for i, s in enumerate(sections)
+        ]
+    sections_html = [f.result() for f in futures]
+    failed = [sections[i]["heading"] for i, html in enumerate(sections_html) if not html]
+    if failed:
+        logging.error(f"Nie powstały sekcje: {failed} – wracam do pisania jednym wywołaniem.")
+        return None
+    return step3_stitch(title, sections_html)
+
+
+@traced_stage("write")
+def step_news_article(research_data, site_config, topic_data, keyword=None, angle=None):
     """Krótki news (300–400 słów) — bez przypisów numerycznych, linki HTML dozwolone."""
     manual_title_rule = ""
     if keyword:
@@ -593,6 +928,7 @@ def step_news_article(research_data, site_config, topic_data, keyword=None):
 
         {manual_title_rule}
         {anti_footnotes_rule}
+        {_angle_rule(angle)}
 
         Dane do analizy:
         {research_data}
@@ -603,54 +939,27 @@ def step_news_article(research_data, site_config, topic_data, keyword=None):
 
         Zwróć gotowy tekst w HTML, używając tylko tagów <h2>, <p>, <ul>, <li>, <strong>, <blockquote>, <a>.
     """)
-    return _call_perplexity_api(prompt)
+    return llm.complete("write", prompt, site_config=site_config)
 
 # -----------------------
-# WORKFLOW: PREMIUM
+# OBRÓBKA WYGENEROWANEGO HTML
 # -----------------------
-def run_generation_process(site_key, topic_source, manual_topic_data, category_id=None):
-    """Główna funkcja wykonawcza (premium)."""
-    site_config = SITES[site_key]
-    site_config["site_key"] = site_key
-
-    # Temat
-    topic_data = manual_topic_data if topic_source == "Ręcznie" else get_event_registry_topics(site_config)
-    if not topic_data:
-        return "BŁĄD: Nie udało się uzyskać tematu. Sprawdź Event Registry lub dane wprowadzone ręcznie."
-
-    # Krok 1: Research
-    research_data = step1_research(topic_data, site_config)
-    if not research_data:
-        return "BŁĄD: Krok 1 (Research) nie powiódł się. Sprawdź logi."
-    logging.info("--- WYNIK RESEARCHU ---\n" + research_data)
-
-    # Fraza tytułu (ręcznie podana)
-    keyword_for_title = None
-    if topic_source == "Ręcznie":
-        keyword_for_title = (topic_data.get("title") or "").strip()
-        if keyword_for_title:
-            logging.info(f"Wykryto ręczne słowo kluczowe dla tytułu: '{keyword_for_title}'")
-
-    # Krok 2: Outline
-    outline = step2_create_outline(research_data, site_config, keyword=keyword_for_title)
-    if not outline:
-        return "BŁĄD: Krok 2 (Planowanie) nie powiódł się. Sprawdź logi."
-    logging.info("--- WYGENEROWANY PLAN ARTYKUŁU ---\n" + outline)
-
-    # Krok 3: Artykuł
-    generated_html = step3_write_article(research_data, outline, site_config, keyword=keyword_for_title)
-    if not generated_html:
-        return "BŁĄD: Krok 3 (Pisanie) nie powiódł się. Sprawdź logi."
-
-    # Parsowanie + kontrola tytułu
-    soup = BeautifulSoup(generated_html, "html.parser")
+@traced_stage("postprocess")
+def finalize_article_html(generated_html, topic_data, keyword_for_title=None, log_prefix="", kind="premium", site_config=None):
+    """
+    Parsowanie + kontrola tytułu względem frazy, reguły SEO z promptu
+    (seo_gate.py; poprawki przez LLM tylko z `site_config`), usunięcie <h2>
+    (WP ma tytuł osobno) i sanitizacja (przypisy, nofollow). Zwraca (post_title, post_content).
+    """
+    soup = _soup(generated_html)
     h2_tag = soup.find("h2")
     current_title = h2_tag.get_text(strip=True) if h2_tag else (topic_data.get("title") or "Brak tytułu")
 
     if keyword_for_title and not title_respects_keyword(current_title, keyword_for_title):
-        logging.info(f"Tytuł wymaga korekty względem frazy: '{keyword_for_title}' -> '{current_title}'")
+        logging.info(f"{log_prefix}Tytuł wymaga korekty względem frazy: '{keyword_for_title}' -> '{current_title}'")
+        metrics.RETRIES.inc(operation="title_rewrite")
         fixed_h2_html = rewrite_title_to_match_keyword(current_title, keyword_for_title)
-        fixed_h2_soup = BeautifulSoup(fixed_h2_html, "html.parser")
+        fixed_h2_soup = _soup(fixed_h2_html)
         if h2_tag:
             h2_tag.replace_with(fixed_h2_soup)
         else:
@@ -658,50 +967,132 @@ def run_generation_process(site_key, topic_source, manual_topic_data, category_i
         h2_tag = soup.find("h2")
         current_title = h2_tag.get_text(strip=True) if h2_tag else current_title
 
-    # Usuń <h2> z treści (WP ma tytuł osobno)
+    current_title, _ = seo_gate.review(soup, current_title, kind, site_config, title_tag=h2_tag)
+
     for t in soup.find_all("h2"):
         t.decompose()
 
     post_title = (current_title or topic_data.get("title") or "Brak tytułu").strip()
     post_content = str(soup)
+    soup.decompose()  # drzewo z cyklami referencji – zwalniamy od razu, nie przy gc
 
-    # Sanitizacja: usuń przypisy + dołóż nofollow
     post_content = strip_numeric_citations(post_content)
     post_content = enforce_anchor_nofollow(post_content)
+    return post_title, post_content
 
-    # Kategorie
-    all_categories = get_all_wp_categories(site_config)
+# -----------------------
+# WSPÓLNE: START ZADANIA I ODDANIE ARTYKUŁU
+# -----------------------
+def _prepare_run(site_config, topic_source, output):
+    """(ujście, None) albo (None, komunikat „BŁĄD: …”) – zanim zadanie wyda cokolwiek na LLM."""
+    try:
+        sink = sinks.get_sink(site_config, output)
+    except ValueError as e:
+        return None, f"BŁĄD: {e}"
+    return sink, config_error(site_config, topic_source, wordpress=sink.online)
+
+
+def _deliver_article(sink, site_config, kind, post_title, post_content, topic_data, category_id=None, log_prefix=""):
+    """Kategoria (AI), tagi, obraz wyróżniony i zapis przez ujście; zwraca (wynik, ReleaseTicket)."""
+    # Kategorie: z WP albo (ujścia plikowe) znane lokalnie
+    all_categories = get_all_wp_categories(site_config) if sink.online else known_categories(site_config)
+    category_name = None
     if category_id is not None:
-        logging.info(f"Użyto ręcznie wybranej kategorii o ID: {category_id}")
+        logging.info(f"{log_prefix}Użyto ręcznie wybranej kategorii o ID: {category_id}")
+        category_name = next((name for name, cid in (all_categories or {}).items() if cid == category_id), None)
+    elif not all_categories:
+        logging.warning(f"{log_prefix}Brak listy kategorii. Używam domyślnej 'Bez kategorii' (ID: 1).")
+        category_id, category_name = (1 if sink.online else None), "Bez kategorii"
     else:
-        if not all_categories:
-            logging.warning("Nie udało się pobrać kategorii z WP. Używam domyślnej 'Bez kategorii' (ID: 1).")
-            category_id = 1
-        else:
-            chosen = choose_category_ai(post_title, post_content, list(all_categories.keys()))
-            chosen_name = chosen[0] if isinstance(chosen, list) and chosen else "Bez kategorii"
-            category_id = all_categories.get(chosen_name, 1)
+        chosen = choose_category_ai(post_title, post_content, list(all_categories.keys()))
+        category_name = chosen[0] if isinstance(chosen, list) and chosen else "Bez kategorii"
+        category_id = all_categories.get(category_name, 1 if sink.online else None)
 
-    # Tagi
+    # Tagi (id rozwiązywane przy publikacji, raz dla całej grupy zapisów na host)
     tags_list = generate_tags_ai(post_title, post_content) or []
-    tag_ids = [tid for tid in (get_or_create_term_id(tag, "tags", site_config) for tag in tags_list) if tid]
 
-    # Obraz wyróżniony
-    featured_media_id = upload_image_to_wp(topic_data.get("image_url"), post_title, site_config)
-
-    # Publikacja
-    data_to_publish = {
+    article = {
+        "kind": kind,
         "title": post_title,
+        "slug": sinks.slugify(post_title),
         "content": post_content,
-        "status": "publish",
-        "categories": [category_id] if category_id else [],
-        "tags": tag_ids,
+        "category": category_name,
+        "category_id": category_id,
+        "tags": tags_list,
+        "image": featured_image_source(topic_data),
+        "topic": topic_data,
     }
-    if featured_media_id:
-        data_to_publish["featured_media"] = featured_media_id
+    return sink.publish(site_config, article)
+
+# -----------------------
+# WORKFLOW: PREMIUM
+# -----------------------
+@traced_job("premium", setup=setup_logging)
+def run_generation_process(site_key, topic_source, manual_topic_data, category_id=None, shared=None, output=None):
+    """
+    Główna funkcja wykonawcza (premium). `shared` – wspólny research z
+    run_fanout_process, `output` – nazwa ujścia z sinks.py (domyślnie WordPress).
+    """
+    site_config = SITES[site_key]
+    sink, error = _prepare_run(site_config, None if shared else topic_source, output)
+    if error:
+        return error
+    angle = shared and shared["angles"].get(site_key)
+
+    # Temat
+    if shared:
+        topic_data, research_data = _use_shared_research(site_config, shared)
+    else:
+        topic_data = get_topic(site_config, topic_source, manual_topic_data)
+    if not topic_data:
+        return "BŁĄD: Nie udało się uzyskać tematu. Sprawdź Event Registry lub dane wprowadzone ręcznie."
+    dup_error = check_existing_posts(site_config, title=topic_data.get("title"), sync=sink.online)
+    if dup_error:
+        return dup_error
+
+    # Krok 1: Research (w trybie fan-out już gotowy)
+    if not shared:
+        research_data = step1_research(topic_data, site_config)
+        if not research_data:
+            return "BŁĄD: Krok 1 (Research) nie powiódł się. Sprawdź logi."
+        logging.info(f"Research gotowy ({len(research_data)} znaków): {save_artifact('research', research_data)}")
 
-    result = publish_to_wp(data_to_publish, site_config)
+    # Fraza tytułu (ręcznie podana)
+    keyword_for_title = None
+    if topic_source == "Ręcznie":
+        keyword_for_title = (topic_data.get("title") or "").strip()
+        if keyword_for_title:
+            logging.info(f"Wykryto ręczne słowo kluczowe dla tytułu: '{keyword_for_title}'")
+
+    # Krok 2: Outline
+    outline = step2_create_outline(research_data, site_config, keyword=keyword_for_title, angle=angle)
+    if not outline:
+        return "BŁĄD: Krok 2 (Planowanie) nie powiódł się. Sprawdź logi."
+    logging.info(f"Plan artykułu gotowy ({len(outline)} znaków): {save_artifact('outline', outline)}")
+
+    # Krok 3: Artykuł (równolegle po sekcjach albo jednym wywołaniem)
+    generated_html = None
+    if writing_mode(site_config) == "sections":
+        generated_html = step3_write_sections(research_data, outline, site_config, keyword=keyword_for_title)
+    if not generated_html:
+        generated_html = step3_write_article(research_data, outline, site_config, keyword=keyword_for_title, angle=angle)
+    if not generated_html:
+        return "BŁĄD: Krok 3 (Pisanie) nie powiódł się. Sprawdź logi."
+
+    # Parsowanie, kontrola tytułu, sanitizacja (przypisy + nofollow)
+    post_title, post_content = finalize_article_html(generated_html, topic_data, keyword_for_title, site_config=site_config)
+    save_artifact("article", post_content, ext="html")
+    dup_error = check_existing_posts(site_config, html=post_content, sync=sink.online)
+    if dup_error:
+        return dup_error
+
+    # Kategoria, tagi, obraz wyróżniony i publikacja (albo zapis do pliku)
+    result, ticket = _deliver_article(sink, site_config, "premium", post_title, post_content, topic_data, category_id)
     if result and result.get("link"):
+        if result.get("saved"):
+            return f"Artykuł zapisany ({sink.name}): {result['link']}"
+        if ticket:
+            return f"Artykuł {ticket.describe()}. Link: {result.get('link')}"
         return f"Artykuł opublikowany pomyślnie! Link: {result.get('link')}"
     else:
         return "BŁĄD: Publikacja nie powiodła się. Sprawdź logi."
@@ -709,20 +1100,32 @@ def run_generation_process(site_key, topic_source, manual_topic_data, category_i
 # -----------------------
 # WORKFLOW: NEWS
 # -----------------------
-def run_news_process(site_key, topic_source, manual_topic_data, category_id=None):
-    """Workflow dla artykułu newsowego (krótsza forma) + publikacja na WP."""
+@traced_job("news", setup=setup_logging)
+def run_news_process(site_key, topic_source, manual_topic_data, category_id=None, shared=None, output=None):
+    """Workflow dla artykułu newsowego (krótsza forma) + publikacja na WP (albo inne ujście, `output`)."""
     site_config = SITES[site_key]
-    site_config["site_key"] = site_key
+    sink, error = _prepare_run(site_config, None if shared else topic_source, output)
+    if error:
+        return error
+    angle = shared and shared["angles"].get(site_key)
 
     # Temat
-    topic_data = manual_topic_data if topic_source == "Ręcznie" else get_event_registry_topics(site_config)
+    if shared:
+        topic_data, research_data = _use_shared_research(site_config, shared)
+    else:
+        topic_data = get_topic(site_config, topic_source, manual_topic_data)
     if not topic_data:
         return "BŁĄD: Nie udało się uzyskać tematu."
+    dup_error = check_existing_posts(site_config, title=topic_data.get("title"), sync=sink.online)
+    if dup_error:
+        return dup_error
 
-    # Research
-    research_data = step1_research(topic_data, site_config)
-    if not research_data:
-        return "BŁĄD: Research nie powiódł się."
+    # Research (w trybie fan-out już gotowy)
+    if not shared:
+        research_data = step1_research(topic_data, site_config)
+        if not research_data:
+            return "BŁĄD: Research nie powiódł się."
+        logging.info(f"Research gotowy ({len(research_data)} znaków): {save_artifact('research', research_data)}")
 
     # Fraza do tytułu
     keyword_for_title = None
@@ -732,73 +1135,317 @@ def run_news_process(site_key, topic_source, manual_topic_data, category_id=None
             logging.info(f"[NEWS] Ręczna fraza tytułu: '{keyword_for_title}'")
 
     # Artykuł newsowy
-    news_html = step_news_article(research_data, site_config, topic_data, keyword=keyword_for_title)
+    news_html = step_news_article(research_data, site_config, topic_data, keyword=keyword_for_title, angle=angle)
     if not news_html:
         return "BŁĄD: Pisanie newsowego artykułu nie powiodło się."
 
-    # Parsowanie + kontrola tytułu
-    soup = BeautifulSoup(news_html, "html.parser")
-    h2 = soup.find("h2")
-    current_title = h2.get_text(strip=True) if h2 else (topic_data.get("title") or "Brak tytułu")
+    # Parsowanie, kontrola tytułu, sanitizacja
+    post_title, post_content = finalize_article_html(
+        news_html, topic_data, keyword_for_title, log_prefix="[NEWS] ", kind="news", site_config=site_config
+    )
+    save_artifact("article", post_content, ext="html")
+    dup_error = check_existing_posts(site_config, html=post_content, sync=sink.online)
+    if dup_error:
+        return dup_error
+
+    # Kategoria, tagi, obraz wyróżniony i publikacja (albo zapis do pliku)
+    result, ticket = _deliver_article(
+        sink, site_config, "news", post_title, post_content, topic_data, category_id, log_prefix="[NEWS] "
+    )
+    if result and result.get("link"):
+        if result.get("saved"):
+            return f"Artykuł newsowy zapisany ({sink.name}): {result['link']}"
+        if ticket:
+            return f"Artykuł newsowy {ticket.describe()}. Link: {result.get('link')}"
+        return f"Artykuł newsowy opublikowany! Link: {result.get('link')}"
+    else:
+        return "BŁĄD: Publikacja newsowego artykułu nie powiodła się."
 
-    if keyword_for_title and not title_respects_keyword(current_title, keyword_for_title):
-        logging.info(f"[NEWS] Korekta tytułu względem frazy: '{keyword_for_title}' -> '{current_title}'")
-        fixed_h2_html = rewrite_title_to_match_keyword(current_title, keyword_for_title)
-        fixed_h2_soup = BeautifulSoup(fixed_h2_html, "html.parser")
-        if h2:
-            h2.replace_with(fixed_h2_soup)
-        else:
-            soup.insert(0, fixed_h2_soup)
-        h2 = soup.find("h2")
-        current_title = h2.get_text(strip=True) if h2 else current_title
+# -----------------------
+# WORKFLOW: FAN-OUT (jeden research → kilka portali)
+# -----------------------
+def _use_shared_research(site_config, shared):
+    """Temat (z rezerwacją tego portalu) i research ze wspólnego przebiegu fan-out."""
+    topic_data = shared["topics"].get(site_config["site_key"]) or dict(shared["topic"])
+    if topic_data.get("claim_id"):
+        from topic_registry import get_topic_registry
+        registry = get_topic_registry()
+        tracing.on_job_end(
+            lambda ok: registry.commit(site_config, topic_data) if ok else registry.release(site_config, topic_data)
+        )
+    logging.info(f"[FANOUT] Wspólny research ({len(shared['research'])} znaków), kąt: {shared['angles'][site_config['site_key']]['focus']}")
+    return topic_data, shared["research"]
 
-    # Usuń <h2> z treści (WP ma tytuł osobno)
-    for x in soup.find_all("h2"):
-        x.decompose()
 
-    post_title = (current_title or topic_data.get("title") or "Brak tytułu").strip()
-    post_content = str(soup)
+def _fanout_targets(targets, topic_source, output=None):
+    """
+    Cele [(site_key, kind)] – poprawnie skonfigurowane i jeden na host WP (ten
+    sam temat dwa razy na jednym hoście to duplikat). Źródło tematu sprawdzamy
+    tylko u pierwszego celu – on wybiera temat.
+    """
+    from topic_registry import site_host
+    chosen, hosts = [], {}
+    for site_key, kind in targets:
+        if site_key not in SITES:
+            logging.error(f"[FANOUT] Nieznany portal '{site_key}' – pomijam.")
+            continue
+        _, error = _prepare_run(SITES[site_key], None if chosen else topic_source, output)
+        if error:
+            logging.error(f"[FANOUT] {error} – pomijam.")
+            continue
+        host = site_host(SITES[site_key])
+        if host in hosts:
+            logging.warning(f"[FANOUT] {site_key} publikuje na tym samym hoście co {hosts[host]} ({host}) – pomijam.")
+            continue
+        hosts[host] = site_key
+        chosen.append((site_key, kind))
+    return chosen
+
+
+def _fanout_angles(targets):
+    angles = FANOUT_SETTINGS.get("angles") or [""]
+    focus = {}
+    for i, (site_key, kind) in enumerate(targets):
+        site = SITES[site_key]
+        base = site.get("fanout_angle") or angles[i % len(angles)]
+        form = "krótki news" if kind == "news" else "rozbudowany artykuł premium"
+        focus[site_key] = f"{base}; {form} dla czytelników portalu {site['friendly_name']} ({site['thematic_focus']})"
+    return {
+        site_key: {
+            "focus": focus[site_key],
+            "siblings": [f"{SITES[k]['friendly_name']}: {f}" for k, f in focus.items() if k != site_key],
+        }
+        for site_key in focus
+    }
 
-    # Sanitizacja
-    post_content = strip_numeric_citations(post_content)
-    post_content = enforce_anchor_nofollow(post_content)
 
-    # Kategorie
-    all_categories = get_all_wp_categories(site_config)
-    if category_id is not None:
-        logging.info(f"[NEWS] Użyto ręcznie wybranej kategorii ID={category_id}")
+def prepare_shared_research(targets, topic_source, manual_topic_data):
+    """
+    Temat zarezerwowany na hostach wszystkich celów i jeden research dla nich.
+    Zwraca dict dla `shared=` w run_*_process albo None (rezerwacje zwolnione).
+    """
+    from topic_registry import get_topic_registry
+    registry = get_topic_registry()
+    configs = [SITES[site_key] for site_key, _ in targets]
+    topics = {}
+
+    def claim_all(_, topic):
+        # Temat bierzemy tylko, jeśli jest wolny na każdym z hostów
+        claimed = {}
+        for site_config in configs:
+            copy = dict(topic)
+            if not registry.claim(site_config, copy):
+                for key, c in claimed.items():
+                    registry.release(SITES[key], c)
+                return False
+            claimed[site_config["site_key"]] = copy
+        topics.update(claimed)
+        return True
+
+    if topic_source == "Ręcznie":
+        topic_data = manual_topic_data
+        for site_config in configs:
+            copy = dict(topic_data or {})
+            if topic_data and not registry.claim(site_config, copy):
+                logging.warning(f"[FANOUT] Ręczny temat był już opisany na hoście portalu {site_config['site_key']} — kontynuuję.")
+            topics[site_config["site_key"]] = copy
     else:
-        if not all_categories:
-            logging.warning("[NEWS] Nie udało się pobrać kategorii z WP. Domyślne ID=1.")
-            category_id = 1
-        else:
-            chosen_names = choose_category_ai(post_title, post_content, list(all_categories.keys()))
-            chosen_name = chosen_names[0] if isinstance(chosen_names, list) and chosen_names else "Bez kategorii"
-            category_id = all_categories.get(chosen_name, 1)
+        topic_data = topic_sources.fetch(topic_source, configs[0], claim=claim_all)
+    if not topic_data:
+        return None
 
-    # Tagi
-    tags_list = generate_tags_ai(post_title, post_content) or []
-    tag_ids = [tid for tid in (get_or_create_term_id(tag, "tags", site_config) for tag in tags_list) if tid]
+    research_data = step1_research(topic_data, configs[0])
+    if not research_data:
+        for site_key, copy in topics.items():
+            registry.release(SITES[site_key], copy)
+        return None
+    logging.info(f"[FANOUT] Research gotowy ({len(research_data)} znaków): {save_artifact('research', research_data)}")
+    return {"topic": topic_data, "topics": topics, "research": research_data, "angles": _fanout_angles(targets)}
 
-    # Obraz wyróżniony
-    featured_media_id = upload_image_to_wp(topic_data.get("image_url"), post_title, site_config)
 
-    # Publikacja
-    data_to_publish = {
-        "title": post_title,
-        "content": post_content,
-        "status": "publish",
-        "categories": [category_id],
-        "tags": tag_ids,
-    }
-    if featured_media_id:
-        data_to_publish["featured_media"] = featured_media_id
+def run_fanout_process(targets, topic_source="Automatycznie", manual_topic_data=None, profile=False, output=None):
+    """
+    Jeden temat i jeden research, potem artykuły dla wielu portali równolegle
+    (`targets` – [(site_key, "premium"|"news")], pierwszy wybiera temat).
+    Zwraca [(site_key, kind, wynik)].
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-    result = publish_to_wp(data_to_publish, site_config)
-    if result and result.get("link"):
-        return f"Artykuł newsowy opublikowany! Link: {result.get('link')}"
-    else:
-        return "BŁĄD: Publikacja newsowego artykułu nie powiodła się."
+    setup_logging()
+    targets = _fanout_targets(targets, topic_source, output)
+    if not targets:
+        return []
+    with tracing.job(targets[0][0], "fanout", profile):
+        shared = prepare_shared_research(targets, topic_source, manual_topic_data)
+    if not shared:
+        error = "BŁĄD: Wspólny temat lub research nie powiódł się. Sprawdź logi."
+        return [(site_key, kind, error) for site_key, kind in targets]
+
+    runners = {"premium": run_generation_process, "news": run_news_process}
+    logging.info(f"[FANOUT] Piszę {len(targets)} artykułów ze wspólnego researchu: {', '.join(k for k, _ in targets)}")
+    with ThreadPoolExecutor(max_workers=FANOUT_SETTINGS.get("max_workers", 4)) as pool:
+        futures = [
+            pool.submit(runners[kind], site_key, topic_source, manual_topic_data, shared=shared, output=output, profile=profile)
+            for site_key, kind in targets
+        ]
+    results = []
+    for (site_key, kind), future in zip(targets, futures):
+        try:
+            results.append((site_key, kind, future.result()))
+        except Exception as e:
+            results.append((site_key, kind, f"BŁĄD: {type(e).__name__}: {e}"))
+    return results
+
+# -----------------------
+# WORKFLOW: AKTUALIZACJA ISTNIEJĄCEGO WPISU
+# -----------------------
+UPDATE_NOTE_CLASS = "writerpro-update-note"
+_UPDATE_LINE_RE = re.compile(r"^\s*SEKCJA\s+(\d+)\s*[:.\-–]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+
+def fetch_wp_post(post_id, site_config):
+    """Wpis WP z surową treścią (context=edit); None, gdy nie istnieje lub brak dostępu."""
+    import requests
+    url = f"{site_config['wp_api_url_base']}/posts/{post_id}"
+    try:
+        r = _http().get(
+            url, headers=get_auth_header(site_config), timeout=30,
+            params={"context": "edit", "_fields": "id,title,content,link,date_gmt,modified_gmt,status"},
+        )
+        r.raise_for_status()
+        return r.json()
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Nie udało się pobrać wpisu {post_id}: {e}")
+        return None
+
+
+def split_sections(html):
+    """
+    Dzieli treść wpisu na sekcje: każda zaczyna się od nagłówka <h2>–<h4>,
+    to, co przed pierwszym nagłówkiem, to lead (sekcja 0, bez nagłówka).
+    Zwraca listę {"heading": str|None, "html": str}.
+    """
+    soup = _soup(html)
+    sections = [{"heading": None, "nodes": []}]
+    for node in list(soup.contents):
+        if getattr(node, "name", None) in ("h2", "h3", "h4"):
+            sections.append({"heading": node.get_text(strip=True), "nodes": []})
+        if getattr(node, "name", None) == "p" and UPDATE_NOTE_CLASS in (node.get("class") or []):
+            continue  # poprzednia adnotacja o aktualizacji – zostanie zastąpiona
+        sections[-1]["nodes"].append(node)
+    result = [
+        {"heading": s["heading"], "html": "".join(str(n) for n in s["nodes"]).strip()}
+        for s in sections if s["nodes"] or s["heading"]
+    ]
+    soup.decompose()
+    return result
+
+
+@traced_stage("research")
+def step_update_research(post_title, published_at, sections, site_config, notes=None):
+    """Research wyłącznie nowych faktów od daty wpisu; zwraca {numer_sekcji: fakty}."""
+    logging.info(f"--- AKTUALIZACJA: szukam nowych informacji od {published_at}... ---")
+    toc = "\n".join(f"{i}. {s['heading'] or '(lead – początek artykułu)'}" for i, s in enumerate(sections))
+    prompt = textwrap.dedent(f"""
+        TRYB AKTUALIZACJI. Artykuł "{post_title}" został opublikowany {published_at}.
+        **NIE PISZ ARTYKUŁU.** Znajdź wyłącznie informacje NOWE od tej daty: nowe dane, skorygowane liczby,
+        decyzje, zmiany przepisów, nowe wypowiedzi. Pomiń wszystko, co było wiadome wcześniej.
+        {f"Wskazówki redakcji: {notes}" if notes else ""}
+
+        **SEKCJE ARTYKUŁU:**
+        {toc}
+
+        Dla każdej sekcji, której treść jest nieaktualna, zwróć JEDNĄ linię w formacie:
+        SEKCJA <numer>: <nowe fakty z datami i źródłami opisanymi słownie lub linkiem HTML>
+        Nie używaj przypisów numerycznych. Jeśli nic istotnego się nie zmieniło, odpowiedz dokładnie: BRAK ZMIAN
+    """)
+    response = llm.complete("research", prompt, site_config=site_config)
+    if response is None:
+        return None
+    changes = {}
+    for number, facts in _UPDATE_LINE_RE.findall(response):
+        if int(number) < len(sections):
+            changes.setdefault(int(number), []).append(facts.strip())
+    return {k: " ".join(v) for k, v in changes.items()}
+
+
+@traced_stage("write")
+def step_update_section(section, facts, site_config):
+    """Przepisuje jedną sekcję z uwzględnieniem nowych faktów (nagłówek i styl bez zmian)."""
+    prompt = textwrap.dedent(f"""
+        PRZEPISZ SEKCJĘ artykułu portalu {site_config['friendly_name']}, uwzględniając nowe fakty.
+        Zachowaj nagłówek (jeśli jest), długość, styl i linki; zmień tylko to, czego dotyczą nowe fakty.
+        Nie dodawaj przypisów numerycznych ([1], (1), <sup>) ani sekcji „Źródła”.
+
+        **NOWE FAKTY:**
+        {facts}
+
+        **OBECNA SEKCJA (HTML):**
+        {section['html']}
+
+        Zwróć wyłącznie nowy HTML tej sekcji, bez komentarzy.
+    """)
+    html = llm.complete("write", prompt, site_config=site_config)
+    if not html:
+        return None
+    return enforce_anchor_nofollow(strip_numeric_citations(html.strip()))
+
+
+@traced_stage("publish")
+def publish_update(post_id, content, site_config):
+    return update_wp_post(post_id, {"content": content}, site_config)
+
+
+@traced_job("update", setup=setup_logging)
+def run_update_process(site_key, post_id, notes=None):
+    """
+    Aktualizacja istniejącego wpisu zamiast nowej generacji: research tylko
+    tego, co nowe od daty wpisu, przepisanie wyłącznie dotkniętych sekcji
+    (równolegle) i zapis zmian w tym samym wpisie – URL zostaje.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    site_config = SITES[site_key]
+    error = config_error(site_config)
+    if error:
+        return error
+
+    post = fetch_wp_post(post_id, site_config)
+    if not post:
+        return f"BŁĄD: Nie udało się pobrać wpisu ID={post_id}."
+    title = post.get("title") or {}
+    content = post.get("content") or {}
+    post_title = title.get("raw") or title.get("rendered") if isinstance(title, dict) else title
+    post_html = content.get("raw") or content.get("rendered") if isinstance(content, dict) else content
+    published_at = (post.get("modified_gmt") or post.get("date_gmt") or "")[:10] or "nieznana data"
+
+    sections = split_sections(post_html or "")
+    changes = step_update_research(post_title, published_at, sections, site_config, notes)
+    if changes is None:
+        return "BŁĄD: Research aktualizacji nie powiódł się."
+    if not changes:
+        return f"Brak nowych informacji od {published_at} – wpis ID={post_id} bez zmian."
+    save_artifact("update_research", "\n".join(f"SEKCJA {k}: {v}" for k, v in sorted(changes.items())))
+    logging.info(f"[UPDATE] Do przepisania sekcje: {sorted(changes)} z {len(sections)}")
+
+    with ThreadPoolExecutor(max_workers=min(4, len(changes))) as pool:
+        futures = {
+            i: tracing.submit(pool, step_update_section, sections[i], facts, site_config)
+            for i, facts in changes.items()
+        }
+    rewritten = {i: f.result() for i, f in futures.items() if f.result()}
+    if not rewritten:
+        return "BŁĄD: Przepisanie sekcji nie powiodło się."
+
+    note = f'<p class="{UPDATE_NOTE_CLASS}"><em>Aktualizacja: {datetime.now():%d.%m.%Y}</em></p>'
+    new_html = note + "\n" + "\n".join(rewritten.get(i, s["html"]) for i, s in enumerate(sections))
+    save_artifact("article", new_html, ext="html")
+
+    result = publish_update(post_id, new_html, site_config)
+    if not result:
+        return "BŁĄD: Zapis aktualizacji w WordPress nie powiódł się."
+    index_published_post(site_config, result)
+    return f"Wpis zaktualizowany ({len(rewritten)} z {len(sections)} sekcji). Link: {result.get('link')}"
 
 # -----------------------
 # PEXELS
@@ -844,25 +1491,98 @@ def run_from_command_line(args):
     article_type = args.type
     topic_source = args.source
     manual_topic_data = {}
+    if topic_source == "Ręcznie":
+        manual_topic_data = {
+            "title": args.topic or "",
+            "url": args.url or "",
+            "body_snippet": args.context or "",
+            "source_name": "Dane ręczne",
+        }
 
-    if article_type == "premium":
+    profile = (args.profile_dir or True) if getattr(args, "profile", False) else False
+
+    if args.fanout:
+        targets = [(site_key, article_type)]
+        for item in args.fanout.split(","):
+            key, _, kind = item.strip().partition(":")
+            if key:
+                targets.append((key, kind or article_type))
+        logging.info(f"Uruchamiam fan-out (jeden research) dla: {', '.join(f'{k}:{t}' for k, t in targets)}")
+        for key, kind, result in run_fanout_process(targets, topic_source, manual_topic_data, profile=profile, output=args.output):
+            logging.info(f"[{key}/{kind}] {result}")
+        return
+    if args.update_post_id:
+        logging.info(f"Uruchamiam aktualizację wpisu ID={args.update_post_id} na portalu: {site_key}")
+        result = run_update_process(site_key, args.update_post_id, args.update_notes, profile=profile)
+    elif article_type == "premium":
         logging.info(f"Uruchamiam generowanie [Premium] dla portalu: {site_key} ze źródła: {topic_source}")
-        result = run_generation_process(site_key, topic_source, manual_topic_data)
+        result = run_generation_process(site_key, topic_source, manual_topic_data, output=args.output, profile=profile)
     elif article_type == "news":
         logging.info(f"Uruchamiam generowanie [News] dla portalu: {site_key} ze źródła: {topic_source}")
-        result = run_news_process(site_key, topic_source, manual_topic_data)
+        result = run_news_process(site_key, topic_source, manual_topic_data, output=args.output, profile=profile)
     else:
         logging.error(f"Nieznany typ artykułu: {article_type}")
         return
 
     logging.info(result)
 
-if __name__ == "__main__":
+
+def build_arg_parser():
     parser = argparse.ArgumentParser(description="Generator artykułów AI.")
     parser.add_argument("--site", type=str, required=True, help="Klucz portalu (np. autozakup, radiopin).")
     parser.add_argument("--type", type=str, choices=["premium", "news"], default="premium", help="Typ artykułu do wygenerowania.")
-    parser.add_argument("--source", type=str, choices=["Automatycznie", "Ręcznie"], default="Automatycznie", help="Źródło tematu.")
-    args = parser.parse_args()
+    parser.add_argument("--source", type=str, choices=list(topic_sources.TOPIC_SOURCES), default="Automatycznie",
+                        help="Źródło tematu (Automatycznie = EventRegistry, AI = propozycje modelu, Ręcznie).")
+    parser.add_argument("--topic", type=str, help="Tytuł / fraza tematu (dla --source Ręcznie).")
+    parser.add_argument("--url", type=str, help="Opcjonalny URL artykułu źródłowego (dla --source Ręcznie).")
+    parser.add_argument("--context", type=str, help="Opcjonalny kontekst / fragment (dla --source Ręcznie).")
+    parser.add_argument("--update-post-id", type=int,
+                        help="Zaktualizuj istniejący wpis WP (nowe fakty od daty wpisu) zamiast pisać nowy.")
+    parser.add_argument("--update-notes", type=str, help="Wskazówki do aktualizacji (np. co się zmieniło).")
+    parser.add_argument("--fanout", type=str, metavar="PORTAL[:TYP],...",
+                        help="Ten sam temat i research także dla tych portali (np. autocentrumgroup:news).")
+    parser.add_argument("--output", type=str, choices=list(sinks.SINKS),
+                        help="Dokąd zapisać artykuł (domyślnie SITES[...]['output'] albo OUTPUT_SETTINGS['sink']).")
+    parser.add_argument("--output-dir", type=str, help="Katalog dla ujść plikowych (domyślnie OUTPUT_SETTINGS['dir']).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profiluj etapy (cProfile + tracemalloc) i zapisz raporty w LOGGING_SETTINGS['profile_dir'].")
+    parser.add_argument("--profile-dir", type=str, help="Katalog na raporty profilowania (domyślnie z config).")
+    parser.add_argument("--check", action="store_true",
+                        help="Tylko preflight: konfiguracja portalu (i portali z --fanout) oraz logowanie do WP.")
+    return parser
+
+
+def run_preflight(args):
+    """Sprawdza portale z wywołania bez generowania; zwraca kod wyjścia (0 = gotowe)."""
+    from sites import preflight
+
+    site_keys = [args.site] + [item.strip().partition(":")[0] for item in (args.fanout or "").split(",") if item.strip()]
+    unknown = [key for key in site_keys if key not in SITES]
+    if unknown:
+        logging.error(f"Nieznane portale: {', '.join(unknown)}")
+        return 1
+    report = preflight(site_keys, args.source)
+    for site_key, found in report.items():
+        if found:
+            logging.error(f"[CHECK] {site_key}: {'; '.join(found)}")
+        else:
+            logging.info(f"[CHECK] {site_key}: OK")
+    return 1 if any(report.values()) else 0
+
+
+def main(argv=None):
+    # Najpierw argumenty: `--help` i błędne wywołania kończą się przed
+    # konfiguracją logowania i importem ciężkich bibliotek.
+    args = build_arg_parser().parse_args(argv)
+    setup_logging()
+    if args.check:
+        sys.exit(run_preflight(args))
+    if args.output_dir:
+        OUTPUT_SETTINGS["dir"] = args.output_dir
+    if args.profile:
+        warm_up()
     run_from_command_line(args)
 
 
+if __name__ == "__main__":
+    main()
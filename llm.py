@@ -0,0 +1,313 @@
+# llm.py — wywołania LLM przez dostawców z trasowaniem wg opóźnień i błędów
+#
+# Każde wywołanie idzie „trasą” (research, outline, write, classify). Trasa to
+# lista kandydatów (dostawca + model) z config.LLM_ROUTES; portal może ją
+# nadpisać w SITES[...]["models"] = {"write": [{"provider": ..., "model": ...}]}.
+#
+# Router pamięta ostatnie wywołania każdego kandydata (p50/p95 czasu, odsetek
+# błędów) i wybiera najszybszego zdrowego. Gdy odpowiedź nie przychodzi dłużej
+# niż p95 kandydata (LLM_ROUTING["hedge_after_p95"]), równolegle startuje
+# zapytanie do następnego i wygrywa pierwsza poprawna odpowiedź; błąd kandydata
+# to natychmiastowe przejście do kolejnego. Spowolnienie jednego dostawcy nie
+# blokuje więc wszystkich zadań.
+
+import collections
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+import metrics
+import tracing
+from config import COMMON_KEYS, ENDPOINTS, LLM_ROUTES, LLM_ROUTING, RATE_LIMITS
+
+HEDGES = metrics.Counter("writerpro_llm_hedges_total", "Zdublowane wywołania LLM (długi ogon).", ("route", "winner"))
+FAILOVERS = metrics.Counter("writerpro_llm_failovers_total", "Przejścia do kolejnego kandydata po błędzie.", ("route",))
+
+
+# -----------------------
+# DOSTAWCY
+# -----------------------
+class Provider:
+    """Dostawca chat completions: complete() zwraca (tekst, usage) albo zgłasza wyjątek."""
+
+    name = ""
+    api_key = ""  # nazwa klucza w COMMON_KEYS (sprawdzana przez sites.py)
+
+    def complete(self, model, messages, timeout, **params):
+        raise NotImplementedError
+
+
+class PerplexityProvider(Provider):
+    name = "perplexity"
+    api_key = "PERPLEXITY_API_KEY"
+
+    def complete(self, model, messages, timeout, **params):
+        from wp_http import session
+
+        response_format = params.get("response_format") or {}
+        if response_format.get("type") == "json_object":
+            params.pop("response_format")  # Perplexity zna tylko json_schema; o JSON prosi sam prompt
+        elif response_format.get("type") == "json_schema":
+            # Format OpenAI ({"name", "schema", "strict"}) → Perplexity przyjmuje samo "schema"
+            params["response_format"] = {"type": "json_schema", "json_schema": {"schema": response_format["json_schema"]["schema"]}}
+        headers = {
+            "Authorization": f"Bearer {COMMON_KEYS.get('PERPLEXITY_API_KEY')}",
+            "Content-Type": "application/json",
+        }
+        payload = dict(params, model=model, messages=messages)
+        r = session().post(ENDPOINTS["perplexity"], headers=headers, data=json.dumps(payload), timeout=timeout)
+        r.raise_for_status()
+        data = r.json()
+        return data["choices"][0]["message"]["content"], data.get("usage")
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+    api_key = "OPENAI_API_KEY"
+
+    def complete(self, model, messages, timeout, **params):
+        from generator import get_openai_client
+
+        resp = get_openai_client().chat.completions.create(model=model, messages=messages, timeout=timeout, **params)
+        return resp.choices[0].message.content, getattr(resp, "usage", None)
+
+
+PROVIDERS = {p.name: p for p in (PerplexityProvider(), OpenAIProvider())}
+
+
+# -----------------------
+# LIMITY ZAPYTAŃ (współdzielone przez wszystkie wątki procesu)
+# -----------------------
+class _RateLimiter:
+    """Token bucket: maks. `per_minute` zapytań na minutę; `acquire()` czeka na wolny token."""
+
+    def __init__(self, per_minute):
+        self.capacity = max(1, int(per_minute))
+        self.tokens = float(self.capacity)
+        self.refill_per_sec = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.refill_per_sec
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _throttle(provider):
+    """Blokuje wywołanie, jeśli przekroczylibyśmy limit RATE_LIMITS[provider] (zapytania/min)."""
+    limit = RATE_LIMITS.get(provider)
+    if not limit:
+        return
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        with _rate_limiters_lock:
+            limiter = _rate_limiters.setdefault(provider, _RateLimiter(limit))
+    limiter.acquire()
+
+
+def _record_usage(provider, usage):
+    """Zlicza tokeny z pola `usage` odpowiedzi (dict z API HTTP lub obiekt SDK)."""
+    if not usage:
+        return
+    stage = tracing.current_stage() or "-"
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, None)
+        if value:
+            metrics.LLM_TOKENS.inc(value, provider=provider, stage=stage, type=kind.split("_")[0])
+
+
+# -----------------------
+# STATYSTYKI KANDYDATÓW
+# -----------------------
+class _Stats:
+    def __init__(self, window):
+        self.samples = collections.deque(maxlen=window)  # (sekundy, ok)
+        self.last_at = 0.0
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(provider, model, seconds, ok):
+    with _stats_lock:
+        stats = _stats.setdefault((provider, model), _Stats(LLM_ROUTING.get("window", 50)))
+        stats.samples.append((seconds, ok))
+        stats.last_at = time.time()
+
+
+def snapshot(provider, model):
+    """{"n", "p50", "p95", "error_rate"} z ostatnich wywołań kandydata (czasy tylko udanych)."""
+    with _stats_lock:
+        stats = _stats.get((provider, model))
+        samples = list(stats.samples) if stats else []
+        last_at = stats.last_at if stats else 0.0
+    durations = sorted(s for s, ok in samples if ok)
+    errors = sum(1 for _, ok in samples if not ok)
+
+    def pct(p):
+        if not durations:
+            return None
+        return durations[min(len(durations) - 1, int(round((len(durations) - 1) * p)))]
+
+    return {
+        "n": len(samples),
+        "p50": pct(0.5),
+        "p95": pct(0.95),
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "last_at": last_at,
+    }
+
+
+def _healthy(snap):
+    if snap["n"] < LLM_ROUTING.get("min_samples", 5):
+        return True
+    if snap["error_rate"] <= LLM_ROUTING.get("max_error_rate", 0.5):
+        return True
+    # Niezdrowy kandydat po okresie ciszy dostaje znowu szansę (próba)
+    return time.time() - snap["last_at"] > LLM_ROUTING.get("cooldown_seconds", 60)
+
+
+def _collect(field):
+    def collect():
+        with _stats_lock:
+            keys = list(_stats)
+        values = {}
+        for provider, model in keys:
+            value = snapshot(provider, model)[field]
+            if value is not None:
+                values[(provider, model)] = value
+        return values
+    return collect
+
+
+metrics.Gauge("writerpro_llm_latency_p50_seconds", "p50 czasu udanych wywołań (ostatnie okno).",
+              ("provider", "model"), collect=_collect("p50"))
+metrics.Gauge("writerpro_llm_latency_p95_seconds", "p95 czasu udanych wywołań (ostatnie okno).",
+              ("provider", "model"), collect=_collect("p95"))
+metrics.Gauge("writerpro_llm_error_rate", "Odsetek błędów w ostatnim oknie wywołań.",
+              ("provider", "model"), collect=_collect("error_rate"))
+
+
+# -----------------------
+# TRASOWANIE
+# -----------------------
+def candidates(route, site_config=None):
+    """Kandydaci trasy [(dostawca, model)] – z SITES[...]["models"] albo LLM_ROUTES."""
+    entries = ((site_config or {}).get("models") or {}).get(route) or LLM_ROUTES.get(route) or []
+    return [(e["provider"], e["model"]) for e in entries if e.get("provider") in PROVIDERS]
+
+
+def _ordered(cands):
+    """
+    Zdrowi kandydaci wg p50, niezdrowi na końcu. Kandydat bez statystyk stoi za
+    zmierzonymi (dostaje ruch przy przejściu po błędzie albo dublowaniu); gdy
+    nikt nie ma statystyk, obowiązuje kolejność z konfiguracji.
+    """
+    ranked = []
+    for position, (provider, model) in enumerate(cands):
+        snap = snapshot(provider, model)
+        enough = snap["n"] >= LLM_ROUTING.get("min_samples", 5) and snap["p50"] is not None
+        ranked.append((0 if _healthy(snap) else 1, snap["p50"] if enough else float("inf"), position, (provider, model)))
+    return [c for *_, c in sorted(ranked)]
+
+
+def _hedge_after(provider, model):
+    snap = snapshot(provider, model)
+    if snap["n"] < LLM_ROUTING.get("min_samples", 5) or snap["p95"] is None:
+        return None  # bez statystyk nie dublujemy – nie wiadomo, co jest „długim ogonem”
+    return max(LLM_ROUTING.get("hedge_min_seconds", 5), snap["p95"] * LLM_ROUTING.get("hedge_after_p95", 1.0))
+
+
+def _call(provider_name, model, messages, params):
+    """Jedno wywołanie kandydata z limitem zapytań, metrykami i statystykami; None przy błędzie."""
+    _throttle(provider_name)
+    stage = tracing.current_stage() or "-"
+    start = time.perf_counter()
+    ok = False
+    try:
+        text, usage = PROVIDERS[provider_name].complete(
+            model, messages, LLM_ROUTING.get("timeout_seconds", 400), **params
+        )
+        ok = bool(text)
+        _record_usage(provider_name, usage)
+        return text
+    except Exception as e:
+        logging.error(f"Błąd API {provider_name} ({model}): {e}")
+        return None
+    finally:
+        elapsed = time.perf_counter() - start
+        _record(provider_name, model, elapsed, ok)
+        metrics.LLM_REQUESTS.inc(provider=provider_name, stage=stage, outcome="ok" if ok else "error")
+        metrics.LLM_SECONDS.observe(elapsed, provider=provider_name, stage=stage)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=LLM_ROUTING.get("max_workers", 32), thread_name_prefix="writerpro-llm"
+                )
+    return _executor
+
+
+def complete(route, prompt=None, messages=None, site_config=None, **params) -> Optional[str]:
+    """
+    Tekst odpowiedzi z najszybszego zdrowego kandydata trasy `route` albo None,
+    gdy zawiedli wszyscy. `params` (temperature, max_tokens, response_format)
+    trafiają do dostawcy bez zmian.
+    """
+    messages = messages or [{"role": "user", "content": prompt}]
+    remaining = _ordered(candidates(route, site_config))
+    if not remaining:
+        logging.error(f"Brak skonfigurowanych modeli dla trasy '{route}'.")
+        return None
+
+    active = {}
+
+    def launch():
+        provider, model = remaining.pop(0)
+        active[tracing.submit(_pool(), _call, provider, model, messages, params)] = (provider, model)
+        return provider, model
+
+    current = launch()
+    while active:
+        timeout = _hedge_after(*current) if remaining and LLM_ROUTING.get("hedge", True) else None
+        done, _ = wait(list(active), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            logging.info(f"[LLM] {route}: {current[0]}/{current[1]} odpowiada dłużej niż {timeout:.0f} s – dubluję.")
+            current = launch()
+            continue
+        for future in done:
+            provider, model = active.pop(future)
+            text = future.result()
+            if text:
+                if active or (provider, model) != current:
+                    HEDGES.inc(route=route, winner=f"{provider}/{model}")
+                return text
+        if not active and remaining:
+            FAILOVERS.inc(route=route)
+            logging.warning(f"[LLM] {route}: przechodzę do kolejnego modelu ({remaining[0][0]}/{remaining[0][1]}).")
+            current = launch()
+    return None
@@ -0,0 +1,185 @@
+# memory.py — pamięć workera przy dużych partiach artykułów
+#
+# Partia setek artykułów nie może trzymać w RAM obrazków i drzew
+# BeautifulSoup każdego zadania naraz. Stąd trzy mechanizmy:
+#   - Spooled: bajty obrazków (pobierane strumieniowo) w SpooledTemporaryFile –
+#     do MEMORY_SETTINGS["spool_max_kb"] w pamięci, powyżej w pliku
+#     tymczasowym. Research, plan i szkic HTML to kilka-kilkadziesiąt KB
+#     tekstu – zostają zwykłymi str, bo spool kosztowałby tylko kopie.
+#   - budżet RSS procesu ("worker_budget_mb"): job() wpuszcza nowe zadanie
+#     dopiero, gdy RSS spadnie poniżej budżetu albo skończą się pozostałe
+#     zadania – jedno zadanie startuje zawsze, więc nie ma zakleszczenia.
+#   - szczyt RSS procesu w trakcie zadania: próbkowany w tle, póki trwa
+#     jakiekolwiek zadanie; trafia do zdarzenia job_end (process_peak_rss_mb).
+#     To RSS całego procesu – przy równoległych zadaniach obejmuje też pamięć
+#     pozostałych, więc nie jest kosztem jednego artykułu.
+# RSS czytany z /proc/self/statm (Linux); bez niego budżet jest wyłączony.
+
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+from config import MEMORY_SETTINGS
+
+_MB = 1024 * 1024
+_SETTINGS_DEFAULTS = {"worker_budget_mb": 0, "spool_max_kb": 64, "admit_timeout_seconds": 600, "sample_seconds": 0.05}
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Trwające zadania: job_id -> _Usage; warunek budzi czekających na miejsce w budżecie
+_cond = threading.Condition()
+_running = {}
+_sampler = None
+
+WAITS = metrics.Counter("writerpro_memory_waits_total", "Zadania wstrzymane przez budżet pamięci workera.")
+
+
+def _setting(name):
+    return MEMORY_SETTINGS.get(name, _SETTINGS_DEFAULTS[name])
+
+
+def rss_bytes():
+    """Bieżące RSS procesu w bajtach albo None (brak /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def budget_bytes():
+    """Budżet RSS workera w bajtach; 0 – bez limitu."""
+    return int(float(_setting("worker_budget_mb")) * _MB)
+
+
+metrics.Gauge("writerpro_process_rss_bytes", "Bieżące RSS procesu.", collect=lambda: {(): float(rss_bytes() or 0)})
+metrics.Gauge("writerpro_memory_budget_bytes", "Budżet RSS workera (0 = bez limitu).", collect=lambda: {(): float(budget_bytes())})
+
+
+# -----------------------
+# ŁADUNKI ZADANIA
+# -----------------------
+class Spooled:
+    """
+    Tekst albo bajty w SpooledTemporaryFile. `data`: str, bytes albo iterowalne
+    porcji bajtów (np. response.iter_content) – wtedy zapisywane bez składania w pamięci.
+    """
+
+    def __init__(self, data, max_size=None):
+        import tempfile
+        if max_size is None:
+            max_size = int(_setting("spool_max_kb")) * 1024
+        self.lock = threading.Lock()
+        self.chars = len(data) if isinstance(data, str) else None
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        if isinstance(data, (str, bytes, bytearray)):
+            self.file.write(data.encode("utf-8") if isinstance(data, str) else data)
+        else:
+            for chunk in data:
+                if chunk:
+                    self.file.write(chunk)
+        self.size = self.file.tell()
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __len__(self):
+        """Długość w znakach (tekst) albo w bajtach."""
+        return self.size if self.chars is None else self.chars
+
+    def read(self):
+        with self.lock:
+            self.file.seek(0)
+            return self.file.read()
+
+    def text(self):
+        return self.read().decode("utf-8")
+
+    def close(self):
+        self.file.close()
+
+
+# -----------------------
+# BUDŻET I SZCZYT RSS PROCESU
+# -----------------------
+class _Usage:
+    def __init__(self, rss):
+        self.peak = rss or 0
+        self.waited = 0.0
+
+    def peak_mb(self):
+        rss = rss_bytes() or 0
+        peak = max(self.peak, rss)
+        return round(peak / _MB, 1) if peak else None
+
+
+def _sample_loop():
+    global _sampler
+    while True:
+        rss = rss_bytes() or 0
+        with _cond:
+            if not _running:
+                _sampler = None
+                return
+            for usage in _running.values():
+                usage.peak = max(usage.peak, rss)
+            limit = budget_bytes()
+            if limit and rss <= limit:
+                _cond.notify_all()
+        time.sleep(float(_setting("sample_seconds")))
+
+
+def _admit(limit):
+    """Czeka, aż RSS zmieści się w budżecie albo nie będzie innych zadań; zwraca sekundy oczekiwania (0 – bez czekania)."""
+    rss = rss_bytes()
+    if rss is None or rss <= limit:
+        return 0.0
+    gc.collect()  # drzewa HTML z cyklami referencji – zanim uznamy, że pamięci brak
+    start = time.monotonic()
+    deadline = start + float(_setting("admit_timeout_seconds"))
+    waited = False
+    with _cond:
+        while _running and time.monotonic() < deadline:
+            rss = rss_bytes() or 0
+            if rss <= limit:
+                break
+            if not waited:
+                waited = True
+                WAITS.inc()
+                logging.info(f"RSS {rss / _MB:.0f} MB > budżet {limit / _MB:.0f} MB – zadanie czeka na koniec trwających.")
+            _cond.wait(timeout=1.0)
+    if waited and _running and time.monotonic() >= deadline:
+        logging.warning(f"Budżet pamięci przekroczony dłużej niż {_setting('admit_timeout_seconds')} s – zadanie startuje mimo to.")
+    return time.monotonic() - start if waited else 0.0
+
+
+@contextmanager
+def job(job_id, admit=True):
+    """
+    Zakres zadania dla tracing.job: miejsce w budżecie RSS (`admit=False` dla
+    zadań zagnieżdżonych) i pomiar szczytu RSS procesu w trakcie zadania;
+    zwraca _Usage (peak_mb(), waited).
+    """
+    global _sampler
+    limit = budget_bytes()
+    waited = _admit(limit) if admit and limit else 0.0
+    usage = _Usage(rss_bytes())
+    usage.waited = waited
+    with _cond:
+        _running[job_id] = usage
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="writerpro-rss", daemon=True)
+            _sampler.start()
+    try:
+        yield usage
+    finally:
+        with _cond:
+            _running.pop(job_id, None)
+        if limit and (rss_bytes() or 0) > limit:
+            gc.collect()
+        with _cond:
+            _cond.notify_all()
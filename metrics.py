@@ -0,0 +1,259 @@
+# metrics.py — liczniki i histogramy procesu w formacie Prometheus (tylko stdlib)
+#
+# Zasilane z tracing.py (etapy, zadania, HTTP) oraz z wywołań LLM w generator.py.
+# Demon (scheduler.py) wystawia je pod http://<host>:<port>/metrics, a strona
+# „Ops” w app.py renderuje te same liczby (lokalne lub pobrane z demona).
+
+import bisect
+import collections
+import re
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+_registry = []
+_started_at = time.time()
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def _fmt_labels(self, key, extra=None):
+        pairs = list(zip(self.label_names, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + body + "}"
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self):
+        with self.lock:
+            return [f"{self.name}{self._fmt_labels(k)} {v:g}" for k, v in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, help_text, label_names=(), collect=None):
+        super().__init__(name, help_text, label_names)
+        self.collect = collect  # opcjonalnie: funkcja zwracająca {klucz_etykiet: wartość} przy eksporcie
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = float(value)
+
+    def render(self):
+        values = self.collect() if self.collect else None
+        with self.lock:
+            items = values.items() if values is not None else self.values.items()
+            return [f"{self.name}{self._fmt_labels(k)} {v:g}" for k, v in sorted(items)]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for key, (counts, total, n) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    lines.append(f"{self.name}_bucket{self._fmt_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+                lines.append(f"{self.name}_bucket{self._fmt_labels(key, {'le': '+Inf'})} {n}")
+                lines.append(f"{self.name}_sum{self._fmt_labels(key)} {total:g}")
+                lines.append(f"{self.name}_count{self._fmt_labels(key)} {n}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# -----------------------
+# METRYKI PIPELINE'U
+# -----------------------
+ARTICLES = Counter("writerpro_articles_total", "Zakończone zadania generowania.", ("site", "kind", "status"))
+STAGE_SECONDS = Histogram("writerpro_stage_duration_seconds", "Czas etapu pipeline'u.", ("site", "stage", "status"))
+LLM_REQUESTS = Counter("writerpro_llm_requests_total", "Wywołania LLM.", ("provider", "stage", "outcome"))
+LLM_SECONDS = Histogram("writerpro_llm_duration_seconds", "Czas wywołania LLM.", ("provider", "stage"))
+LLM_TOKENS = Counter("writerpro_llm_tokens_total", "Tokeny zużyte przez LLM.", ("provider", "stage", "type"))
+HTTP_REQUESTS = Counter("writerpro_http_requests_total", "Zapytania HTTP (sesja requests).", ("host", "status"))
+HTTP_SECONDS = Histogram("writerpro_http_duration_seconds", "Czas zapytań HTTP.", ("host",))
+CACHE = Counter("writerpro_cache_requests_total", "Trafienia i chybienia cache'y w procesie.", ("cache", "result"))
+RETRIES = Counter("writerpro_retries_total", "Ponowione próby po błędzie (fallbacki, poprawki).", ("operation",))
+
+_recent_articles = collections.deque()
+_recent_lock = threading.Lock()
+
+
+def _articles_last_hour():
+    cutoff = time.time() - 3600
+    with _recent_lock:
+        while _recent_articles and _recent_articles[0][0] < cutoff:
+            _recent_articles.popleft()
+        counts = collections.Counter(site for _, site in _recent_articles)
+    return {(site,): float(n) for site, n in counts.items()}
+
+
+ARTICLES_LAST_HOUR = Gauge(
+    "writerpro_articles_last_hour", "Udane artykuły w ostatnich 60 minutach.", ("site",), collect=_articles_last_hour
+)
+UPTIME = Gauge(
+    "writerpro_process_uptime_seconds", "Czas działania procesu.", collect=lambda: {(): time.time() - _started_at}
+)
+
+
+def record_article(site, kind, ok):
+    ARTICLES.inc(site=site, kind=kind, status="ok" if ok else "error")
+    if ok:
+        with _recent_lock:
+            _recent_articles.append((time.time(), site))
+
+
+def record_cache(cache, hit):
+    CACHE.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def reset():
+    """Zeruje wszystkie metryki (np. między poziomami benchmarku)."""
+    for metric in _registry:
+        with metric.lock:
+            metric.values.clear()
+    with _recent_lock:
+        _recent_articles.clear()
+
+
+# -----------------------
+# EKSPORT / SERWER
+# -----------------------
+def render():
+    """Wszystkie metryki w formacie tekstowym Prometheusa."""
+    lines = []
+    for metric in list(_registry):
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Uruchamia endpoint /metrics w wątku w tle; zwraca serwer (shutdown() go zatrzymuje)."""
+    # Import leniwy: http.server potrzebny jest tylko demonowi, a nie każdemu startowi generatora
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="writerpro-metrics", daemon=True).start()
+    return server
+
+
+# -----------------------
+# ODCZYT (strona Ops)
+# -----------------------
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_prometheus_text(text):
+    """Lista próbek (nazwa, {etykiety}, wartość) z tekstu w formacie Prometheusa."""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = _SAMPLE_RE.match(line.strip())
+        if not m:
+            continue
+        labels = {k: v.replace('\\"', '"').replace("\\\\", "\\") for k, v in _LABEL_RE.findall(m.group(2) or "")}
+        samples.append((m.group(1), labels, float(m.group(3))))
+    return samples
+
+
+def histogram_quantile(q, buckets):
+    """Kwantyl z kumulatywnych kubełków [(le, count), ...] – interpolacja jak w Prometheusie."""
+    buckets = sorted(buckets, key=lambda b: b[0])
+    if not buckets or buckets[-1][1] == 0:
+        return 0.0
+    rank = q * buckets[-1][1]
+    prev_bound, prev_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return prev_bound
+            if count == prev_count:
+                return bound
+            return prev_bound + (bound - prev_bound) * (rank - prev_count) / (count - prev_count)
+        prev_bound, prev_count = bound, count
+    return prev_bound
+
+
+def summarize_histogram(samples, name, group_by):
+    """{klucz_grupy: {"count", "avg", "p50", "p95"}} dla histogramu `name` z próbek."""
+    groups = {}
+    for metric, labels, value in samples:
+        key = tuple(labels.get(g, "") for g in group_by)
+        if metric == f"{name}_bucket":
+            le = float("inf") if labels["le"] == "+Inf" else float(labels["le"])
+            groups.setdefault(key, {"buckets": collections.Counter(), "sum": 0.0, "count": 0.0})["buckets"][le] += value
+        elif metric == f"{name}_sum":
+            groups.setdefault(key, {"buckets": collections.Counter(), "sum": 0.0, "count": 0.0})["sum"] += value
+        elif metric == f"{name}_count":
+            groups.setdefault(key, {"buckets": collections.Counter(), "sum": 0.0, "count": 0.0})["count"] += value
+    result = {}
+    for key, g in groups.items():
+        buckets = list(g["buckets"].items())
+        result[key] = {
+            "count": int(g["count"]),
+            "avg": g["sum"] / g["count"] if g["count"] else 0.0,
+            "p50": histogram_quantile(0.5, buckets),
+            "p95": histogram_quantile(0.95, buckets),
+        }
+    return result
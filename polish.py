@@ -0,0 +1,114 @@
+# polish.py — normalizacja polskich słów do porównań fraza ↔ tytuł
+#
+# Lekki stemmer (bez słowników i zależności): odcina końcówki fleksyjne,
+# cofa najczęstsze oboczności tematu (Polsce → polsk, drodze → drog, mieście → miast,
+# podatek → podatk) i sprowadza ń/ś/ć/ź/ó do n/s/c/z/o, żeby „mieszkań”
+# i „mieszkania” dawały ten sam temat. Nieregularne formy są w tabeli _LEMMAS.
+# Tematy liczone są raz (lru_cache) – demon porównuje wciąż te same frazy.
+#
+# Stemmer jest celowo zachłanny, więc tematy porównuje stems_match(), które
+# dopuszcza różnicę w ostatniej głosce (mieszkaniec / mieszkańców).
+# Trafność mierzy bench/title_keyword_eval.py na korpusie par fraza–tytuł.
+
+import re
+from functools import lru_cache
+from typing import List
+
+_CACHE_SIZE = 65536
+_MIN_STEM = 3
+_WORD_RE = re.compile(r"[a-ząćęłńóśźż0-9]+")
+
+STOPWORDS = frozenset("""
+    a aby ach acz aczkolwiek aj albo ale ależ ani aż bardziej bardzo bez bo bowiem by byli bym bynajmniej być był
+    była było były będzie będą cali cała cały ci cię ciebie co cokolwiek coraz coś czasami czasem czemu czy czyli
+    daleko dla dlaczego dlatego do dobrze dokąd dość dużo dwa dwaj dwie dwoje dziś dzisiaj gdy gdyby gdyż gdzie
+    gdziekolwiek gdzieś go i ich ile im inna inne inny innych iż ja ją jak jaka jakaś jakby jaki jakichś jakie
+    jakiś jakiż jakkolwiek jako jakoś je jeden jedna jedno jednak jednakże jego jej jemu jest jestem jeszcze jeśli
+    jeżeli już każdy kiedy kilka kimś kto ktokolwiek ktoś która które którego której który których którym
+    którzy ku lecz lub ma mają mam mi mimo między mną mnie mogą moi moim moja moje może możliwe można mój mu
+    musi my na nad nam nami nas nasi nasz nasza nasze naszego naszych natomiast natychmiast nawet nią nic nich nie
+    niech niego niej niemu nigdy nim nimi niż no o obok od około on ona one oni ono oraz oto owszem pan pana pani
+    po pod podczas pomimo ponad ponieważ powinien powinna powinni powinno poza prawie przecież przed przede
+    przedtem przez przy również sam sama są się skąd sobie sobą sposób swoje ta tak taka taki takie także tam
+    te tego tej temu ten teraz też to tobą tobie toteż trzeba tu tutaj twoi twoim twoja twoje twym twój ty tych
+    tylko tym u w wam wami was wasz wasza wasze we według wiele wielu więc więcej wszyscy wszystkich wszystkie
+    wszystkim wszystko wtedy wy właśnie z za zapewne zawsze ze zł znowu znów został żaden żadna żadne żadnych że
+    żeby
+""".split())
+
+# Tematy pomijane przy porównaniu fraza ↔ tytuł (za częste w tytułach portali regionalnych)
+DOMAIN_STEMS = frozenset({"rok", "wojewodztw"})
+
+# Formy nieregularne i oboczności, których reguły nie obejmują
+_LEMMAS = {
+    "mieście": "miast", "dzieci": "dzieck", "dziećmi": "dzieck", "ludzi": "lud", "ludzie": "lud", "ludźmi": "lud",
+    "dzień": "dzien", "dnia": "dzien", "dni": "dzien", "dniu": "dzien", "lata": "rok", "latach": "rok",
+    "ręce": "ręk", "rękach": "ręk", "psa": "pies", "psy": "pies", "kościele": "kosciol", "kościoła": "kosciol",
+}
+
+# Oboczności końcówek miejscownika/celownika: (końcówka, zamiennik)
+_ALTERNATIONS = (("ście", "st"), ("dzie", "d"), ("sce", "sk"), ("dze", "g"))
+
+_SUFFIXES = tuple(sorted((
+    "owaniami", "owaniach", "ościami", "ościach", "owania", "owanie", "owaniu", "iami", "iach", "iego", "iemu",
+    "ością", "ości", "ość", "owie", "ach", "ami", "iom", "owi", "ego", "emu", "ych", "ich", "ymi", "imi", "iej",
+    "om", "ów", "ej", "ym", "im", "ie", "ia", "ią", "ię", "iu", "ii", "io",
+    "ę", "ą", "a", "e", "i", "o", "u", "y",
+), key=len, reverse=True))
+
+_FOLD = str.maketrans("ńśćźó", "nsczo")
+_VOWELS = set("aąeęioóuy")
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def stem(word: str) -> str:
+    """Temat polskiego słowa: „Mieszkań” → „mieszkan”, „województwa” → „wojewodztw”, „2025” → „2025”."""
+    word = word.lower()
+    if word in _LEMMAS:
+        return _LEMMAS[word]
+    if word.isdigit():
+        return word
+    for suffix, replacement in _ALTERNATIONS:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return (word[:-len(suffix)] + replacement).translate(_FOLD)
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[:-len(suffix)].translate(_FOLD)
+    # Ruchome „e”: podatek → podatk (jak w „podatku”), rynek → rynk
+    if len(word) > _MIN_STEM + 1 and word[-2] == "e" and word[-1] in "kc" and word[-3] not in _VOWELS:
+        word = word[:-2] + word[-1]
+    return word.translate(_FOLD)
+
+
+def stems_match(a: str, b: str) -> bool:
+    """Te same tematy albo różnica tylko w ostatniej głosce krótszego (przy wspólnych min. 4 znakach)."""
+    if a == b:
+        return True
+    common = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        common += 1
+    return common >= max(4, min(len(a), len(b)) - 1)
+
+
+def keyword_stems(text: str) -> List[str]:
+    """Tematy znaczących słów tekstu (bez stopwords, słów < 3 znaków i DOMAIN_STEMS), w kolejności wystąpienia."""
+    stems = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        s = stem(word)
+        if s not in DOMAIN_STEMS and s not in stems:
+            stems.append(s)
+    return stems
+
+
+def covers(title: str, phrase: str, allowed_missing: int = 1) -> bool:
+    """Czy tytuł zawiera tematy frazy – wszystkie poza `allowed_missing` (min. jeden)."""
+    wanted = keyword_stems(phrase)
+    if not wanted:
+        return True
+    present = keyword_stems(title)
+    found = sum(1 for w in wanted if any(stems_match(w, p) for p in present))
+    return found >= max(1, len(wanted) - allowed_missing)
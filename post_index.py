@@ -0,0 +1,216 @@
+# post_index.py — lokalny indeks podobieństwa opublikowanych wpisów (per host WP)
+#
+# Indeks jest zasilany przyrostowo z REST API WordPressa (posts?modified_after=...)
+# oraz wpisami publikowanymi przez generator. Pierwsze, pełne zasilenie hosta
+# (backfill) nie odbywa się w trakcie zadania – robi je osobne polecenie
+#   python post_index.py --backfill [--sites autozakup,tylkoslask]
+# albo rozgrzewka w tle (warm_up, np. przy starcie demona). Dwa poziomy porównań:
+#  - tytuł (shingle znakowe) – tani test przed outline'em i pisaniem,
+#  - treść (shingle 3-wyrazowe) – test gotowego artykułu przed publikacją.
+
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import List
+
+from config import DATA_DIR, SIMILARITY_SETTINGS
+from similarity import MinHashIndex, char_shingles, minhash, word_shingles
+from sites import SITES
+from topic_registry import site_host
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _title_signature(title):
+    return minhash(char_shingles(title))
+
+
+def _content_signature(html):
+    return minhash(word_shingles(html, 3))
+
+
+class PostIndex:
+    def __init__(self, path):
+        self.index = MinHashIndex(path)
+        self._backfill_lock = threading.Lock()
+        self._backfilling = set()
+        with self.index.lock, self.index.conn:
+            self.index.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state (host TEXT PRIMARY KEY, last_modified TEXT, synced_at REAL)"
+            )
+
+    # --- zasilanie ---
+    def add_post(self, site_config, post_id, title, content, link=None):
+        host = site_host(site_config)
+        meta = {"title": title, "link": link}
+        self.index.add(f"{host}#title", str(post_id), _title_signature(title), meta=meta)
+        if content:
+            self.index.add(f"{host}#content", str(post_id), _content_signature(content), meta=meta)
+
+    def add_published(self, site_config, wp_post):
+        """Dodaje wpis zwrócony przez /posts po publikacji (pola title/content jako obiekty lub napisy)."""
+        if not wp_post or not wp_post.get("id"):
+            return
+        title = wp_post.get("title")
+        content = wp_post.get("content")
+        title = title.get("raw") or title.get("rendered") if isinstance(title, dict) else title
+        content = content.get("raw") or content.get("rendered") if isinstance(content, dict) else content
+        self.add_post(site_config, wp_post["id"], title or "", content or "", wp_post.get("link"))
+
+    def _sync_state(self, host):
+        with self.index.lock:
+            return self.index.conn.execute(
+                "SELECT last_modified, synced_at FROM sync_state WHERE host=?", (host,)
+            ).fetchone() or (None, 0.0)
+
+    def is_backfilled(self, site_config):
+        return self._sync_state(site_host(site_config))[1] > 0
+
+    def sync(self, site_config, force=False):
+        """
+        Przyrostowo dociąga z WP wpisy zmienione od ostatniej synchronizacji – nie
+        częściej niż co SIMILARITY_SETTINGS["sync_interval_minutes"], chyba że
+        force=True. Host jeszcze niezasilony nie jest pobierany tutaj (to mogłyby
+        być minuty): startuje backfill w tle, a do tego czasu indeks jest niepełny.
+        """
+        host = site_host(site_config)
+        last_modified, synced_at = self._sync_state(host)
+        if not synced_at:
+            self.start_backfill(site_config)
+            return 0
+        if host in self._backfilling:
+            return 0
+        if not force and time.time() - synced_at < SIMILARITY_SETTINGS["sync_interval_minutes"] * 60:
+            return 0
+        return self._crawl(site_config, last_modified)
+
+    def backfill(self, site_config):
+        """Pełne zasilenie indeksu wszystkimi wpisami hosta (synchronicznie)."""
+        host = site_host(site_config)
+        with self._backfill_lock:
+            if host in self._backfilling:
+                return 0
+            self._backfilling.add(host)
+        try:
+            start = time.monotonic()
+            added = self._crawl(site_config, self._sync_state(host)[0])
+            logging.info(f"[DEDUP] Backfill {host}: {added} wpisów w {time.monotonic() - start:.0f} s.")
+            return added
+        finally:
+            with self._backfill_lock:
+                self._backfilling.discard(host)
+
+    def start_backfill(self, site_config):
+        """Backfill w wątku w tle (bez blokowania zadania); drugi dla tego samego hosta jest pomijany."""
+        if site_host(site_config) in self._backfilling:
+            return
+        threading.Thread(
+            target=self.backfill, args=(site_config,), name=f"writerpro-backfill-{site_host(site_config)}", daemon=True
+        ).start()
+
+    def _crawl(self, site_config, last_modified):
+        from wp_http import get_auth_header, session
+
+        host = site_host(site_config)
+        url = f"{site_config['wp_api_url_base']}/posts"
+        params = {
+            "per_page": 100,
+            "orderby": "modified",
+            "order": "asc",
+            "_fields": "id,title,content,link,modified_gmt",
+        }
+        if last_modified:
+            params["modified_after"] = last_modified
+        headers = get_auth_header(site_config)
+
+        added, page = 0, 1
+        newest = last_modified
+        while True:
+            try:
+                r = session().get(url, headers=headers, params=dict(params, page=page), timeout=30)
+                if r.status_code == 400 and page > 1:
+                    break  # WP zwraca 400 dla strony poza zakresem
+                r.raise_for_status()
+                posts = r.json()
+            except Exception as e:
+                logging.warning(f"[DEDUP] Synchronizacja indeksu wpisów z {host} przerwana: {e}")
+                if not added:
+                    return 0  # nic nie pobrano – stan bez zmian, kolejna próba zacznie od nowa
+                break
+            if not posts:
+                break
+            for post in posts:
+                self.add_published(site_config, post)
+                newest = max(newest or "", post.get("modified_gmt") or "")
+                added += 1
+            if page >= int(r.headers.get("X-WP-TotalPages", page)):
+                break
+            page += 1
+
+        with self.index.lock, self.index.conn:
+            self.index.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (host, last_modified, synced_at) VALUES (?, ?, ?)",
+                (host, newest, time.time()),
+            )
+        if added:
+            logging.info(f"[DEDUP] Zsynchronizowano {added} wpisów z {host} do indeksu podobieństwa.")
+        return added
+
+    # --- zapytania ---
+    def similar_titles(self, site_config, title) -> List[dict]:
+        host = site_host(site_config)
+        return self.index.query(f"{host}#title", _title_signature(title), SIMILARITY_SETTINGS["title_threshold"])
+
+    def similar_content(self, site_config, html) -> List[dict]:
+        host = site_host(site_config)
+        return self.index.query(f"{host}#content", _content_signature(html), SIMILARITY_SETTINGS["content_threshold"])
+
+
+def get_post_index() -> PostIndex:
+    """Współdzielony indeks wpisów (SQLite w DATA_DIR), tworzony przy pierwszym użyciu."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _index = PostIndex(os.path.join(DATA_DIR, "post_index.sqlite3"))
+    return _index
+
+
+def warm_up(site_keys):
+    """Startuje w tle backfill hostów, które jeszcze nie były zasilane (np. przy starcie demona)."""
+    index = get_post_index()
+    for site_key in site_keys:
+        site_config = SITES[site_key]
+        if site_config.get("wp_api_url_base") and not index.is_backfilled(site_config):
+            index.start_backfill(site_config)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indeks podobieństwa wpisów WordPressa.")
+    parser.add_argument("--backfill", action="store_true", help="Pełne zasilenie indeksu (wszystkie wpisy).")
+    parser.add_argument("--sites", type=str, help="Lista portali oddzielona przecinkami (domyślnie: wszystkie).")
+    args = parser.parse_args(argv)
+
+    from generator import setup_logging
+    setup_logging()
+    site_keys = [s.strip() for s in args.sites.split(",")] if args.sites else list(SITES)
+    index = get_post_index()
+    done = set()
+    for site_key in site_keys:
+        site_config = SITES[site_key]
+        host = site_host(site_config)
+        if host in done:  # rodzina portali na jednym hoście – jeden indeks
+            continue
+        done.add(host)
+        if args.backfill:
+            index.backfill(site_config)
+        else:
+            index.sync(site_config, force=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# profiling.py — tryb profilowania etapów pipeline'u (cProfile + tracemalloc)
+#
+# Włączany per zadanie: flaga `--profile` w generator.py, przełącznik w app.py
+# (parametr `profile=` przekazywany przez tracing.traced_job). Każdy etap
+# (tracing.traced_stage) profilowanego zadania jest wtedy opakowany
+# w cProfile i migawki tracemalloc; wyniki trafiają do katalogu przebiegu:
+#   <profile_dir>/<data_czas>_<job_id>/
+#     NN_<etap>.prof    – statystyki cProfile (python -m pstats / snakeviz)
+#     NN_<etap>.txt     – top funkcji (cumtime) + top alokacji tracemalloc
+#     summary.txt       – tabela: czas ścienny, CPU, netto alokacje, szczyt pamięci
+#
+# Etapy zagnieżdżone (np. title_fix w postprocess) liczą się do etapu
+# zewnętrznego – cProfile może mierzyć tylko jeden zakres na wątek.
+# cProfile widzi wyłącznie wątek, który go włączył, więc etap, który tylko
+# rozdziela pracę na pulę wątków (write w trybie "sections"), jest mierzony
+# w tracing bez profilowania (traced_stage(..., profile=False)); profil mają
+# jego etapy potomne (section, stitch). Naraz profilowany jest jeden etap
+# zadania – równoległe sekcje w tym czasie tylko odmierzają czas.
+#
+# cProfile, pstats i tracemalloc ładowane są dopiero w profilowanym zadaniu –
+# tracing.py importuje ten moduł zawsze, a start bez --profile ma ich nie płacić.
+
+import contextvars
+import io
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import LOGGING_SETTINGS
+
+_session = contextvars.ContextVar("writerpro_profile_session", default=None)
+
+# tracemalloc jest globalny dla procesu: włączamy go, gdy startuje pierwsze
+# profilowane zadanie, i wyłączamy po ostatnim (o ile to my go włączyliśmy)
+_tracing_lock = threading.Lock()
+_tracing_jobs = 0
+_tracing_owned = False
+
+
+def _alloc_filters():
+    """Ramki samego profilera nie są interesujące w raportach alokacji."""
+    import tracemalloc
+    return (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    )
+
+
+def _acquire_tracemalloc():
+    global _tracing_jobs, _tracing_owned
+    import tracemalloc
+    with _tracing_lock:
+        if _tracing_jobs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(1)  # 1 ramka: migawki są wtedy wielokrotnie tańsze
+            _tracing_owned = True
+        _tracing_jobs += 1
+
+
+def _release_tracemalloc():
+    global _tracing_jobs, _tracing_owned
+    import tracemalloc
+    with _tracing_lock:
+        _tracing_jobs -= 1
+        if _tracing_jobs == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class _Session:
+    def __init__(self, run_dir, top):
+        self.run_dir = run_dir
+        self.top = top
+        self.records = []
+        self.seq = 0
+        self.active = False  # czy w tym zadaniu trwa już profilowany etap
+        self.lock = threading.Lock()
+
+    def claim(self):
+        """Zajmuje profiler zadania dla etapu; False, gdy inny etap (także z innego wątku) już go ma."""
+        with self.lock:
+            if self.active:
+                return False
+            self.active = True
+            return True
+
+
+@contextmanager
+def job(job_id, site_key, kind, profile=False):
+    """
+    Zakres zadania. `profile` – False (bez profilowania), True (katalog z
+    LOGGING_SETTINGS["profile_dir"]) albo ścieżka katalogu bazowego. Tworzy
+    katalog przebiegu i na końcu zapisuje w nim summary.txt.
+    """
+    if not profile:
+        yield None
+        return
+    base_dir = profile if isinstance(profile, str) else LOGGING_SETTINGS.get("profile_dir", "profiles")
+    run_dir = os.path.join(base_dir, f"{datetime.now():%Y%m%d-%H%M%S}_{job_id}")
+    os.makedirs(run_dir, exist_ok=True)
+    session = _Session(run_dir, LOGGING_SETTINGS.get("profile_top", 25))
+    _acquire_tracemalloc()
+    token = _session.set(session)
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+        _release_tracemalloc()
+        summary = format_summary(session.records, title=f"{site_key} / {kind} / {job_id}")
+        with open(os.path.join(run_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(summary)
+        logging.info(f"[PROFILE] Profil zadania zapisany w {run_dir}\n{summary}")
+
+
+def read_summaries(base_dir):
+    """Tabele summary.txt wszystkich przebiegów zapisanych w `base_dir` (najstarsze pierwsze)."""
+    if not os.path.isdir(base_dir):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(base_dir)):
+        path = os.path.join(base_dir, name, "summary.txt")
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                summaries.append(f.read())
+    return summaries
+
+
+@contextmanager
+def stage(name):
+    """Zakres etapu: cProfile + migawki tracemalloc (gdy zadanie jest profilowane)."""
+    session = _session.get()
+    if session is None or not session.claim():
+        yield
+        return
+    import cProfile
+    import tracemalloc
+
+    # Migawka „przed” poza profilerem – jej koszt nie może trafić do statystyk etapu
+    before, mem_start = None, 0
+    if tracemalloc.is_tracing():
+        before = tracemalloc.take_snapshot().filter_traces(_alloc_filters())
+        tracemalloc.reset_peak()
+        mem_start = tracemalloc.get_traced_memory()[0]
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+: jeden profiler naraz w procesie – równoległy etap innego zadania
+        profiler = None
+    if profiler is None:
+        session.active = False
+        yield
+        return
+
+    session.seq += 1
+    seq = session.seq
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        session.active = False
+        _save_stage(session, seq, name, profiler, before, mem_start, wall, cpu)
+
+
+def _save_stage(session, seq, name, profiler, before, mem_start, wall, cpu):
+    import pstats
+    import tracemalloc
+
+    base = os.path.join(session.run_dir, f"{seq:02d}_{name}")
+    profiler.dump_stats(base + ".prof")
+
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(session.top)
+    top_func = _top_function(stats)
+
+    alloc_kb, peak_kb = 0.0, 0.0
+    if before is not None and tracemalloc.is_tracing():
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(_alloc_filters())  # po profiler.disable()
+        diff = after.compare_to(before, "lineno")
+        alloc_kb = sum(d.size_diff for d in diff) / 1024
+        peak_kb = max(0, peak - mem_start) / 1024  # szczyt ponad stan z początku etapu (cały proces)
+        out.write(f"\n--- tracemalloc: top {session.top} alokacji (netto w etapie) ---\n")
+        for d in diff[:session.top]:
+            out.write(f"{d}\n")
+
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+    session.records.append({
+        "seq": seq,
+        "stage": name,
+        "wall_ms": wall * 1000,
+        "cpu_ms": cpu * 1000,
+        "alloc_kb": alloc_kb,
+        "peak_kb": peak_kb,
+        "top": top_func,
+    })
+
+
+def _top_function(stats):
+    """Funkcja z największym czasem własnym (tottime) – pierwszy podejrzany."""
+    best = None
+    for (filename, line, func), (_, _, tottime, _, _) in stats.stats.items():
+        if best is None or tottime > best[0]:
+            best = (tottime, f"{os.path.basename(filename)}:{line}({func})" if line else func)
+    return f"{best[1]} {best[0] * 1000:.0f} ms" if best else ""
+
+
+def format_summary(records, title=""):
+    lines = [title] if title else []
+    lines.append(f"{'#':>2} {'etap':<14} {'ścienny [ms]':>12} {'CPU [ms]':>10} {'alok. [KiB]':>12} "
+                 f"{'szczyt [KiB]':>12}  najdroższa funkcja (tottime)")
+    for r in records:
+        lines.append(f"{r['seq']:>2} {r['stage']:<14} {r['wall_ms']:>12.1f} {r['cpu_ms']:>10.1f} "
+                     f"{r['alloc_kb']:>12.1f} {r['peak_kb']:>12.1f}  {r['top']}")
+    lines.append(f"{'':>2} {'[razem]':<14} {sum(r['wall_ms'] for r in records):>12.1f} "
+                 f"{sum(r['cpu_ms'] for r in records):>10.1f} {sum(r['alloc_kb'] for r in records):>12.1f}")
+    return "\n".join(lines) + "\n"
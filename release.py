@@ -0,0 +1,221 @@
+# release.py — publikacja „najpierw szkic”: sloty publikacji i zbiorcza promocja
+#
+# W trybie "draft" / "future" (RELEASE_SETTINGS["mode"] albo SITES[...]["publish_mode"])
+# artykuł trafia do WP od razu, gdy jest gotowy, ale nie jako opublikowany:
+#   - "draft"  – szkic; demon (scheduler.py) promuje zaległe szkice zbiorczo
+#                (wp_batch.update_posts → jeden batch/v1 na host),
+#   - "future" – status future z date_gmt = slot; publikuje sam WordPress.
+# Slot to najbliższa chwila w oknie RELEASE_SETTINGS["hours"], co najmniej
+# min_gap_minutes po poprzedniej publikacji na tym samym hoście – generowanie
+# może iść pełną parą w nocy, a publikacje rozkładają się na cały dzień.
+#
+# Kolejka (SQLite w DATA_DIR) pamięta sloty i szkice do promocji:
+#   python release.py --list            # zaplanowane publikacje
+#   python release.py --promote         # promuj szkice, których slot minął (np. z crona)
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import DATA_DIR, RELEASE_SETTINGS
+from sites import SITES
+from topic_registry import site_host
+
+
+def publish_mode(site_config):
+    return site_config.get("publish_mode") or RELEASE_SETTINGS.get("mode", "publish")
+
+
+def _fit_window(ts, hours):
+    """Przesuwa chwilę `ts` na najbliższy moment w oknie godzin (start, end) czasu lokalnego."""
+    if not hours:
+        return ts
+    start, end = hours
+    dt = datetime.fromtimestamp(ts)
+    if start <= dt.hour < end:
+        return ts
+    candidate = dt.replace(hour=start, minute=0, second=0, microsecond=0)
+    if dt.hour >= end:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+def _gmt(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class ReleaseTicket:
+    """Zarezerwowany slot publikacji jednego artykułu (zob. ReleaseQueue.prepare)."""
+
+    def __init__(self, queue, row_id, mode, release_at):
+        self.queue = queue
+        self.row_id = row_id
+        self.mode = mode
+        self.release_at = release_at
+
+    def finish(self, wp_post):
+        """Po zapisie w WP: przypina id wpisu do slotu albo zwalnia slot, gdy zapis się nie udał."""
+        if wp_post and wp_post.get("id"):
+            self.queue._attach(self.row_id, wp_post["id"])
+        else:
+            self.queue._cancel(self.row_id)
+
+    def describe(self):
+        when = datetime.fromtimestamp(self.release_at).strftime("%Y-%m-%d %H:%M")
+        if self.mode == "future":
+            return f"zaplanowany w WordPressie na {when}"
+        return f"zapisany jako szkic, publikacja {when}"
+
+
+class ReleaseQueue:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS releases ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, host TEXT, site_key TEXT, post_id INTEGER, title TEXT,"
+                " mode TEXT, release_at REAL, state TEXT, updated REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS releases_due ON releases (state, release_at)")
+
+    # --- rezerwacja slotu ---
+    def prepare(self, site_config, post):
+        """
+        Dla trybu "draft"/"future" rezerwuje slot na hoście portalu i ustawia
+        status (oraz date_gmt dla "future") w `post`. Zwraca ReleaseTicket albo
+        None w trybie "publish" (post bez zmian).
+        """
+        mode = publish_mode(site_config)
+        if mode == "publish":
+            return None
+        if mode not in ("draft", "future"):
+            logging.warning(f"[RELEASE] Nieznany tryb publikacji '{mode}' – publikuję od razu.")
+            return None
+
+        host = site_host(site_config)
+        gap = RELEASE_SETTINGS.get("min_gap_minutes", 0) * 60
+        with self.lock, self.conn:
+            last = self.conn.execute(
+                "SELECT MAX(release_at) FROM releases WHERE host=? AND state IN ('reserved', 'pending', 'released')",
+                (host,),
+            ).fetchone()[0]
+            release_at = time.time()
+            if last:
+                release_at = max(release_at, last + gap)
+            release_at = _fit_window(release_at, RELEASE_SETTINGS.get("hours"))
+            cur = self.conn.execute(
+                "INSERT INTO releases (host, site_key, title, mode, release_at, state, updated)"
+                " VALUES (?, ?, ?, ?, ?, 'reserved', ?)",
+                (host, site_config.get("site_key"), post.get("title"), mode, release_at, time.time()),
+            )
+            row_id = cur.lastrowid
+
+        post["status"] = mode
+        if mode == "future":
+            post["date_gmt"] = _gmt(release_at)
+        return ReleaseTicket(self, row_id, mode, release_at)
+
+    def _attach(self, row_id, post_id):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE releases SET post_id=?, state='pending', updated=? WHERE id=?", (post_id, time.time(), row_id)
+            )
+
+    def _cancel(self, row_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM releases WHERE id=?", (row_id,))
+
+    # --- promocja ---
+    def due(self, now=None):
+        """Szkice (tryb "draft"), których slot minął: [(id, site_key, post_id, title)]."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, site_key, post_id, title FROM releases"
+                " WHERE state='pending' AND mode='draft' AND release_at<=? ORDER BY release_at",
+                (now or time.time(),),
+            ).fetchall()
+
+    def promote_due(self, now=None):
+        """Publikuje zbiorczo wszystkie zaległe szkice; zwraca liczbę opublikowanych."""
+        from wp_batch import update_posts
+
+        now = now or time.time()
+        with self.lock, self.conn:
+            # Rezerwacje, po których zapis do WP nigdy nie wrócił (proces przerwany
+            # w trakcie publikacji) – bez tego przesuwałyby sloty hosta w nieskończoność
+            stale = self.conn.execute(
+                "DELETE FROM releases WHERE state='reserved' AND updated<?",
+                (now - RELEASE_SETTINGS.get("reserved_ttl_minutes", 60) * 60,),
+            ).rowcount
+            if stale:
+                logging.warning(f"[RELEASE] Zwolniono {stale} porzuconych rezerwacji slotów.")
+            # Wpisy "future" publikuje sam WordPress – tu tylko zamykamy ich slot
+            self.conn.execute(
+                "UPDATE releases SET state='released', updated=? WHERE state='pending' AND mode='future' AND release_at<=?",
+                (now, now),
+            )
+        rows = [row for row in self.due(now) if row[1] in SITES]
+        if not rows:
+            return 0
+        results = update_posts([
+            {"site_config": SITES[site_key], "post_id": post_id, "fields": {"status": "publish", "date_gmt": _gmt(now)}}
+            for _, site_key, post_id, _ in rows
+        ])
+        promoted = 0
+        with self.lock, self.conn:
+            for (row_id, site_key, post_id, title), result in zip(rows, results):
+                if result:
+                    promoted += 1
+                    self.conn.execute("UPDATE releases SET state='released', updated=? WHERE id=?", (time.time(), row_id))
+                    logging.info(f"[RELEASE] Opublikowano szkic {site_key} ID={post_id} '{title}': {result.get('link')}")
+                else:
+                    # Zostaje 'pending' – kolejna próba przy następnym przebiegu
+                    logging.warning(f"[RELEASE] Promocja szkicu {site_key} ID={post_id} nieudana – ponowię.")
+        return promoted
+
+    def upcoming(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT site_key, post_id, mode, release_at, title FROM releases"
+                " WHERE state='pending' ORDER BY release_at"
+            ).fetchall()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_release_queue() -> ReleaseQueue:
+    """Współdzielona kolejka publikacji (SQLite w DATA_DIR), tworzona przy pierwszym użyciu."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _queue = ReleaseQueue(os.path.join(DATA_DIR, "releases.sqlite3"))
+    return _queue
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kolejka publikacji szkiców WordPressa.")
+    parser.add_argument("--list", action="store_true", help="Wypisz zaplanowane publikacje.")
+    parser.add_argument("--promote", action="store_true", help="Opublikuj szkice, których slot już minął.")
+    args = parser.parse_args(argv)
+
+    from generator import setup_logging
+    setup_logging()
+    queue = get_release_queue()
+    if args.promote:
+        print(f"Opublikowano {queue.promote_due()} szkiców.")
+    if args.list or not args.promote:
+        for site_key, post_id, mode, release_at, title in queue.upcoming():
+            print(f"{datetime.fromtimestamp(release_at):%Y-%m-%d %H:%M}  {site_key:<28} {mode:<6} ID={post_id}  {title or ''}")
+
+
+if __name__ == "__main__":
+    main()
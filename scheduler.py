@@ -0,0 +1,251 @@
+# scheduler.py — demon publikacji wg harmonogramu z config.SITES
+#
+# Jeden długo działający proces zamiast wielu wywołań z crona: klienci API,
+# sesja HTTP i cache taksonomii WP pozostają „ciepłe” między artykułami.
+#
+# Harmonogram portalu (config.SITES[...]["schedule"]):
+#     "schedule": [{"type": "news", "every_hours": 2}, {"type": "premium", "every_hours": 24}]
+# Opcjonalnie per wpis: "source": "AI" — źródło tematu z topic_sources.py (domyślnie EventRegistry),
+# "output": "jsonl" — ujście z sinks.py zamiast publikacji na WP (domyślnie jak w OUTPUT_SETTINGS).
+# Opcjonalnie per portal: "quiet_hours": (23, 6) — nadpisuje SCHEDULER_SETTINGS.
+#
+# Użycie:
+#   python scheduler.py                 # praca ciągła
+#   python scheduler.py --plan          # tylko wypisz plan i zakończ
+#   python scheduler.py --once          # uruchom wszystkie zadania raz (poza ciszą nocną)
+#
+# W każdym ticku demon promuje też zbiorczo szkice, których slot publikacji
+# minął (tryb "draft", zob. release.py), a raz na dobę usuwa stare artefakty
+# zadań (LOGGING_SETTINGS["artifacts_keep_days"]).
+
+import argparse
+import logging
+import random
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import SCHEDULER_SETTINGS, METRICS_SETTINGS
+import generator
+import metrics
+import post_index
+import sinks
+import tracing
+import release
+from sites import SITES, problems
+
+JOB_RUNNERS = {
+    "premium": generator.run_generation_process,
+    "news": generator.run_news_process,
+}
+
+
+# -----------------------
+# CISZA NOCNA
+# -----------------------
+def in_quiet_hours(dt, quiet_hours):
+    """Czy godzina `dt` wypada w przedziale ciszy (start, end); przedział może przechodzić przez północ."""
+    if not quiet_hours:
+        return False
+    start, end = quiet_hours
+    if start == end:
+        return False
+    if start < end:
+        return start <= dt.hour < end
+    return dt.hour >= start or dt.hour < end
+
+
+def next_allowed_time(dt, quiet_hours):
+    """Najbliższa chwila >= dt poza ciszą nocną."""
+    if not in_quiet_hours(dt, quiet_hours):
+        return dt
+    candidate = dt.replace(hour=quiet_hours[1], minute=0, second=0, microsecond=0)
+    if candidate <= dt:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+# -----------------------
+# PLAN ZADAŃ
+# -----------------------
+def _jitter(settings):
+    return timedelta(minutes=random.uniform(0, settings.get("jitter_minutes", 0)))
+
+
+def build_jobs(site_keys, settings, now=None):
+    """
+    Buduje listę zadań z config.SITES. Pierwsze uruchomienia są rozłożone równo
+    na pierwszą godzinę (+ jitter), żeby portale nie startowały jednocześnie.
+    """
+    now = now or datetime.now()
+    jobs = []
+    for site_key in site_keys:
+        site_config = SITES[site_key]
+        quiet_hours = site_config.get("quiet_hours", settings.get("quiet_hours"))
+        for entry in site_config.get("schedule") or []:
+            if entry.get("type") not in JOB_RUNNERS:
+                logging.warning(f"[SCHEDULER] Nieznany typ zadania '{entry.get('type')}' dla {site_key} — pomijam.")
+                continue
+            try:
+                sink = sinks.get_sink(site_config, entry.get("output"))
+            except ValueError as e:
+                logging.error(f"[SCHEDULER] {site_key}: {e} — pomijam zadanie.")
+                continue
+            missing = problems(site_config, entry.get("source", "Automatycznie"), wordpress=sink.online)
+            if missing:
+                logging.error(f"[SCHEDULER] {site_key}: niekompletna konfiguracja ({'; '.join(missing)}) — pomijam zadanie.")
+                continue
+            jobs.append({
+                "site_key": site_key,
+                "type": entry["type"],
+                "source": entry.get("source", "Automatycznie"),
+                "output": entry.get("output"),
+                "interval": timedelta(hours=float(entry["every_hours"])),
+                "quiet_hours": quiet_hours,
+                "next_run": now,
+                "running": False,
+                "last_result": None,
+            })
+
+    for i, job in enumerate(jobs):
+        offset = timedelta(minutes=60.0 * i / max(1, len(jobs)))
+        job["next_run"] = next_allowed_time(now + offset + _jitter(settings), job["quiet_hours"])
+    return jobs
+
+
+# -----------------------
+# DEMON
+# -----------------------
+class Scheduler:
+    """Pętla harmonogramu + pula wątków o ograniczonej współbieżności."""
+
+    def __init__(self, jobs, settings):
+        self.jobs = jobs
+        self.settings = settings
+        self.stop_event = threading.Event()
+        self.pruned_on = None  # dzień ostatnich porządków w artefaktach
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.get("max_concurrent_jobs", 1),
+            thread_name_prefix="writerpro-job",
+        )
+
+    def _run_job(self, job):
+        label = f"{job['site_key']}/{job['type']}"
+        logging.info(f"[SCHEDULER] Start zadania {label}")
+        try:
+            result = JOB_RUNNERS[job["type"]](job["site_key"], job["source"], {}, output=job["output"])
+        except Exception as e:
+            logging.exception(f"[SCHEDULER] Zadanie {label} zakończone wyjątkiem: {e}")
+            result = f"BŁĄD: {e}"
+        job["last_result"] = result
+        job["running"] = False
+        logging.info(f"[SCHEDULER] Koniec zadania {label}: {result}")
+        return result
+
+    def dispatch_due(self, now=None, force=False):
+        """Zleca zadania, których termin minął. Zwraca listę future'ów."""
+        now = now or datetime.now()
+        futures = []
+        for job in self.jobs:
+            if job["running"] or (not force and job["next_run"] > now):
+                continue
+            allowed = next_allowed_time(now, job["quiet_hours"])
+            if allowed > now:
+                job["next_run"] = allowed + _jitter(self.settings)
+                logging.info(f"[SCHEDULER] Cisza nocna — {job['site_key']}/{job['type']} przesunięte na {job['next_run']:%Y-%m-%d %H:%M}")
+                continue
+
+            job["running"] = True
+            job["next_run"] += job["interval"]
+            if job["next_run"] <= now:
+                job["next_run"] = now + job["interval"]
+            futures.append(self.executor.submit(self._run_job, job))
+        return futures
+
+    def run_forever(self):
+        tick = self.settings.get("tick_seconds", 30)
+        logging.info(f"[SCHEDULER] Demon wystartował: {len(self.jobs)} zadań, tick={tick}s")
+        while not self.stop_event.is_set():
+            self.dispatch_due()
+            self.promote_releases()
+            self.prune_artifacts()
+            self.stop_event.wait(tick)
+        logging.info("[SCHEDULER] Zatrzymywanie — czekam na trwające zadania...")
+        self.executor.shutdown(wait=True)
+
+    def promote_releases(self):
+        """Zbiorcza promocja zaległych szkiców (poza pulą zadań – to kilka zapytań batch)."""
+        try:
+            release.get_release_queue().promote_due()
+        except Exception as e:
+            logging.exception(f"[SCHEDULER] Promocja szkiców nie powiodła się: {e}")
+
+    def prune_artifacts(self):
+        """Raz na dobę: usuwa katalogi artefaktów starsze niż artifacts_keep_days."""
+        today = datetime.now().date()
+        if self.pruned_on == today:
+            return
+        self.pruned_on = today
+        try:
+            tracing.prune_artifacts()
+        except Exception as e:
+            logging.exception(f"[SCHEDULER] Porządki w artefaktach nie powiodły się: {e}")
+
+    def run_once(self):
+        futures = self.dispatch_due(force=True)
+        for f in futures:
+            f.result()
+        self.executor.shutdown(wait=True)
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+
+def print_plan(jobs):
+    for job in sorted(jobs, key=lambda j: j["next_run"]):
+        hours = job["interval"].total_seconds() / 3600
+        print(f"{job['next_run']:%Y-%m-%d %H:%M}  {job['site_key']:<28} {job['type']:<8} co {hours:g} h")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Demon publikacji wg harmonogramu z config.SITES.")
+    parser.add_argument("--sites", type=str, help="Lista portali oddzielona przecinkami (domyślnie: wszystkie z 'schedule').")
+    parser.add_argument("--plan", action="store_true", help="Wypisz plan uruchomień i zakończ.")
+    parser.add_argument("--once", action="store_true", help="Uruchom każde zadanie jeden raz i zakończ.")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_SETTINGS["port"],
+                        help="Port endpointu Prometheus /metrics (0 = wyłączony).")
+    args = parser.parse_args(argv)
+
+    generator.setup_logging()
+    site_keys = [s.strip() for s in args.sites.split(",")] if args.sites else list(SITES)
+    unknown = [s for s in site_keys if s not in SITES]
+    if unknown:
+        parser.error(f"Nieznane portale: {', '.join(unknown)}")
+
+    jobs = build_jobs(site_keys, SCHEDULER_SETTINGS)
+    if not jobs:
+        logging.warning("[SCHEDULER] Brak zadań — żaden z portali nie ma klucza 'schedule'.")
+        return
+    if args.plan:
+        print_plan(jobs)
+        return
+
+    # Pełne zasilenie indeksu duplikatów w tle, zanim przyjdą pierwsze zadania
+    post_index.warm_up(sorted({job["site_key"] for job in jobs}))
+
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+        logging.info(f"[SCHEDULER] Metryki: http://127.0.0.1:{args.metrics_port}/metrics")
+
+    scheduler = Scheduler(jobs, SCHEDULER_SETTINGS)
+    if args.once:
+        scheduler.run_once()
+        return
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# seo_gate.py — lokalna kontrola reguł SEO z promptów, zamiast ponownego generowania
+#
+# Prompty premium/news stawiają twarde wymagania: tytuł maks. 70 znaków,
+# polska kapitalizacja (tylko pierwsze słowo i nazwy własne wielką literą),
+# box „Najważniejsze informacje” z <ul>, tabela z danymi, zakaz przypisów,
+# lista dozwolonych tagów. review() sprawdza je w jednym przejściu po drzewie
+# z finalize_article_html i:
+#   - poprawia lokalnie to, co da się poprawić deterministycznie: Title Case
+#     w tytule i nagłówkach (nazwy własne rozpoznawane z treści artykułu),
+#     zbyt długi tytuł (cięcie na granicy słowa), niedozwolone tagi
+#     (zamiana, rozpakowanie albo usunięcie), luźną listę <ul> na początku
+#     zamiast boxu,
+#   - o resztę prosi LLM wąsko, tylko dla brakującego fragmentu: punkty boxu
+#     z treści (trasa "classify", structured.complete_json) albo przepisanie
+#     jednej sekcji – tej z największą liczbą danych – z tabelą (trasa "write").
+# Przypisy numeryczne usuwa dalej strip_numeric_citations, tu są tylko liczone.
+# Ocena 0–100 i lista problemów trafiają do artefaktu "seo" zadania, każdy
+# problem – do metryki writerpro_seo_issues_total{rule, outcome}.
+
+import json
+import logging
+import re
+import textwrap
+from html import escape
+
+import metrics
+from config import SEO_SETTINGS
+from tracing import save_artifact, traced_stage
+
+SEO_ISSUES = metrics.Counter(
+    "writerpro_seo_issues_total", "Naruszenia reguł SEO w artykułach wg reguły i wyniku.", ("rule", "outcome")
+)
+
+_SETTINGS_DEFAULTS = {"enabled": True, "llm_fixes": True, "title_max_chars": 70, "require_table": True, "table_min_numbers": 4}
+
+_ALLOWED_TAGS = {
+    "premium": {"h2", "h3", "p", "ul", "li", "a", "strong", "blockquote", "footer", "cite",
+                "table", "thead", "tbody", "tr", "th", "td", "div", "script"},
+    "news": {"h2", "h3", "p", "ul", "li", "a", "strong", "blockquote"},
+}
+_RENAMED_TAGS = {"h1": "h3", "h4": "h3", "h5": "h3", "h6": "h3", "b": "strong", "ol": "ul"}
+_DROPPED_TAGS = {"style", "iframe", "object", "embed", "form", "input", "button", "img", "svg", "noscript"}
+_PENALTIES = {"title_length": 10, "title_case": 10, "heading_case": 5, "tags": 5, "footnotes": 10, "box": 20, "table": 15}
+
+_BOX_HTML = (
+    '<div style="background-color: #f0f8ff; border-left: 5px solid #000000; padding: 15px; margin-bottom: 20px;">'
+    '<h3 style="margin-top: 0;">Najważniejsze informacje:</h3><ul>{items}</ul></div>'
+)
+KEY_POINTS_SCHEMA = {
+    "type": "object",
+    "properties": {"points": {"type": "array", "items": {"type": "string"}}},
+    "required": ["points"],
+    "additionalProperties": False,
+}
+
+_FOOTNOTE_RE = re.compile(r"\[\^?\d+(?:\s*[,–-]\s*\d+)*\]|<sup>\s*\d+\s*</sup>", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+_WORD_RE = re.compile(r"[A-Za-zĄĆĘŁŃÓŚŹŻąćęłńóśźż0-9-]+")
+_DANGLING = {"i", "a", "w", "we", "z", "ze", "na", "do", "o", "od", "po", "za", "oraz", "lub", "albo", "dla",
+             "przy", "pod", "nad", "u", "że", "czy", "jak", "to", "nie"}
+
+
+def _setting(name):
+    return SEO_SETTINGS.get(name, _SETTINGS_DEFAULTS[name])
+
+
+def _soupify(html):
+    """Pierwszy tag z fragmentu HTML."""
+    from wp_http import soup
+    return soup(html).find(True)
+
+
+def _text(nodes):
+    return " ".join(n.get_text(" ") if hasattr(n, "get_text") else str(n) for n in nodes)
+
+
+# -----------------------
+# REGUŁY LOKALNE
+# -----------------------
+def proper_names(soup):
+    """Słowa pisane w treści wielką literą w środku zdania (nazwy własne), małymi literami."""
+    names = set()
+    for tag in soup.find_all(["p", "li", "td"]):
+        for sentence in re.split(r"(?<=[.!?])\s+", tag.get_text(" ")):
+            for word in _WORD_RE.findall(sentence)[1:]:
+                if word[:1].isupper():
+                    names.add(word.lower())
+    return names
+
+
+def sentence_case(text, names):
+    """
+    „Ceny Mieszkań W Katowicach Rosną” → „Ceny mieszkań w Katowicach rosną”.
+    Zmienia tylko tekst wyglądający na Title Case; skróty (NBP), nazwy
+    własne z `names` i słowa po końcu zdania zostają bez zmian.
+    """
+    words = text.split(" ")
+    capitalized, candidates = [], 0
+    for i, word in enumerate(words[1:], 1):
+        core = "".join(_WORD_RE.findall(word))
+        if not core or core.lower() in names or (len(core) > 1 and core.isupper()) or core[0].isdigit():
+            continue
+        if words[i - 1].rstrip("„”\"')").endswith((".", "!", "?")):
+            continue
+        if len(core) >= 3:
+            candidates += 1
+        if core[0].isupper():
+            capitalized.append(i)
+    long_capitalized = sum(1 for i in capitalized if len("".join(_WORD_RE.findall(words[i]))) >= 3)
+    if long_capitalized < 2 or long_capitalized < 0.6 * candidates:
+        return text
+    for i in capitalized:
+        word = words[i]
+        at = next(j for j, ch in enumerate(word) if ch.isalpha())
+        words[i] = word[:at] + word[at].lower() + word[at + 1:]
+    return " ".join(words)
+
+
+def shorten_title(title, limit):
+    """Tytuł skrócony do `limit` znaków na granicy słowa, bez wiszących spójników i przyimków."""
+    if len(title) <= limit:
+        return title
+    words = title[:limit + 1].rsplit(" ", 1)[0].split()
+    while len(words) > 1 and (words[-1].lower().strip(",;:") in _DANGLING or not _WORD_RE.search(words[-1])):
+        words.pop()
+    return " ".join(words).rstrip(" ,;:–-")
+
+
+def _clean_tags(soup, kind):
+    """Niedozwolone tagi: zamiana (h4 → h3, b → strong), usunięcie z treścią albo rozpakowanie. Zwraca liczbę zmian."""
+    allowed = _ALLOWED_TAGS.get(kind, _ALLOWED_TAGS["premium"])
+    changed = 0
+    for tag in soup.find_all(True):
+        if tag.parent is None:  # już usunięty razem z rodzicem
+            continue
+        name = tag.name
+        if name == "script" and "script" in allowed and tag.get("type") == "application/ld+json":
+            continue
+        if name in allowed:
+            continue
+        changed += 1
+        if name in _RENAMED_TAGS and _RENAMED_TAGS[name] in allowed:
+            tag.name = _RENAMED_TAGS[name]
+            tag.attrs = {}
+        elif name in _DROPPED_TAGS or name == "script":
+            tag.decompose()
+        elif name == "br":
+            tag.replace_with(" ")
+        else:
+            tag.unwrap()
+    return changed
+
+
+def _sections(soup, title_tag):
+    """[(nagłówek albo None, [węzły])] – bloki najwyższego poziomu od <h2>/<h3> do kolejnego."""
+    sections, current = [], (None, [])
+    for node in list(soup.children):
+        if node is title_tag:
+            continue
+        if getattr(node, "name", None) in ("h2", "h3"):
+            sections.append(current)
+            current = (node, [])
+        else:
+            current[1].append(node)
+    sections.append(current)
+    return [s for s in sections if s[0] is not None or any(str(n).strip() for n in s[1])]
+
+
+def _find_box(soup):
+    for div in soup.find_all("div"):
+        if div.find("ul"):
+            return div
+    return None
+
+
+# -----------------------
+# POPRAWKI PRZEZ LLM (TYLKO BRAKUJĄCY FRAGMENT)
+# -----------------------
+def _llm_box_points(soup, site_config):
+    import structured
+
+    text = re.sub(r"\s+", " ", soup.get_text(" "))[:6000]
+    prompt = textwrap.dedent(f"""
+        Na podstawie artykułu wypisz 3–5 najważniejszych informacji dla czytelnika – konkretnych,
+        z liczbami, jeśli są w tekście, każda w jednym zdaniu. Nie dodawaj faktów spoza artykułu.
+        Zwróć JSON: {{"points": ["...", "..."]}}.
+
+        ARTYKUŁ:
+        {text}
+    """)
+    result = structured.complete_json(
+        "key_points", "classify", prompt, schema=KEY_POINTS_SCHEMA, site_config=site_config, temperature=0.2, max_tokens=400
+    )
+    return [p.strip() for p in (result or {}).get("points", []) if p and p.strip()][:5]
+
+
+def _llm_table_section(heading, nodes, site_config):
+    import llm
+    from wp_http import soup
+
+    body = "".join(str(n) for n in nodes)
+    prompt = textwrap.dedent(f"""
+        DODAJ TABELĘ DO SEKCJI artykułu "{heading}". Zestaw dane liczbowe z tej sekcji w czytelnej
+        tabeli <table> (z wierszem nagłówków <th>) i wstaw ją w odpowiednim miejscu. Resztę tekstu
+        zostaw bez zmian, nie dodawaj nowych faktów ani liczb spoza sekcji.
+        Dozwolone tagi: <p>, <ul>, <li>, <a>, <strong>, <blockquote>, <table>, <tr>, <th>, <td>.
+        Zwróć wyłącznie HTML treści sekcji, bez jej nagłówka.
+
+        SEKCJA:
+        {body}
+    """)
+    response = llm.complete("write", prompt, site_config=site_config, temperature=0.2)
+    if not response:
+        return None
+    fixed = soup(response)
+    for tag in fixed.find_all(["h2", "h3"]):
+        tag.decompose()
+    # Odpowiedź bez tabeli albo wyraźnie krótsza od sekcji (model coś pominął) – zostaje oryginał
+    if not fixed.find("table") or len(fixed.get_text(" ")) < 0.6 * len(_text(nodes)):
+        fixed.decompose()
+        return None
+    return fixed
+
+
+def _fix_box(soup, site_config):
+    """Box „Najważniejsze informacje”: luźna <ul> z początku artykułu albo punkty od LLM. Zwraca (wynik, opis)."""
+    loose = next((n for n in list(soup.children)[:8] if getattr(n, "name", None) == "ul"), None)
+    if loose is not None:
+        box = _soupify(_BOX_HTML.format(items=""))
+        loose.replace_with(box)
+        box.find("ul").replace_with(loose)
+        return "fixed", "lista <ul> na początku opakowana w box"
+    points = _llm_box_points(soup, site_config) if site_config is not None else []
+    if not points:
+        return "remaining", "brak boxu z listą <ul>"
+    box = _soupify(_BOX_HTML.format(items="".join(f"<li>{escape(p)}</li>" for p in points)))
+    intro = next((n for n in soup.children if getattr(n, "name", None) == "p"), None)
+    if intro is not None:
+        intro.insert_after(box)
+    else:
+        soup.insert(0, box)
+    return "llm_fixed", f"{len(points)} punktów z treści"
+
+
+def _fix_table(soup, title_tag, site_config):
+    """
+    Tabela w sekcji z największą liczbą danych (przepisanej przez LLM). None, gdy
+    danych jest za mało – prompt wymaga tabeli tylko, „jeśli temat pozwala”.
+    """
+    scored = [
+        (len(_NUMBER_RE.findall(_text(nodes))), head, nodes)
+        for head, nodes in _sections(soup, title_tag) if head is not None and nodes
+    ]
+    count, head, nodes = max(scored, key=lambda s: s[0], default=(0, None, None))
+    if count < _setting("table_min_numbers"):
+        return None
+    heading = head.get_text(" ", strip=True)
+    fixed = _llm_table_section(heading, nodes, site_config) if site_config is not None else None
+    if fixed is None:
+        return "remaining", f"brak tabeli ({count} liczb w sekcji '{heading}')"
+    for node in list(fixed.contents):
+        nodes[0].insert_before(node)
+    for node in nodes:
+        node.extract()
+    return "llm_fixed", f"sekcja '{heading}' przepisana z tabelą"
+
+
+# -----------------------
+# OCENA I POPRAWKI
+# -----------------------
+@traced_stage("seo")
+def review(soup, title, kind="premium", site_config=None, title_tag=None):
+    """
+    Sprawdza i poprawia artykuł w miejscu (`soup`); `title_tag` – <h2> z
+    tytułem, pomijany przy sekcjach. Zwraca (tytuł po poprawkach, raport:
+    {"score", "issues": [{"rule", "outcome", "detail"}]}).
+    """
+    if not _setting("enabled"):
+        return title, {"score": None, "issues": []}
+    issues = []
+
+    def issue(rule, outcome, detail):
+        issues.append({"rule": rule, "outcome": outcome, "detail": detail})
+        SEO_ISSUES.inc(rule=rule, outcome=outcome)
+
+    llm_fixes = _setting("llm_fixes") and site_config is not None
+
+    # Tagi – najpierw, żeby sekcje i box liczyć na docelowej strukturze
+    changed = _clean_tags(soup, kind)
+    if changed:
+        issue("tags", "fixed", f"{changed} niedozwolonych tagów")
+
+    # Tytuł i nagłówki
+    names = proper_names(soup)
+    fixed_title = sentence_case(title, names)
+    if fixed_title != title:
+        issue("title_case", "fixed", f"'{title}' → '{fixed_title}'")
+        title = fixed_title
+    limit = _setting("title_max_chars")
+    if len(title) > limit:
+        short = shorten_title(title, limit)
+        issue("title_length", "fixed", f"{len(title)} → {len(short)} znaków")
+        title = short
+    for heading in soup.find_all(["h2", "h3"]):
+        if heading is title_tag or heading.find_parent("div") is not None:
+            continue
+        text = heading.get_text(" ", strip=True)
+        fixed = sentence_case(text, names)
+        if fixed != text:
+            heading.string = fixed
+            issue("heading_case", "fixed", f"'{text}' → '{fixed}'")
+
+    footnotes = len(_FOOTNOTE_RE.findall(str(soup)))
+    if footnotes:
+        issue("footnotes", "fixed", f"{footnotes} przypisów numerycznych (usuwa strip_numeric_citations)")
+
+    if kind == "premium":
+        if _find_box(soup) is None:
+            issue("box", *_fix_box(soup, site_config if llm_fixes else None))
+        if _setting("require_table") and soup.find("table") is None:
+            result = _fix_table(soup, title_tag, site_config if llm_fixes else None)
+            if result:
+                issue("table", *result)
+
+    score = max(0, 100 - sum(_PENALTIES[i["rule"]] for i in issues if i["outcome"] == "remaining")
+                - sum(_PENALTIES[i["rule"]] // 2 for i in issues if i["outcome"] != "remaining"))
+    report = {"score": score, "title": title, "issues": issues}
+    remaining = [i["rule"] for i in issues if i["outcome"] == "remaining"]
+    logging.info(f"[SEO] Ocena {score}/100, poprawki: {len(issues) - len(remaining)}"
+                 + (f", nierozwiązane: {', '.join(remaining)}" if remaining else ""))
+    save_artifact("seo", json.dumps(report, ensure_ascii=False, indent=2), ext="json")
+    return title, report
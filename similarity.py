@@ -0,0 +1,257 @@
+# similarity.py — MinHash + LSH do szybkiego wykrywania prawie-duplikatów
+#
+# Tylko biblioteka standardowa. Indeks trzymany w SQLite: sygnatury MinHash
+# oraz tabela „pasm” LSH z indeksem, więc zapytanie to BANDS lookupów
+# po indeksie niezależnie od tego, czy w bazie jest 100 czy 50 000 dokumentów.
+
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Iterable, List, Optional
+
+# Szansa, że para o podobieństwie J trafi do kandydatów: 1 - (1 - J^ROWS)^BANDS.
+# Próg dzielenia ok. (1/BANDS)^(1/ROWS) ≈ 0.18 leży poniżej progów z config.py
+# (0.5 i 0.6): czułość 99.99% przy J=0.5 i ~100% przy J=0.6 (16×4 dawało
+# 64% i 89%). Kosztem jest więcej kandydatów (J=0.3: 95%, J=0.05: 8%), ale
+# każdego i tak weryfikuje estimate_jaccard.
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_MAX_HASH = (1 << 32) - 1
+_SIG_BYTES = NUM_PERM * 4
+_BAND_LAYOUT = BANDS * 1000 + ROWS  # PRAGMA user_version indeksu: układ pasm, z którym zbudowano tabelę bands
+
+_WORD_RE = re.compile(r"[a-ząćęłńóśźż0-9]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+# -----------------------
+# SHINGLE / SYGNATURY
+# -----------------------
+def normalize_words(text: str) -> List[str]:
+    """Małe litery, bez tagów HTML, encji i interpunkcji."""
+    return _WORD_RE.findall(html.unescape(_TAG_RE.sub(" ", text or "")).lower())
+
+
+def word_shingles(text: str, k: int = 3) -> set:
+    """Zbiór k-gramów słownych (dobre dla dłuższych tekstów)."""
+    words = normalize_words(text)
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def char_shingles(text: str, k: int = 5) -> set:
+    """Zbiór k-gramów znakowych (odporne na polską fleksję, dobre dla krótkich tekstów)."""
+    joined = " ".join(normalize_words(text))
+    if len(joined) <= k:
+        return {joined} if joined else set()
+    return {joined[i:i + k] for i in range(len(joined) - k + 1)}
+
+
+def _shingle_hashes(shingle: str) -> array:
+    """NUM_PERM niezależnych 32-bitowych hashy jednego shingla (jedno wywołanie SHAKE-128)."""
+    row = array("I", hashlib.shake_128(shingle.encode("utf-8")).digest(_SIG_BYTES))
+    if sys.byteorder == "big":
+        row.byteswap()
+    return row
+
+
+def minhash(shingles: Iterable[str]) -> List[int]:
+    """Sygnatura MinHash (NUM_PERM wartości) dla zbioru shingli."""
+    rows = [_shingle_hashes(s) for s in shingles]
+    if not rows:
+        return [_MAX_HASH] * NUM_PERM
+    # minimum kolumnami: i-ta kolumna to i-ta funkcja haszująca
+    return list(map(min, zip(*rows)))
+
+
+def estimate_jaccard(sig_a: List[int], sig_b: List[int]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / float(NUM_PERM)
+
+
+def lsh_band_hashes(signature: List[int]) -> List[int]:
+    """Hash każdego pasma (ROWS wartości) jako 64-bitowa liczba ze znakiem (INTEGER w SQLite)."""
+    result = []
+    for band in range(BANDS):
+        chunk = struct.pack(f">{ROWS}I", *signature[band * ROWS:(band + 1) * ROWS])
+        result.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True))
+    return result
+
+
+# -----------------------
+# INDEKS W SQLITE
+# -----------------------
+class MinHashIndex:
+    """
+    Trwały indeks LSH podzielony na przestrzenie nazw (np. host WordPressa).
+    Oprócz podobieństwa obsługuje dokładne klucze (URI wydarzenia, URL źródła).
+    Bezpieczny dla wielu wątków jednego procesu.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS items (
+                namespace TEXT NOT NULL,
+                item_id   TEXT NOT NULL,
+                created   REAL NOT NULL,
+                signature BLOB NOT NULL,
+                meta      TEXT,
+                expires   REAL,
+                PRIMARY KEY (namespace, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                namespace TEXT NOT NULL,
+                band      INTEGER NOT NULL,
+                hash      INTEGER NOT NULL,
+                item_id   TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (namespace, band, hash);
+            CREATE INDEX IF NOT EXISTS bands_item ON bands (namespace, item_id);
+            CREATE TABLE IF NOT EXISTS item_keys (
+                namespace TEXT NOT NULL,
+                key       TEXT NOT NULL,
+                item_id   TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(items)")}
+        if "expires" not in columns:  # baza sprzed rezerwacji tymczasowych
+            self.conn.execute("ALTER TABLE items ADD COLUMN expires REAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != _BAND_LAYOUT:
+            self._rebuild_bands()
+
+    def _rebuild_bands(self):
+        """Pasma z zapisanych sygnatur – po zmianie BANDS/ROWS stare hashe pasm nic by nie znajdowały."""
+        with self.conn:
+            self.conn.execute("DELETE FROM bands")
+            for namespace, item_id, signature in self.conn.execute(
+                "SELECT namespace, item_id, signature FROM items"
+            ).fetchall():
+                self.conn.executemany(
+                    "INSERT INTO bands (namespace, band, hash, item_id) VALUES (?, ?, ?, ?)",
+                    [(namespace, band, h, item_id)
+                     for band, h in enumerate(lsh_band_hashes(array("I", signature).tolist()))],
+                )
+            self.conn.execute(f"PRAGMA user_version={_BAND_LAYOUT}")
+
+    def add(self, namespace: str, item_id: str, signature: List[int], keys: Iterable[str] = (), meta: Optional[dict] = None):
+        with self.lock, self.conn:
+            self._add_locked(namespace, item_id, signature, keys, meta)
+
+    def _add_locked(self, namespace, item_id, signature, keys, meta, expires=None):
+        self.conn.execute("DELETE FROM bands WHERE namespace=? AND item_id=?", (namespace, item_id))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO items (namespace, item_id, created, signature, meta, expires) VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, item_id, time.time(), array("I", signature).tobytes(),
+             json.dumps(meta or {}, ensure_ascii=False), expires),
+        )
+        self.conn.executemany(
+            "INSERT INTO bands (namespace, band, hash, item_id) VALUES (?, ?, ?, ?)",
+            [(namespace, band, h, item_id) for band, h in enumerate(lsh_band_hashes(signature))],
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO item_keys (namespace, key, item_id) VALUES (?, ?, ?)",
+            [(namespace, k, item_id) for k in keys if k],
+        )
+
+    def find_by_key(self, namespace: str, keys: Iterable[str], since: float = 0.0) -> Optional[dict]:
+        with self.lock:
+            return self._find_by_key_locked(namespace, keys, since)
+
+    def _find_by_key_locked(self, namespace, keys, since):
+        for key in keys:
+            if not key:
+                continue
+            row = self.conn.execute(
+                "SELECT i.item_id, i.meta FROM item_keys k JOIN items i "
+                "ON i.namespace = k.namespace AND i.item_id = k.item_id "
+                "WHERE k.namespace=? AND k.key=? AND i.created >= ? AND (i.expires IS NULL OR i.expires >= ?)",
+                (namespace, key, since, time.time()),
+            ).fetchone()
+            if row:
+                return {"item_id": row[0], "score": 1.0, "meta": json.loads(row[1] or "{}"), "matched_key": key}
+        return None
+
+    def query(self, namespace: str, signature: List[int], threshold: float, since: float = 0.0, limit: int = 5) -> List[dict]:
+        with self.lock:
+            return self._query_locked(namespace, signature, threshold, since, limit)
+
+    def _query_locked(self, namespace, signature, threshold, since, limit):
+        candidates = set()
+        for band, h in enumerate(lsh_band_hashes(signature)):
+            for (item_id,) in self.conn.execute(
+                "SELECT item_id FROM bands WHERE namespace=? AND band=? AND hash=?", (namespace, band, h)
+            ):
+                candidates.add(item_id)
+        matches = []
+        now = time.time()
+        for item_id in candidates:
+            row = self.conn.execute(
+                "SELECT signature, meta, created, expires FROM items WHERE namespace=? AND item_id=?", (namespace, item_id)
+            ).fetchone()
+            if not row or row[2] < since or (row[3] is not None and row[3] < now):
+                continue
+            score = estimate_jaccard(signature, array("I", row[0]).tolist())
+            if score >= threshold:
+                matches.append({"item_id": item_id, "score": score, "meta": json.loads(row[1] or "{}")})
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return matches[:limit]
+
+    def claim(self, namespace: str, item_id: str, signature: List[int], keys: Iterable[str], threshold: float,
+              since: float = 0.0, meta: Optional[dict] = None, ttl: Optional[float] = None) -> Optional[dict]:
+        """
+        Atomowo: jeśli istnieje duplikat (klucz lub podobieństwo >= threshold) – zwraca go,
+        w przeciwnym razie dodaje element i zwraca None. Z `ttl` (sekundy) element jest
+        rezerwacją tymczasową: po tym czasie przestaje blokować, chyba że wcześniej
+        zostanie potwierdzony (confirm) albo zwolniony (remove).
+        """
+        keys = list(keys)
+        with self.lock:
+            dup = self._find_by_key_locked(namespace, keys, since)
+            if not dup:
+                found = self._query_locked(namespace, signature, threshold, since, 1)
+                dup = found[0] if found else None
+            if dup:
+                return dup
+            with self.conn:
+                self._add_locked(namespace, item_id, signature, keys, meta,
+                                 time.time() + ttl if ttl is not None else None)
+            return None
+
+    def confirm(self, namespace: str, item_id: str) -> bool:
+        """Zamienia tymczasową rezerwację w trwały element. False = brak rezerwacji."""
+        with self.lock, self.conn:
+            cur = self.conn.execute(
+                "UPDATE items SET expires=NULL WHERE namespace=? AND item_id=? AND expires IS NOT NULL",
+                (namespace, item_id),
+            )
+            return cur.rowcount > 0
+
+    def remove(self, namespace: str, item_id: str, pending_only: bool = False) -> bool:
+        """Usuwa element (z `pending_only` – tylko niepotwierdzoną rezerwację)."""
+        with self.lock, self.conn:
+            cond = " AND expires IS NOT NULL" if pending_only else ""
+            cur = self.conn.execute(f"DELETE FROM items WHERE namespace=? AND item_id=?{cond}", (namespace, item_id))
+            if not cur.rowcount:
+                return False
+            self.conn.execute("DELETE FROM bands WHERE namespace=? AND item_id=?", (namespace, item_id))
+            self.conn.execute("DELETE FROM item_keys WHERE namespace=? AND item_id=?", (namespace, item_id))
+            return True
+
+    def count(self, namespace: str) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM items WHERE namespace=?", (namespace,)).fetchone()[0]
@@ -0,0 +1,240 @@
+# sinks.py — dokąd trafia gotowy artykuł: WordPress albo pliki lokalne
+#
+# Koniec pipeline'u (run_generation_process / run_news_process) oddaje artykuł
+# do „ujścia” wybranego nazwą (CLI --output, SITES[...]["output"],
+# OUTPUT_SETTINGS["sink"]):
+#   "wordpress" – upload obrazka + publikacja przez wp_batch (dotychczasowe zachowanie),
+#   "directory" – <dir>/<portal>/<data>/<slug>.html + <slug>.json (metadane),
+#   "jsonl"     – jedna linia na artykuł w <dir>/<portal>.jsonl (do bulk importu),
+#   "wxr"       – <dir>/<portal>.wxr.xml w formacie eksportu WordPressa
+#                 (Narzędzia → Import → WordPress).
+# Ujścia plikowe nie łączą się z WordPressem. Kategorię AI wybiera z nazw znanych
+# lokalnie (SITES[...]["categories"] albo ostatni odczyt z WP). Obrazek zostaje
+# jako URL, a plik wgrany w app.py ląduje obok artykułu. Tagi i kategoria są
+# zapisane nazwami – id nadaje WordPress przy imporcie.
+#
+# Nowe ujście: klasa z `name` i publish(), zarejestrowana w SINKS.
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from html import escape
+from typing import Optional
+
+import tracing
+from config import OUTPUT_SETTINGS
+from tracing import traced_stage
+
+_EXTENSIONS = {"image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+
+def slugify(text, max_length=80):
+    """Slug jak w WordPressie (bez polskich znaków): „Łódź: nowe linie” → „lodz-nowe-linie”."""
+    text = (text or "").replace("ł", "l").replace("Ł", "L")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")[:max_length].rstrip("-") or "artykul"
+
+
+class Sink:
+    """Ujście artykułu: publish() zwraca (wynik z "link" albo None, ReleaseTicket albo None)."""
+
+    name = ""
+    online = False  # True – ujście zapisuje do WP (kategorie z WP, upload obrazka, indeks duplikatów)
+
+    def publish(self, site_config, article):
+        raise NotImplementedError
+
+
+class WordPressSink(Sink):
+    name = "wordpress"
+    online = True
+
+    def publish(self, site_config, article):
+        from generator import publish_article, upload_image_to_wp
+
+        featured_media_id = upload_image_to_wp(article["image"], article["title"], site_config)
+        data_to_publish = {
+            "title": article["title"],
+            "content": article["content"],
+            "status": "publish",
+            "categories": [article["category_id"]] if article.get("category_id") else [],
+        }
+        if featured_media_id:
+            data_to_publish["featured_media"] = featured_media_id
+        return publish_article(site_config, data_to_publish, article["tags"])
+
+
+class _FileSink(Sink):
+    """Wspólne dla ujść plikowych: katalog, metadane, obrazek, blokady plików."""
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def root():
+        return OUTPUT_SETTINGS.get("dir", "output")
+
+    def lock(self, path):
+        with self._locks_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def image_ref(image, directory, slug):
+        """URL obrazka bez zmian; plik wgrany w app.py zapisany obok artykułu (zwraca ścieżkę względną)."""
+        if not image or isinstance(image, str):
+            return image
+        ext = _EXTENSIONS.get(getattr(image, "type", None) or "", ".jpg")
+        name = f"{slug}{ext}"
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(image.getvalue())
+        return name
+
+    def record(self, site_config, article, image):
+        topic = article.get("topic") or {}
+        return {
+            "site_key": site_config["site_key"],
+            "kind": article["kind"],
+            "title": article["title"],
+            "slug": article["slug"],
+            "category": article.get("category"),
+            "tags": list(article.get("tags") or []),
+            "image": image,
+            "topic": {k: topic.get(k) for k in ("title", "url", "source_name")},
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "job_id": tracing.current_job().get("job_id"),
+        }
+
+
+class DirectorySink(_FileSink):
+    name = "directory"
+
+    @traced_stage("export")
+    def publish(self, site_config, article):
+        directory = os.path.join(self.root(), site_config["site_key"], datetime.now().strftime("%Y-%m-%d"))
+        os.makedirs(directory, exist_ok=True)
+        with self.lock(directory):
+            slug, n = article["slug"], 2
+            while os.path.exists(os.path.join(directory, f"{slug}.html")):
+                slug, n = f"{article['slug']}-{n}", n + 1
+            html_path = os.path.join(directory, f"{slug}.html")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(article["content"])
+        meta = self.record(site_config, dict(article, slug=slug), self.image_ref(article["image"], directory, slug))
+        meta["content_file"] = f"{slug}.html"
+        with open(os.path.join(directory, f"{slug}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return {"link": os.path.abspath(html_path), "saved": True}, None
+
+
+class JsonlSink(_FileSink):
+    name = "jsonl"
+
+    @traced_stage("export")
+    def publish(self, site_config, article):
+        os.makedirs(self.root(), exist_ok=True)
+        path = os.path.join(self.root(), f"{site_config['site_key']}.jsonl")
+        media_dir = os.path.join(self.root(), "media")
+        line = self.record(site_config, article, self.image_ref(article["image"], media_dir, article["slug"]))
+        line["content"] = article["content"]
+        with self.lock(path), open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return {"link": os.path.abspath(path), "saved": True}, None
+
+
+def _cdata(text):
+    return "<![CDATA[" + (text or "").replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+_WXR_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:excerpt="http://wordpress.org/export/1.2/excerpt/"
+  xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:dc="http://purl.org/dc/elements/1.1/"
+  xmlns:wp="http://wordpress.org/export/1.2/">
+<channel>
+  <title>{title}</title>
+  <link>{link}</link>
+  <language>pl-PL</language>
+  <wp:wxr_version>1.2</wp:wxr_version>
+"""
+_WXR_FOOTER = "</channel>\n</rss>\n"
+
+
+class WxrSink(_FileSink):
+    """Plik WXR dopisywany w miejscu: nowy <item> trafia przed zamykające </channel></rss>."""
+
+    name = "wxr"
+
+    def __init__(self):
+        super().__init__()
+        self._next_id = int(datetime.now().timestamp()) % 10 ** 8 * 10
+
+    def _item(self, site_config, article, image):
+        with self._locks_lock:
+            self._next_id += 2
+            post_id = self._next_id
+        now = datetime.now()
+        terms = [("category", article["category"])] if article.get("category") else []
+        terms += [("post_tag", tag) for tag in article.get("tags") or []]
+        lines = [
+            "  <item>",
+            f"    <title>{_cdata(article['title'])}</title>",
+            f"    <content:encoded>{_cdata(article['content'])}</content:encoded>",
+            f"    <excerpt:encoded>{_cdata('')}</excerpt:encoded>",
+            f"    <wp:post_id>{post_id}</wp:post_id>",
+            f"    <wp:post_date>{now:%Y-%m-%d %H:%M:%S}</wp:post_date>",
+            f"    <wp:post_name>{_cdata(article['slug'])}</wp:post_name>",
+            "    <wp:status>publish</wp:status>",
+            "    <wp:post_type>post</wp:post_type>",
+        ]
+        lines += [f'    <category domain="{domain}" nicename="{slugify(name)}">{_cdata(name)}</category>' for domain, name in terms]
+        if isinstance(image, str) and image.startswith("http"):
+            # Obrazek wyróżniony: załącznik pobierany przez importer („Pobierz i zaimportuj załączniki”)
+            lines += [
+                "    <wp:postmeta><wp:meta_key>_thumbnail_id</wp:meta_key>"
+                f"<wp:meta_value>{post_id + 1}</wp:meta_value></wp:postmeta>",
+                "  </item>",
+                "  <item>",
+                f"    <title>{_cdata(article['title'])}</title>",
+                f"    <wp:post_id>{post_id + 1}</wp:post_id>",
+                f"    <wp:post_parent>{post_id}</wp:post_parent>",
+                "    <wp:status>inherit</wp:status>",
+                "    <wp:post_type>attachment</wp:post_type>",
+                f"    <wp:attachment_url>{_cdata(image)}</wp:attachment_url>",
+            ]
+        lines.append("  </item>\n")
+        return "\n".join(lines)
+
+    @traced_stage("export")
+    def publish(self, site_config, article):
+        os.makedirs(self.root(), exist_ok=True)
+        path = os.path.join(self.root(), f"{site_config['site_key']}.wxr.xml")
+        image = self.image_ref(article["image"], os.path.join(self.root(), "media"), article["slug"])
+        item = self._item(site_config, article, image).encode("utf-8")
+        footer = _WXR_FOOTER.encode("utf-8")
+        with self.lock(path):
+            if not os.path.exists(path):
+                header = _WXR_HEADER.format(
+                    title=escape(site_config["friendly_name"], quote=False),
+                    link=escape(site_config["wp_api_url_base"].split("/wp-json")[0], quote=False),
+                )
+                with open(path, "wb") as f:
+                    f.write(header.encode("utf-8") + footer)
+            with open(path, "r+b") as f:
+                f.seek(-len(footer), os.SEEK_END)
+                f.write(item + footer)
+        return {"link": os.path.abspath(path), "saved": True}, None
+
+
+SINKS = {sink.name: sink for sink in (WordPressSink(), DirectorySink(), JsonlSink(), WxrSink())}
+
+
+def get_sink(site_config, name: Optional[str] = None) -> Sink:
+    """Ujście wg `name`, SITES[...]["output"] albo OUTPUT_SETTINGS["sink"]; ValueError dla nieznanej nazwy."""
+    name = name or site_config.get("output") or OUTPUT_SETTINGS.get("sink", "wordpress")
+    if name not in SINKS:
+        raise ValueError(f"Nieznane ujście '{name}' (dostępne: {', '.join(SINKS)}).")
+    return SINKS[name]
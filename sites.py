@@ -0,0 +1,237 @@
+# sites.py — rejestr portali: config.SITES skompilowane raz do niezmiennych SiteConfig
+#
+# Profil w config.SITES może dziedziczyć po innym:
+#   "tylkoslask2": {"extends": "tylkoslask", "friendly_name": ..., "er_concept_uris": [...]}
+# dostaje wszystkie pola rodzica poza "schedule" i "ai_topic_prompt" (harmonogram
+# i prompt tematów dotyczą tylko portalu, który je deklaruje). Rejestr powstaje
+# przy imporcie modułu:
+#   - błąd struktury (nieznany rodzic, cykl, zły URL lub auth_method, brak
+#     wymaganego pola) to SiteConfigError od razu przy starcie procesu,
+#   - brakujące sekrety (zmienne środowiskowe) trafiają do problems() portalu.
+#     run_*_process i demon odrzucają taki portal, zanim wydadzą cokolwiek na LLM.
+# SiteConfig zachowuje się jak dict tylko do odczytu (site_config["..."], .get).
+# Ma też policzone raz pola site_key, host i auth_headers.
+#
+#   python sites.py --check [--sites a,b] [--offline]   # preflight: sekrety + logowanie do WP
+
+import argparse
+import base64
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import llm
+from config import COMMON_KEYS, SITES as RAW_SITES
+
+_NOT_INHERITED = ("schedule", "ai_topic_prompt", "extends")
+_REQUIRED = ("friendly_name", "wp_api_url_base", "thematic_focus", "prompt_template")
+_AUTH_FIELDS = {"basic": ("wp_username", "wp_password"), "bearer": ("wp_bearer_token",)}
+
+
+class SiteConfigError(ValueError):
+    """Błąd struktury config.SITES (wykrywany przy starcie, nie w trakcie generowania)."""
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _auth_headers(values) -> Dict[str, str]:
+    if values.get("auth_method") == "bearer":
+        return {"Authorization": f"Bearer {values.get('wp_bearer_token')}"}
+    credentials = f"{values.get('wp_username')}:{values.get('wp_password')}"
+    return {"Authorization": f"Basic {base64.b64encode(credentials.encode()).decode('utf-8')}"}
+
+
+class SiteConfig(Mapping):
+    """Skompilowany profil portalu; dostęp jak do dict, bez możliwości zmiany."""
+
+    __slots__ = ("site_key", "host", "auth_headers", "missing", "_values")
+
+    site_key: str
+    host: str
+    auth_headers: Mapping
+    missing: tuple  # (zakres, opis) – brakujące sekrety, zob. problems()
+
+    def __init__(self, site_key, values):
+        frozen = _freeze(dict(values, site_key=site_key))
+        set_ = object.__setattr__
+        set_(self, "_values", frozen)
+        set_(self, "site_key", site_key)
+        set_(self, "host", urlparse(values["wp_api_url_base"]).netloc.lower())
+        set_(self, "auth_headers", MappingProxyType(_auth_headers(values)))
+        set_(self, "missing", tuple(_missing_secrets(values)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"SiteConfig '{self.site_key}' jest tylko do odczytu")
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"SiteConfig({self.site_key!r})"
+
+
+# -----------------------
+# KOMPILACJA
+# -----------------------
+def _resolve(site_key, raw, chain=()):
+    if site_key in chain:
+        raise SiteConfigError(f"Cykl dziedziczenia: {' -> '.join(chain + (site_key,))}")
+    profile = raw[site_key]
+    parent = profile.get("extends")
+    if not parent:
+        return dict(profile)
+    if parent not in raw:
+        raise SiteConfigError(f"{site_key}: nieznany profil bazowy '{parent}'")
+    merged = {k: v for k, v in _resolve(parent, raw, chain + (site_key,)).items() if k not in _NOT_INHERITED}
+    merged.update(profile)
+    return merged
+
+
+def _check_structure(site_key, values):
+    errors = [f"brak pola '{name}'" for name in _REQUIRED if not values.get(name)]
+    url = urlparse(values.get("wp_api_url_base") or "")
+    if values.get("wp_api_url_base") and (url.scheme not in ("http", "https") or not url.netloc):
+        errors.append(f"niepoprawny wp_api_url_base '{values['wp_api_url_base']}'")
+    if values.get("auth_method") not in _AUTH_FIELDS:
+        errors.append(f"auth_method musi być jednym z: {', '.join(_AUTH_FIELDS)}")
+    if "author_id" in values and not isinstance(values["author_id"], int):
+        errors.append("author_id musi być liczbą całkowitą")
+    for route, entries in (values.get("models") or {}).items():
+        for entry in entries:
+            if entry.get("provider") not in llm.PROVIDERS:
+                errors.append(f"models.{route}: nieznany dostawca '{entry.get('provider')}'")
+    for entry in values.get("schedule") or []:
+        if not isinstance(entry.get("every_hours"), (int, float)) or entry["every_hours"] <= 0:
+            errors.append(f"schedule: every_hours musi być liczbą > 0 ({entry})")
+    if errors:
+        raise SiteConfigError(f"{site_key}: {'; '.join(errors)}")
+
+
+def _missing_secrets(values):
+    for field in _AUTH_FIELDS[values["auth_method"]]:
+        if not values.get(field):
+            yield "wp", f"brak {field} (zmienna środowiskowa)"
+    if not values.get("event_registry_key"):
+        yield "eventregistry", "brak event_registry_key (zmienna środowiskowa)"
+    if not (values.get("er_concept_uris") or values.get("er_concept_uri")):
+        yield "eventregistry", "brak er_concept_uri / er_concept_uris"
+    for route in llm.LLM_ROUTES:
+        providers = {provider for provider, _ in llm.candidates(route, values)}
+        if not any(COMMON_KEYS.get(llm.PROVIDERS[p].api_key) for p in providers):
+            needed = ", ".join(sorted(llm.PROVIDERS[p].api_key for p in providers)) or "modelu"
+            yield "llm", f"trasa '{route}': brak klucza API ({needed})"
+
+
+def compile_sites(raw) -> Mapping:
+    """{site_key: SiteConfig} z surowych profili; SiteConfigError przy błędzie struktury."""
+    compiled = {}
+    for site_key in raw:
+        values = _resolve(site_key, raw)
+        _check_structure(site_key, values)
+        compiled[site_key] = SiteConfig(site_key, values)
+    return MappingProxyType(compiled)
+
+
+SITES = compile_sites(RAW_SITES)
+
+
+# -----------------------
+# WALIDACJA PRZED URUCHOMIENIEM
+# -----------------------
+def problems(site_config, topic_source=None, wordpress=True) -> List[str]:
+    """
+    Braki konfiguracji blokujące zadanie portalu: dane logowania WP (chyba że
+    artykuł trafia do pliku, `wordpress=False`), klucze API modeli, a dla
+    źródła "Automatycznie" także EventRegistry.
+    """
+    scopes = {"llm"} | ({"wp"} if wordpress else set()) | ({"eventregistry"} if topic_source == "Automatycznie" else set())
+    return [message for scope, message in site_config.missing if scope in scopes]
+
+
+def config_error(site_config, topic_source=None, wordpress=True) -> Optional[str]:
+    """Komunikat „BŁĄD: …” dla run_*_process albo None, gdy portal jest gotowy."""
+    found = problems(site_config, topic_source, wordpress)
+    if not found:
+        return None
+    return f"BŁĄD: Konfiguracja portalu {site_config.site_key} jest niekompletna: {'; '.join(found)}."
+
+
+def _check_login(site_config, timeout):
+    from wp_http import session
+
+    try:
+        r = session().get(f"{site_config['wp_api_url_base']}/users/me", headers=dict(site_config.auth_headers), timeout=timeout)
+    except Exception as e:
+        return f"WordPress niedostępny: {e}"
+    if r.status_code in (401, 403):
+        return f"WordPress odrzuca dane logowania (HTTP {r.status_code})"
+    if r.status_code >= 400:
+        return f"WordPress zwraca HTTP {r.status_code} dla /users/me"
+    return None
+
+
+def preflight(site_keys, topic_source=None, online=True, timeout=10) -> Dict[str, List[str]]:
+    """
+    {site_key: [problemy]} dla podanych portali: problems() dla źródła
+    `topic_source`, a z `online` także próba zalogowania do WP (GET /users/me,
+    równolegle, raz na parę URL + dane logowania).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    report = {key: problems(SITES[key], topic_source) for key in site_keys}
+    if online:
+        logins = {}
+        for key in site_keys:
+            site = SITES[key]
+            if not any(scope == "wp" for scope, _ in site.missing):
+                logins.setdefault((site["wp_api_url_base"], site.auth_headers["Authorization"]), []).append(key)
+        with ThreadPoolExecutor(max_workers=min(8, len(logins) or 1)) as pool:
+            results = {group: pool.submit(_check_login, SITES[keys[0]], timeout) for group, keys in logins.items()}
+        for group, future in results.items():
+            if future.result():
+                for key in logins[group]:
+                    report[key].append(future.result())
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rejestr portali: walidacja konfiguracji.")
+    parser.add_argument("--check", action="store_true", help="Sprawdź sekrety i logowanie do WP (preflight).")
+    parser.add_argument("--sites", type=str, help="Lista portali oddzielona przecinkami (domyślnie: wszystkie).")
+    parser.add_argument("--source", type=str, default="Automatycznie",
+                        help="Źródło tematów, dla którego sprawdzić konfigurację (domyślnie Automatycznie).")
+    parser.add_argument("--offline", action="store_true", help="Bez zapytań sieciowych (tylko sekrety).")
+    args = parser.parse_args(argv)
+
+    site_keys = [s.strip() for s in args.sites.split(",")] if args.sites else list(SITES)
+    unknown = [s for s in site_keys if s not in SITES]
+    if unknown:
+        parser.error(f"Nieznane portale: {', '.join(unknown)}")
+    if not args.check:
+        for key in site_keys:
+            parent = SITES[key].get("extends")
+            print(f"{key:<28} {SITES[key].host:<32} {SITES[key]['friendly_name']}" + (f"  (extends {parent})" if parent else ""))
+        return
+
+    report = preflight(site_keys, args.source, online=not args.offline)
+    for key, found in report.items():
+        print(f"{'OK ' if not found else 'ŹLE'} {key}" + "".join(f"\n      - {m}" for m in found))
+    sys.exit(1 if any(report.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
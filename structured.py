@@ -0,0 +1,189 @@
+# structured.py — odpowiedzi JSON od LLM: schemat, tolerancyjny parser, naprawa
+#
+# complete_json(nazwa, trasa, prompt, schema) zamiast „find('{')…rfind('}')”:
+#   1. zapytanie z response_format json_schema (OpenAI i Perplexity go obsługują;
+#      PerplexityProvider w llm.py tłumaczy format OpenAI na swój),
+#   2. tolerancyjne wyciągnięcie JSON z tekstu: bloki ```json, tekst wokół,
+#      ucięta odpowiedź (domknięcie otwartych napisów i nawiasów),
+#   3. gdy wynik nadal nie pasuje do schematu – tanie wywołanie naprawcze
+#      (trasa "classify") zamiast ponownego generowania całości.
+# Wynik każdej próby trafia do metryki writerpro_structured_output_total
+# {prompt, outcome}: ok / extracted / repaired / failed.
+
+import json
+import logging
+import re
+import textwrap
+
+import llm
+import metrics
+
+STRUCTURED = metrics.Counter(
+    "writerpro_structured_output_total", "Odpowiedzi JSON od LLM wg promptu i wyniku parsowania.", ("prompt", "outcome")
+)
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_TYPES = {
+    "object": dict, "array": list, "string": str, "number": (int, float), "integer": int, "boolean": bool,
+}
+
+
+# -----------------------
+# PARSOWANIE
+# -----------------------
+def _closers(text):
+    """Nawiasy domykające `text` albo None, gdy kończy się w środku napisu."""
+    stack, in_string, escape = [], False, False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+    return None if in_string else "".join(reversed(stack))
+
+
+def _truncation_repairs(text):
+    """
+    Wersje uciętej odpowiedzi do sprawdzenia, od najpełniejszej: domknięty
+    napis, ucięcie do ostatniego przecinka, ucięcie do ostatniego kompletnego
+    elementu listy – każda z domkniętymi nawiasami.
+    """
+    stack, in_string, escape = [], False, False
+    last_comma = last_item = 0
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+            if stack and stack[-1] == "]":
+                last_item = i + 1
+        elif ch == ",":
+            last_comma = i
+    cuts = [text + ('"' if in_string else ""), text[:last_comma], text[:last_item]]
+    for cut in cuts:
+        body = cut.rstrip().rstrip(",").rstrip()
+        closers = _closers(body) if body and not body.endswith(":") else None
+        if closers is not None:
+            yield body + closers
+
+
+def extract_json(text, schema=None):
+    """
+    Pierwsza wartość JSON (obiekt lub lista) z tekstu odpowiedzi: także z bloku
+    ```json, z tekstem przed/po i z uciętą końcówką. Ze `schema` – pierwsza
+    zgodna z nim. None, gdy nic się nie da odczytać.
+    """
+    if not text:
+        return None
+    fenced = _FENCE_RE.search(text)
+    decoder = json.JSONDecoder()
+    fallback = None
+    for candidate in ([fenced.group(1), text] if fenced else [text]):
+        for start in (i for i, ch in enumerate(candidate) if ch in "{["):
+            try:
+                values = [decoder.raw_decode(candidate, start)[0]]
+            except ValueError:
+                values = []
+                for repaired in _truncation_repairs(candidate[start:]):
+                    try:
+                        values.append(json.loads(repaired))
+                    except ValueError:
+                        continue
+            for value in values:
+                if schema is None or not validate(value, schema):
+                    return value
+                if fallback is None:
+                    fallback = value
+    return fallback
+
+
+def validate(value, schema, path="$"):
+    """Lista niezgodności `value` ze (uproszczonym) JSON Schema: type, properties, required, items."""
+    errors = []
+    expected = schema.get("type")
+    if expected and not isinstance(value, _TYPES[expected]) or (expected in ("number", "integer") and isinstance(value, bool)):
+        return [f"{path}: oczekiwano {expected}"]
+    if expected == "object":
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path}.{key}: brak pola")
+        for key, sub in (schema.get("properties") or {}).items():
+            if key in value:
+                errors.extend(validate(value[key], sub, f"{path}.{key}"))
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+# -----------------------
+# WYWOŁANIA
+# -----------------------
+def response_format(name, schema):
+    """response_format w formacie OpenAI; tryb strict wymaga additionalProperties: false i pełnego required."""
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+def _repair(name, text, schema, problems):
+    prompt = textwrap.dedent(f"""
+        NAPRAW JSON. Poniższa odpowiedź miała być poprawnym JSON zgodnym ze schematem, ale nie jest
+        ({'; '.join(problems[:5])}). Zachowaj treść, popraw tylko format. Zwróć wyłącznie JSON.
+
+        SCHEMAT:
+        {json.dumps(schema, ensure_ascii=False)}
+
+        ODPOWIEDŹ:
+        {text[:6000]}
+    """)
+    return llm.complete("classify", prompt, temperature=0.0, response_format=response_format(name, schema))
+
+
+def complete_json(name, route, prompt=None, messages=None, schema=None, site_config=None, **params):
+    """
+    Odpowiedź trasy `route` jako wartość JSON zgodna ze `schema` albo None.
+    `name` identyfikuje prompt w metrykach (np. "tags", "topics").
+    """
+    if schema:
+        params["response_format"] = response_format(name, schema)
+    text = llm.complete(route, prompt, messages=messages, site_config=site_config, **params)
+    if not text:
+        STRUCTURED.inc(prompt=name, outcome="failed")
+        return None
+
+    try:
+        value, outcome = json.loads(text), "ok"
+    except ValueError:
+        value, outcome = extract_json(text, schema), "extracted"
+    problems = validate(value, schema) if value is not None and schema else ([] if value is not None else ["brak JSON"])
+    if not problems:
+        STRUCTURED.inc(prompt=name, outcome=outcome)
+        return value
+
+    logging.warning(f"[JSON] Odpowiedź '{name}' niezgodna ze schematem ({'; '.join(problems[:3])}) – naprawiam.")
+    repaired_text = _repair(name, text, schema or {}, problems)
+    value = extract_json(repaired_text, schema)
+    if value is not None and not (schema and validate(value, schema)):
+        STRUCTURED.inc(prompt=name, outcome="repaired")
+        return value
+    STRUCTURED.inc(prompt=name, outcome="failed")
+    logging.error(f"[JSON] Nie udało się odczytać odpowiedzi '{name}' także po naprawie.")
+    return None
@@ -0,0 +1,228 @@
+# topic_backlog.py — trwała kolejka tematów od AI, osobna dla każdego portalu
+#
+# Jedno wywołanie modelu (topic_sources.propose_ai_topics) daje
+# TOPIC_BACKLOG_SETTINGS["batch_size"] ocenionych tematów. Trafiają one do
+# kolejki w SQLite (DATA_DIR) bez duplikatów: MinHash tytułów jest porównywany
+# z tematami, które czekają, są w toku albo zostały użyte w ostatnich
+# dedup_window_days dniach (model chętnie proponuje te same tematy). Kolejne zadania biorą temat z kolejki:
+# najwyższa ocena, a przy równej najświeższy. Model jest wołany tylko wtedy, gdy:
+#   - kolejka jest pusta albo wszystkie tematy są starsze niż max_age_hours
+#     (uzupełnienie w zadaniu),
+#   - liczba świeżych tematów spadła poniżej min_queued (uzupełnienie w tle,
+#     bieżące zadanie go nie czeka).
+# Temat wzięty przez zadanie, które się nie powiodło, wraca do kolejki.
+#
+#   python topic_backlog.py --list [--site tylkoslask]
+#   python topic_backlog.py --refill tylkoslask
+
+import argparse
+import collections
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import DATA_DIR, TOPIC_BACKLOG_SETTINGS
+from sites import SITES
+from similarity import char_shingles, estimate_jaccard, minhash
+
+_SETTINGS_DEFAULTS = {"batch_size": 10, "min_queued": 3, "max_age_hours": 48, "dedup_threshold": 0.5, "dedup_window_days": 7}
+
+
+def _setting(name):
+    return TOPIC_BACKLOG_SETTINGS.get(name, _SETTINGS_DEFAULTS[name])
+
+
+class TopicBacklog:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._refilling = set()
+        self._refill_locks = collections.defaultdict(threading.Lock)  # jedno uzupełnianie naraz per portal
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS topics ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, site_key TEXT, title TEXT, context TEXT, score REAL,"
+                " created REAL, state TEXT, updated REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS topics_queue ON topics (site_key, state, score)")
+
+    def _fresh_since(self):
+        return time.time() - _setting("max_age_hours") * 3600
+
+    def queued(self, site_key):
+        """Liczba świeżych tematów czekających w kolejce portalu."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM topics WHERE site_key=? AND state='queued' AND created>=?",
+                (site_key, self._fresh_since()),
+            ).fetchone()[0]
+
+    # --- uzupełnianie ---
+    def add(self, site_key, proposals):
+        """
+        Dopisuje propozycje [{"title", "context", "score"}] pomijając duplikaty
+        tematów w kolejce, w toku i niedawno użytych; zwraca liczbę dodanych.
+        """
+        threshold = _setting("dedup_threshold")
+        used_since = time.time() - float(_setting("dedup_window_days")) * 86400
+        with self.lock, self.conn:
+            # Tematy przeterminowane wypadają z kolejki przy każdym uzupełnieniu
+            self.conn.execute(
+                "UPDATE topics SET state='stale', updated=? WHERE site_key=? AND state='queued' AND created<?",
+                (time.time(), site_key, self._fresh_since()),
+            )
+            existing = [
+                minhash(char_shingles(title)) for (title,) in self.conn.execute(
+                    "SELECT title FROM topics WHERE site_key=? AND (state IN ('queued', 'taken')"
+                    " OR (state='used' AND updated>=?))",
+                    (site_key, used_since),
+                )
+            ]
+            added = 0
+            for proposal in proposals:
+                title = (proposal.get("title") or "").strip()
+                if not title:
+                    continue
+                signature = minhash(char_shingles(title))
+                if any(estimate_jaccard(signature, other) >= threshold for other in existing):
+                    continue
+                existing.append(signature)
+                now = time.time()
+                self.conn.execute(
+                    "INSERT INTO topics (site_key, title, context, score, created, state, updated)"
+                    " VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                    (site_key, title, proposal.get("context") or "", float(proposal.get("score") or 0), now, now),
+                )
+                added += 1
+        return added
+
+    def refill(self, site_config, generate, only_if_empty=False):
+        """
+        Jedno wywołanie `generate(site_config, n)` → nowe tematy w kolejce; zwraca
+        liczbę dodanych. `only_if_empty` – nic nie rób, jeśli inne zadanie właśnie
+        uzupełniło kolejkę.
+        """
+        site_key = site_config["site_key"]
+        with self._refill_locks[site_key]:
+            if only_if_empty and self.queued(site_key):
+                return 0
+            proposals = generate(site_config, _setting("batch_size")) or []
+            added = self.add(site_key, proposals)
+        logging.info(f"[BACKLOG] {site_key}: +{added} tematów (z {len(proposals)} propozycji), w kolejce {self.queued(site_key)}.")
+        return added
+
+    def _refill_in_background(self, site_config, generate):
+        site_key = site_config["site_key"]
+        with self.lock:
+            if site_key in self._refilling:
+                return
+            self._refilling.add(site_key)
+
+        def run():
+            try:
+                self.refill(site_config, generate)
+            except Exception as e:
+                logging.warning(f"[BACKLOG] Uzupełnianie kolejki {site_key} w tle nie powiodło się: {e}")
+            finally:
+                with self.lock:
+                    self._refilling.discard(site_key)
+
+        threading.Thread(target=run, name=f"writerpro-backlog-{site_key}", daemon=True).start()
+
+    # --- pobieranie ---
+    def _pop(self, site_key):
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id, title, context FROM topics WHERE site_key=? AND state='queued' AND created>=?"
+                " ORDER BY score DESC, created DESC LIMIT 1",
+                (site_key, self._fresh_since()),
+            ).fetchone()
+            if row:
+                self.conn.execute("UPDATE topics SET state='taken', updated=? WHERE id=?", (time.time(), row[0]))
+        return row
+
+    def _set_state(self, row_id, state):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE topics SET state=?, updated=? WHERE id=?", (state, time.time(), row_id))
+
+    def take(self, site_config, generate, claim=None, on_end=None):
+        """
+        Najlepszy świeży temat portalu (uzupełnia kolejkę, gdy trzeba). Temat
+        zajęty już na hoście (`claim` zwraca False) wypada z kolejki. `on_end`
+        (np. tracing.on_job_end) dostaje callback, który przy nieudanym
+        zadaniu zwraca temat do kolejki.
+        """
+        site_key = site_config["site_key"]
+        if self.queued(site_key) == 0:
+            self.refill(site_config, generate, only_if_empty=True)
+        elif self.queued(site_key) < _setting("min_queued"):
+            self._refill_in_background(site_config, generate)
+
+        while True:
+            row = self._pop(site_key)
+            if row is None:
+                logging.warning(f"[BACKLOG] Brak wolnych tematów AI dla {site_key}.")
+                return None
+            row_id, title, context = row
+            topic = {
+                "title": title,
+                "url": None,
+                "body_snippet": context or "Temat wygenerowany przez AI.",
+                "image_url": None,
+                "image_query": title.split(":")[0],  # obrazek wyróżniający z Pexels
+                "source_name": "AI Generated",
+            }
+            if claim is not None and not claim(site_config, topic):
+                self._set_state(row_id, "dropped")
+                continue
+            if on_end:
+                on_end(lambda ok: self._set_state(row_id, "used" if ok else "queued"))
+            logging.info(f"[BACKLOG] {site_key}: temat z kolejki '{title}' (zostało {self.queued(site_key)}).")
+            return topic
+
+    def listing(self, site_key=None):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT site_key, score, created, title FROM topics WHERE state='queued'"
+                + (" AND site_key=?" if site_key else "") + " ORDER BY site_key, score DESC, created DESC",
+                (site_key,) if site_key else (),
+            ).fetchall()
+
+
+_backlog = None
+_backlog_lock = threading.Lock()
+
+
+def get_topic_backlog() -> TopicBacklog:
+    """Współdzielona kolejka tematów AI (SQLite w DATA_DIR), tworzona przy pierwszym użyciu."""
+    global _backlog
+    if _backlog is None:
+        with _backlog_lock:
+            if _backlog is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _backlog = TopicBacklog(os.path.join(DATA_DIR, "topic_backlog.sqlite3"))
+    return _backlog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kolejka tematów AI per portal.")
+    parser.add_argument("--list", action="store_true", help="Wypisz tematy czekające w kolejce.")
+    parser.add_argument("--site", choices=list(SITES), help="Tylko ten portal (dla --list).")
+    parser.add_argument("--refill", metavar="PORTAL", choices=list(SITES), help="Uzupełnij kolejkę portalu teraz.")
+    args = parser.parse_args(argv)
+
+    from generator import setup_logging
+    from topic_sources import propose_ai_topics
+    setup_logging()
+    backlog = get_topic_backlog()
+    if args.refill:
+        print(f"Dodano {backlog.refill(SITES[args.refill], propose_ai_topics)} tematów.")
+    for site_key, score, created, title in backlog.listing(args.site):
+        print(f"{site_key:<28} {score:>4.1f}  {datetime.fromtimestamp(created):%Y-%m-%d %H:%M}  {title}")
+
+
+if __name__ == "__main__":
+    main()
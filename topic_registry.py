@@ -0,0 +1,101 @@
+# topic_registry.py — wspólny rejestr tematów dla portali publikujących na ten sam host WP
+#
+# Kilka wpisów w config.SITES (np. tylkoslask, tylkoslask2..4) trafia do tego
+# samego WordPressa. Rejestr grupuje tematy po hoście i przed researchem
+# sprawdza, czy „rodzeństwo” nie wzięło już tej samej historii: dokładnie po
+# URI wydarzenia EventRegistry / URL źródła albo przybliżenie (MinHash po
+# tytule i zajawce).
+#
+# Rezerwacja jest najpierw tymczasowa (claim_ttl_minutes): staje się trwała
+# dopiero po udanej publikacji (commit). Nieudane zadanie zwalnia temat
+# (release), a po awarii procesu rezerwacja po prostu wygasa.
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from config import DATA_DIR, TOPIC_REGISTRY_SETTINGS
+from similarity import MinHashIndex, char_shingles, minhash
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def site_host(site_config) -> str:
+    """Host WordPressa, na który publikuje portal (klucz grupowania rodziny portali)."""
+    if getattr(site_config, "host", None):
+        return site_config.host  # policzony raz w sites.SiteConfig
+    return urlparse(site_config.get("wp_api_url_base") or "").netloc.lower()
+
+
+def _topic_text(topic_data) -> str:
+    return f"{topic_data.get('title') or ''} {topic_data.get('body_snippet') or ''}"
+
+
+def _topic_keys(topic_data):
+    return [k for k in (topic_data.get("event_uri"), topic_data.get("url")) if k]
+
+
+class TopicRegistry:
+    def __init__(self, path, threshold, lookback_days, claim_ttl_minutes=120):
+        self.index = MinHashIndex(path)
+        self.threshold = threshold
+        self.lookback_seconds = lookback_days * 86400
+        self.claim_ttl_seconds = claim_ttl_minutes * 60
+
+    def _since(self):
+        return time.time() - self.lookback_seconds
+
+    def claim(self, site_config, topic_data) -> bool:
+        """
+        Tymczasowo rezerwuje temat dla portalu. False = temat jest już zajęty
+        przez ten lub inny portal z tego samego hosta (w oknie lookback_days).
+        Po sukcesie topic_data["claim_id"] wskazuje rezerwację do commit/release.
+        """
+        host = site_host(site_config)
+        text = _topic_text(topic_data)
+        item_id = topic_data.get("event_uri") or topic_data.get("url") or hashlib.sha1(text.encode("utf-8")).hexdigest()
+        dup = self.index.claim(
+            host, item_id, minhash(char_shingles(text)), _topic_keys(topic_data), self.threshold, self._since(),
+            meta={"site_key": site_config.get("site_key"), "title": topic_data.get("title")},
+            ttl=self.claim_ttl_seconds,
+        )
+        if dup:
+            meta = dup.get("meta") or {}
+            logging.info(
+                f"[TOPICS] Pomijam temat '{topic_data.get('title')}' — duplikat ({dup['score']:.2f}) "
+                f"tematu '{meta.get('title')}' z portalu {meta.get('site_key')} ({host})."
+            )
+            return False
+        topic_data["claim_id"] = item_id
+        return True
+
+    def commit(self, site_config, topic_data):
+        """Temat opublikowany – rezerwacja staje się trwała (blokuje przez lookback_days)."""
+        if topic_data and topic_data.get("claim_id"):
+            self.index.confirm(site_host(site_config), topic_data.pop("claim_id"))
+
+    def release(self, site_config, topic_data):
+        """Zadanie się nie powiodło – zwalnia rezerwację, temat może wziąć inny portal."""
+        if topic_data and topic_data.get("claim_id"):
+            if self.index.remove(site_host(site_config), topic_data.pop("claim_id"), pending_only=True):
+                logging.info(f"[TOPICS] Zwolniono temat '{topic_data.get('title')}' po nieudanym zadaniu.")
+
+
+def get_topic_registry() -> TopicRegistry:
+    """Współdzielony rejestr tematów (SQLite w DATA_DIR), tworzony przy pierwszym użyciu."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _registry = TopicRegistry(
+                    os.path.join(DATA_DIR, "topic_registry.sqlite3"),
+                    TOPIC_REGISTRY_SETTINGS["threshold"],
+                    TOPIC_REGISTRY_SETTINGS["lookback_days"],
+                    TOPIC_REGISTRY_SETTINGS.get("claim_ttl_minutes", 120),
+                )
+    return _registry
@@ -0,0 +1,151 @@
+# topic_sources.py — źródła tematów dla pipeline'u generator.py
+#
+# Źródło to funkcja (site_config, manual_topic_data, claim) -> temat | None,
+# zarejestrowana pod nazwą używaną w CLI, app.py i harmonogramie demona:
+#   "Automatycznie" – najnowsze artykuły z EventRegistry (er_concept_uri[s]),
+#   "AI"            – propozycje tematów od modelu (SITES[...]["ai_topic_prompt"]),
+#   "Ręcznie"       – temat podany przez użytkownika.
+# `claim` (TopicRegistry.claim) rezerwuje temat na hoście portalu; źródło
+# sprawdza kolejnych kandydatów, aż któryś będzie wolny.
+#
+# Nowe źródło: funkcja z dekoratorem @topic_source("Nazwa").
+
+import logging
+import re
+import textwrap
+from datetime import datetime, timedelta
+
+from config import TOPIC_REGISTRY_SETTINGS
+
+TOPIC_SOURCES = {}
+
+TOPICS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "topics": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"title": {"type": "string"}, "context": {"type": "string"}, "score": {"type": "number"}},
+                "required": ["title", "context", "score"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["topics"],
+    "additionalProperties": False,
+}
+
+
+def topic_source(name):
+    def decorator(func):
+        TOPIC_SOURCES[name] = func
+        return func
+    return decorator
+
+
+def fetch(name, site_config, manual_topic_data=None, claim=None):
+    """Temat ze źródła `name` (zarezerwowany przez `claim`, jeśli podano) albo None."""
+    source = TOPIC_SOURCES.get(name)
+    if source is None:
+        logging.error(f"Nieznane źródło tematu '{name}' (dostępne: {', '.join(TOPIC_SOURCES)}).")
+        return None
+    return source(site_config, manual_topic_data, claim)
+
+
+@topic_source("Ręcznie")
+def manual(site_config, manual_topic_data, claim=None):
+    if manual_topic_data and claim and not claim(site_config, manual_topic_data):
+        logging.warning("Ręczny temat był już niedawno opisany na tym hoście — kontynuuję na życzenie użytkownika.")
+    return manual_topic_data or None
+
+
+@topic_source("Automatycznie")
+def event_registry(site_config, manual_topic_data=None, claim=None):
+    """
+    Najnowszy artykuł z EventRegistry. Z `claim` sprawdza do
+    TOPIC_REGISTRY_SETTINGS["candidates"] kandydatów i bierze pierwszego,
+    którego nie zajął już inny portal z tego samego hosta.
+    """
+    from generator import get_event_registry_client
+
+    logging.info("Pobieranie tematów z EventRegistry...")
+    try:
+        er = get_event_registry_client(site_config["event_registry_key"])
+
+        date_end = datetime.now().date()
+        date_start = (date_end - timedelta(days=3)).isoformat()
+        date_end = date_end.isoformat()
+
+        uris = site_config.get("er_concept_uris") or [site_config["er_concept_uri"]]
+
+        complex_query = {
+            "$query": {
+                "$and": [
+                    {"$or": [{"conceptUri": uri} for uri in uris]},
+                    {"dateStart": date_start, "dateEnd": date_end, "lang": "pol"},
+                ]
+            }
+        }
+
+        from eventregistry import QueryArticlesIter
+        qiter = QueryArticlesIter.initWithComplexQuery(complex_query)
+
+        max_items = TOPIC_REGISTRY_SETTINGS.get("candidates", 10) if claim else 1
+        for article in qiter.execQuery(er, sortBy="date", maxItems=max_items):
+            topic = {
+                "title": article.get("title"),
+                "body_snippet": article.get("body", "")[:700],
+                "url": article.get("url"),
+                "image_url": article.get("image"),
+                "source_name": article.get("source", {}).get("title"),
+                "event_uri": article.get("eventUri"),
+            }
+            if claim is None or claim(site_config, topic):
+                return topic
+        if claim:
+            logging.warning(f"Wszystkie tematy z EventRegistry (max {max_items}) są już zajęte na tym hoście.")
+        return None
+    except Exception as e:
+        logging.error(f"Błąd podczas pobierania tematów z EventRegistry: {e}")
+        return None
+
+
+def ai_topic_prompt(site_config):
+    """
+    Tematyczna część wytycznych (bez liczby tematów – tę podaje propose_ai_topics).
+    Starsze wpisy "Zaproponuj N tematów..." w konfiguracji są przycinane.
+    """
+    prompt = site_config.get("ai_topic_prompt") or (
+        f"Aktualne, angażujące tematy dla portalu {site_config['friendly_name']} "
+        f"o tematyce {site_config['thematic_focus']}. Tematy powinny dotyczyć ostatnich wydarzeń w Polsce."
+    )
+    return re.sub(r"^\s*zaproponuj\s+\d+\s+", "", prompt, flags=re.IGNORECASE)
+
+
+def propose_ai_topics(site_config, count):
+    """Jedno wywołanie modelu (trasa "research"): [{"title", "context", "score"}] albo []."""
+    import structured
+
+    logging.info(f"Generowanie {count} propozycji tematów przez AI...")
+    prompt = textwrap.dedent(f"""
+        PROPOZYCJE TEMATÓW. Jesteś redaktorem naczelnym. Na podstawie poniższych wytycznych zaproponuj
+        {count} różnych, chwytliwych i aktualnych tematów na artykuły (bez powtórzeń i wariantów tego samego).
+        Wytyczne: "{ai_topic_prompt(site_config)}"
+
+        Każdy temat oceń od 1 do 10 (aktualność i potencjał zainteresowania czytelników) i dodaj
+        jedno zdanie kontekstu: co się wydarzyło i dlaczego to ważne teraz.
+        Zwróć wyłącznie JSON:
+        {{"topics": [{{"title": "Tytuł tematu", "context": "Jedno zdanie kontekstu.", "score": 8}}]}}
+    """)
+    data = structured.complete_json("topics", "research", prompt, schema=TOPICS_SCHEMA, site_config=site_config)
+    return data["topics"] if data else []
+
+
+@topic_source("AI")
+def ai_generated(site_config, manual_topic_data=None, claim=None):
+    """Temat z kolejki tematów AI portalu (topic_backlog.py), uzupełnianej przez propose_ai_topics."""
+    import tracing
+    from topic_backlog import get_topic_backlog
+
+    return get_topic_backlog().take(site_config, propose_ai_topics, claim=claim, on_end=tracing.on_job_end)
@@ -0,0 +1,340 @@
+# tracing.py — strukturalne logi JSON (jedna linia = jedno zdarzenie) + artefakty
+#
+# Każdy wpis w logu JSON niesie job_id, site_key i nazwę etapu, więc z samego
+# pliku da się policzyć opóźnienia p50/p95 per portal i etap:
+#   python tracing.py generator.jsonl
+#
+# Duże treści (research, outline, HTML) nie trafiają do logu — zapisywane są
+# jako osobne pliki w LOGGING_SETTINGS["artifacts_dir"]/<data>/<job_id>/.
+# Katalogi dni starsze niż "artifacts_keep_days" usuwa prune_artifacts()
+# (przy starcie logowania i raz na dobę w demonie).
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+from urllib.parse import urlparse
+
+import memory
+import metrics
+import profiling
+from config import LOGGING_SETTINGS
+
+_job = contextvars.ContextVar("writerpro_job", default=None)
+_stage = contextvars.ContextVar("writerpro_stage", default=None)
+
+# Zadania trwające w procesie: job_id -> site_key (np. dla okna zapisów w wp_batch)
+_active_jobs = {}
+_active_lock = threading.Lock()
+
+# Pola standardowego LogRecord, których nie kopiujemy do JSON-a jako „extra”
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+# -----------------------
+# KONTEKST: ZADANIE / ETAP
+# -----------------------
+def current_job():
+    return _job.get() or {}
+
+
+def current_stage():
+    return _stage.get()
+
+
+def submit(executor, fn, *args, **kwargs):
+    """
+    executor.submit z kopią bieżącego kontekstu: logi, etapy i metryki wątku
+    roboczego (np. równoległe sekcje artykułu) trafiają do tego samego zadania.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def active_jobs():
+    """Kopia {job_id: site_key} zadań trwających teraz w tym procesie."""
+    with _active_lock:
+        return dict(_active_jobs)
+
+
+class _ContextFilter(logging.Filter):
+    """Dokleja do każdego rekordu job_id, site_key i bieżący etap."""
+
+    def filter(self, record):
+        job = _job.get() or {}
+        record.job_id = job.get("job_id")
+        record.site_key = job.get("site_key")
+        record.job_kind = job.get("kind")
+        record.stage = _stage.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            "job_id": getattr(record, "job_id", None),
+            "site_key": getattr(record, "site_key", None),
+            "kind": getattr(record, "job_kind", None),
+            "stage": getattr(record, "stage", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in entry and key != "job_kind":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+TRACE_LOGGER = "writerpro.trace"
+
+
+def setup_json_logging():
+    """
+    Tworzy handler JSON-lines z rotacją po rozmiarze. Zdarzenia śledzenia
+    (etapy, HTTP, artefakty) idą wyłącznie do niego – nie zaśmiecają konsoli
+    ani generator.log. Zwrócony handler należy dołączyć też do root loggera.
+    """
+    handler = RotatingFileHandler(
+        LOGGING_SETTINGS["json_log"],
+        maxBytes=LOGGING_SETTINGS["max_bytes"],
+        backupCount=LOGGING_SETTINGS["backup_count"],
+        encoding="utf-8",
+    )
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(_ContextFilter())
+
+    trace_logger = logging.getLogger(TRACE_LOGGER)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+    trace_logger.addHandler(handler)
+    prune_artifacts()
+    return handler
+
+
+def _event(event, level=logging.INFO, **fields):
+    logging.getLogger(TRACE_LOGGER).log(level, event, extra=dict(fields, event=event))
+
+
+@contextmanager
+def job(site_key, kind, profile=False):
+    """
+    Zakres jednego artykułu: nadaje job_id i loguje start/koniec z czasem trwania
+    i szczytem RSS procesu w tym czasie. Start czeka na miejsce w budżecie
+    pamięci workera (memory.job).
+    `profile` włącza profilowanie etapów tego zadania (zob. profiling.job).
+    """
+    job_id = uuid.uuid4().hex[:12]
+    with memory.job(job_id, admit=_job.get() is None) as usage:
+        record = {"job_id": job_id, "site_key": site_key, "kind": kind, "on_end": []}
+        token = _job.set(record)
+        start = time.perf_counter()
+        _event("job_start", memory_wait_ms=round(usage.waited * 1000, 1) if usage.waited else None)
+        with _active_lock:
+            _active_jobs[job_id] = site_key
+        status = "ok"
+        try:
+            with profiling.job(job_id, site_key, kind, profile):
+                yield job_id
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            with _active_lock:
+                _active_jobs.pop(job_id, None)
+            _event("job_end", status=status, duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                   process_peak_rss_mb=usage.peak_mb())
+            _job.reset(token)
+
+
+def on_job_end(callback):
+    """
+    Rejestruje callback(ok: bool) wołany po zakończeniu bieżącego zadania
+    (traced_job), np. zatwierdzenie albo zwolnienie rezerwacji tematu.
+    Poza zadaniem callback jest wołany od razu z ok=True.
+    """
+    job_ctx = _job.get()
+    if job_ctx is None:
+        callback(True)
+    else:
+        job_ctx["on_end"].append(callback)
+
+
+def _run_job_end_callbacks(ok):
+    for callback in current_job().get("on_end", ()):
+        try:
+            callback(ok)
+        except Exception as e:
+            logging.warning(f"Callback końca zadania nie powiódł się: {e}")
+
+
+def traced_stage(name, profile=True):
+    """
+    Dekorator: całe wywołanie funkcji jako etap (research, outline, publish...):
+    start/koniec + duration_ms; pusty wynik oznaczany jako status=empty.
+    `profile=False` – etap tylko rozdziela pracę na wątki; w trybie profilowania
+    profil dostają jego etapy potomne (zob. profiling.py).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _stage.set(name)
+            start = time.perf_counter()
+            _event("stage_start")
+            status = "error"
+            try:
+                with profiling.stage(name) if profile else nullcontext():
+                    result = func(*args, **kwargs)
+                status = "ok" if result else "empty"
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                _event("stage_end", status=status, duration_ms=round(elapsed * 1000, 1))
+                metrics.STAGE_SECONDS.observe(elapsed, site=current_job().get("site_key"), stage=name, status=status)
+                _stage.reset(token)
+        return wrapper
+    return decorator
+
+
+def traced_job(kind, setup=None):
+    """
+    Dekorator dla run_*_process(site_key, ...): całe wywołanie jako jedno zadanie.
+    `setup` (np. generator.setup_logging) jest wołane przed otwarciem zadania.
+    Opcjonalny argument `profile=` wywołania nie trafia do funkcji – włącza
+    profilowanie etapów tylko tego zadania.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(site_key, *args, profile=False, **kwargs):
+            if setup:
+                setup()
+            with job(site_key, kind, profile):
+                try:
+                    result = func(site_key, *args, **kwargs)
+                except Exception:
+                    _run_job_end_callbacks(False)
+                    metrics.record_article(site_key, kind, ok=False)
+                    raise
+                failed = bool(not result or "BŁĄD" in str(result))
+                _event("job_result", result=str(result)[:300], failed=failed)
+                _run_job_end_callbacks(not failed)
+                metrics.record_article(site_key, kind, ok=not failed)
+                return result
+        return wrapper
+    return decorator
+
+
+# -----------------------
+# HTTP
+# -----------------------
+def log_http_response(response, *args, **kwargs):
+    """Hook `response` dla requests.Session: metoda, host, status, bajty, czas (log + metryki)."""
+    request = response.request
+    host = urlparse(request.url).netloc
+    metrics.HTTP_REQUESTS.inc(host=host, status=response.status_code)
+    metrics.HTTP_SECONDS.observe(response.elapsed.total_seconds(), host=host)
+    body = request.body or b""
+    length = response.headers.get("Content-Length")
+    _event(
+        "http",
+        level=logging.INFO if response.ok else logging.WARNING,
+        method=request.method,
+        url=request.url.split("?", 1)[0],
+        status=response.status_code,
+        bytes_out=len(body) if isinstance(body, (bytes, str)) else None,
+        bytes_in=int(length) if length and length.isdigit() else None,
+        duration_ms=round(response.elapsed.total_seconds() * 1000, 1),
+    )
+
+
+# -----------------------
+# ARTEFAKTY
+# -----------------------
+def save_artifact(name, content, ext="txt"):
+    """Zapisuje duży ładunek (research, outline, HTML) do pliku; zwraca ścieżkę."""
+    if content is None:
+        return None
+    job_id = current_job().get("job_id") or "no-job"
+    directory = os.path.join(LOGGING_SETTINGS["artifacts_dir"], datetime.now().strftime("%Y-%m-%d"), job_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.{ext}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    _event("artifact", artifact=name, path=path, bytes=len(content.encode("utf-8")))
+    return path
+
+
+def prune_artifacts(now=None):
+    """Usuwa katalogi artifacts/<RRRR-MM-DD>/ starsze niż LOGGING_SETTINGS["artifacts_keep_days"]; zwraca ich liczbę."""
+    keep_days = LOGGING_SETTINGS.get("artifacts_keep_days", 14)
+    root = LOGGING_SETTINGS["artifacts_dir"]
+    if not keep_days or not os.path.isdir(root):
+        return 0
+    cutoff = ((now or datetime.now()) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+    removed = 0
+    for name in os.listdir(root):
+        try:
+            datetime.strptime(name, "%Y-%m-%d")
+        except ValueError:
+            continue  # nie nasz katalog dnia
+        if name < cutoff:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+            removed += 1
+    if removed:
+        logging.info(f"Usunięto {removed} katalogów artefaktów starszych niż {keep_days} dni.")
+    return removed
+
+
+# -----------------------
+# RAPORT p50/p95
+# -----------------------
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def stage_latency_report(paths):
+    """Zwraca {(site_key, stage): [duration_ms, ...]} z plików JSON-lines."""
+    samples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("event") == "stage_end":
+                    key = (entry.get("site_key"), entry.get("stage"))
+                elif entry.get("event") == "job_end":
+                    key = (entry.get("site_key"), "[job]")
+                else:
+                    continue
+                samples.setdefault(key, []).append(entry.get("duration_ms") or 0.0)
+    return samples
+
+
+def main(argv=None):
+    paths = (argv if argv is not None else sys.argv[1:]) or [LOGGING_SETTINGS["json_log"]]
+    samples = stage_latency_report(paths)
+    print(f"{'portal':<28} {'etap':<14} {'n':>5} {'p50 [ms]':>10} {'p95 [ms]':>10}")
+    for (site_key, stage_name), values in sorted(samples.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1]))):
+        print(f"{str(site_key):<28} {str(stage_name):<14} {len(values):>5} "
+              f"{_percentile(values, 50):>10.0f} {_percentile(values, 95):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
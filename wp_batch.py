@@ -0,0 +1,356 @@
+# wp_batch.py — zbiorcze zapisy do WordPressa (REST batch/v1), grupowane per host
+#
+# Zadania publikujące w tym samym czasie na ten sam host WP (np. cztery warianty
+# tylkoslask na tylkoslask.pl) nie wysyłają osobnych POST /posts. Pierwsza
+# publikacja otwiera okno (maks. WP_BATCH_SETTINGS["window_seconds"], tylko gdy
+# w procesie trwają inne zadania na ten host), kolejne do niego dołączają,
+# a po jego zamknięciu cała grupa idzie jednym zapytaniem
+# /wp-json/batch/v1 (maks. 25 podzapytań – limit WP). Tagi wszystkich artykułów
+# grupy rozwiązywane są raz: tag nowy dla kilku artykułów powstaje jeden raz.
+# Host bez batch/v1 (WP < 5.6, wyłączony endpoint) dostaje równoległe
+# pojedyncze zapytania. Każde zadanie dostaje z powrotem swój wynik.
+# Na pojedyncze zapytania przechodzimy tylko wtedy, gdy WP na pewno odrzucił
+# batch przed wykonaniem (404/405, rest_no_route, błąd walidacji 400). Po
+# timeoucie albo 5xx batch mógł się już wykonać – nowe wpisy z takiej porcji
+# są oznaczane jako nieudane (ponowienie zdublowałoby je), a tylko operacje
+# idempotentne (zmiana wpisu o znanym ID, termin szukany przed utworzeniem)
+# są powtarzane pojedynczo.
+#
+# Media nie idą przez batch/v1 (obsługuje tylko treści JSON) – obrazki wgrywa
+# samo zadanie przed publikacją.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import metrics
+import tracing
+from config import WP_BATCH_SETTINGS
+from sites import SITES
+from topic_registry import site_host
+from tracing import traced_stage
+from wp_http import get_auth_header, session, term_ids
+
+# host -> czy obsługuje batch/v1 (ustalane przy pierwszej próbie)
+_batch_support = {}
+
+_open_lock = threading.Lock()
+_open_batches = {}
+
+
+def _group_key(site_config):
+    """Jedno zapytanie batch = jeden host i jedne poświadczenia."""
+    return site_config["wp_api_url_base"], get_auth_header(site_config)["Authorization"]
+
+
+def _pending_peers(key, joined_jobs):
+    """Ile trwających zadań na ten sam host (i poświadczenia) jeszcze nie dołączyło do grupy."""
+    count = 0
+    for job_id, site_key in tracing.active_jobs().items():
+        if job_id not in joined_jobs and site_key in SITES and _group_key(SITES[site_key]) == key:
+            count += 1
+    return count
+
+
+def _split_base(site_config):
+    """'https://host/wp-json/wp/v2' -> ('https://host/wp-json', '/wp/v2'); None bez /wp-json."""
+    base = site_config["wp_api_url_base"].rstrip("/")
+    root, sep, route = base.partition("/wp-json")
+    if not sep:
+        return None
+    return root + sep, route or "/wp/v2"
+
+
+def _send_batch(site_config, sub_requests):
+    """
+    Wysyła podzapytania [(metoda, zasób, body)] przez batch/v1, w porcjach po
+    WP_BATCH_SETTINGS["max_requests"]. Zwraca listę (status, body) w tej samej
+    kolejności albo None, gdy host nie obsługuje batch/v1 lub odrzucił pierwszą
+    porcję przed wykonaniem (wtedy wywołujący przechodzi na pojedyncze
+    zapytania). Porcja o nieznanym wyniku (wyjątek sieci, 5xx) daje
+    (None, None) dla każdego swojego podzapytania i kolejnych.
+    """
+    host = site_host(site_config)
+    split = _split_base(site_config)
+    if split is None or _batch_support.get(host) is False:
+        return None
+    root, route = split
+    headers = get_auth_header(site_config)
+    headers["Content-Type"] = "application/json"
+
+    results = []
+    size = WP_BATCH_SETTINGS["max_requests"]
+    for start in range(0, len(sub_requests), size):
+        chunk = sub_requests[start:start + size]
+        payload = {
+            "validation": "normal",  # błąd jednego wpisu nie blokuje pozostałych
+            "requests": [
+                {"method": method, "path": f"{route}/{resource}", "body": body} for method, resource, body in chunk
+            ],
+        }
+        unknown = [(None, None)] * (len(sub_requests) - len(results))
+        try:
+            r = session().post(f"{root}/batch/v1", headers=headers, json=payload, timeout=120)
+        except Exception as e:
+            logging.error(f"[WP-BATCH] Zapytanie batch do {host} nie powiodło się ({e}) – wynik porcji nieznany, bez ponowienia.")
+            return results + unknown
+        if r.status_code in (404, 405) or (r.status_code == 400 and "rest_no_route" in r.text):
+            logging.info(f"[WP-BATCH] {host} nie obsługuje /batch/v1 – pojedyncze zapytania.")
+            _batch_support[host] = False
+            return None if not results else results + unknown
+        if r.status_code == 400:
+            # Walidacja całego zapytania batch (np. rest_invalid_param) – nic nie zostało wykonane
+            logging.warning(f"[WP-BATCH] {host}: batch/v1 odrzucony (400): {r.text[:300]}")
+            return None if not results else results + unknown
+        if r.status_code >= 400:
+            logging.error(f"[WP-BATCH] {host}: batch/v1 zwrócił {r.status_code} – wynik porcji nieznany, bez ponowienia: {r.text[:300]}")
+            return results + unknown
+        _batch_support[host] = True
+        responses = r.json().get("responses") or []
+        for i in range(len(chunk)):
+            resp = responses[i] if i < len(responses) else {}
+            results.append((resp.get("status"), resp.get("body")))
+    return results
+
+
+# -----------------------
+# TAGI (raz na grupę)
+# -----------------------
+def resolve_terms(site_config, term_type, names) -> dict:
+    """
+    {nazwa.lower(): id} dla wszystkich `names` (bez powtórzeń). Brakujące terminy
+    tworzone są jednym zapytaniem batch; odpowiedź term_exists (wyścig z innym
+    procesem) niesie id istniejącego terminu.
+    """
+    import generator
+
+    url = f"{site_config['wp_api_url_base']}/{term_type}"
+    unique = {}
+    for name in names:
+        if name and name.strip():
+            unique.setdefault(name.strip().lower(), name.strip())
+
+    resolved, missing = {}, []
+    for key, name in unique.items():
+        cached = term_ids.get((url, key))
+        metrics.record_cache("wp_terms", hit=bool(cached))
+        if cached:
+            resolved[key] = cached
+        else:
+            missing.append(name)
+    if not missing:
+        return resolved
+
+    # Wyszukiwanie istniejących – równolegle, po jednym zapytaniu na nazwę
+    def lookup(name):
+        try:
+            r = session().get(
+                url, headers=get_auth_header(site_config), params={"search": name}, timeout=20
+            )
+            r.raise_for_status()
+            for term in r.json():
+                if term.get("name", "").lower() == name.lower():
+                    return term["id"]
+        except Exception as e:
+            logging.warning(f"[WP-BATCH] Wyszukanie terminu '{name}' nie powiodło się: {e}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=WP_BATCH_SETTINGS["max_workers"]) as pool:
+        found = dict(zip(missing, pool.map(lookup, missing)))
+    to_create = [name for name, term_id in found.items() if not term_id]
+    for name, term_id in found.items():
+        if term_id:
+            resolved[name.lower()] = term_id
+
+    if to_create:
+        logging.info(f"[WP-BATCH] Tworzenie {len(to_create)} nowych terminów ({term_type}): {', '.join(to_create)}")
+        bodies = [("POST", term_type, {"name": n, "slug": n.lower().replace(" ", "-")}) for n in to_create]
+        responses = _send_batch(site_config, bodies)
+        if responses is None:
+            with ThreadPoolExecutor(max_workers=WP_BATCH_SETTINGS["max_workers"]) as pool:
+                ids = list(pool.map(lambda n: generator.get_or_create_term_id(n, term_type, site_config), to_create))
+        else:
+            ids = [_term_id_from_response(status, body, name) for name, (status, body) in zip(to_create, responses)]
+            # Nieznany wynik porcji: get_or_create_term_id najpierw szuka, więc nie zdubluje terminu
+            ids = [
+                term_id if term_id or status is not None else generator.get_or_create_term_id(name, term_type, site_config)
+                for name, term_id, (status, _) in zip(to_create, ids, responses)
+            ]
+        for name, term_id in zip(to_create, ids):
+            if term_id:
+                resolved[name.lower()] = term_id
+
+    for key, term_id in resolved.items():
+        term_ids[(url, key)] = term_id
+    return resolved
+
+
+def _term_id_from_response(status, body, name):
+    body = body or {}
+    if status is None:
+        return None  # wynik porcji nieznany – rozstrzyga wywołujący
+    if status < 300:
+        return body.get("id")
+    if body.get("code") == "term_exists":
+        return (body.get("data") or {}).get("term_id")
+    logging.error(f"[WP-BATCH] Nie udało się utworzyć terminu '{name}': {status} {body}")
+    return None
+
+
+# -----------------------
+# PUBLIKACJA
+# -----------------------
+def publish_many(items) -> List[Optional[dict]]:
+    """
+    Publikuje listę {"site_config", "post", "tags": [nazwy]} – grupami per host,
+    każda grupa: jedno rozwiązanie tagów i jeden batch z wpisami. Zwraca wyniki
+    (obiekt wpisu WP albo None) w kolejności `items`.
+    """
+    return _run_groups(items, _publish_group)
+
+
+def update_posts(items) -> List[Optional[dict]]:
+    """
+    Zmienia istniejące wpisy: lista {"site_config", "post_id", "fields"} (np.
+    {"status": "publish"} albo nowa treść) – jeden batch per host, bez batch/v1
+    równoległe POST /posts/<id>. Zwraca zaktualizowane wpisy (albo None) w
+    kolejności `items`.
+    """
+    return _run_groups(items, _update_group)
+
+
+def _run_groups(items, run_group):
+    groups = {}
+    for i, item in enumerate(items):
+        groups.setdefault(_group_key(item["site_config"]), []).append(i)
+
+    results = [None] * len(items)
+
+    def run(indexes):
+        for i, result in zip(indexes, run_group([items[i] for i in indexes])):
+            results[i] = result
+
+    if len(groups) == 1:
+        run(next(iter(groups.values())))
+    else:
+        with ThreadPoolExecutor(max_workers=WP_BATCH_SETTINGS["max_workers"]) as pool:
+            list(pool.map(run, groups.values()))
+    return results
+
+
+def _post_results(host, labels, responses, verb):
+    results = []
+    for label, (status, body) in zip(labels, responses):
+        if status and status < 300 and isinstance(body, dict) and body.get("id"):
+            logging.info(f"[WP-BATCH] {verb} '{label}': {body.get('link')}")
+            results.append(body)
+        elif status is None:
+            logging.error(f"[WP-BATCH] {verb} '{label}' na {host} – wynik nieznany (batch bez odpowiedzi).")
+            results.append(None)
+        else:
+            logging.error(f"[WP-BATCH] {verb} '{label}' na {host} – błąd: {status} {body}")
+            results.append(None)
+    return results
+
+
+def _update_group(group):
+    import generator
+
+    site_config = group[0]["site_config"]
+    host = site_host(site_config)
+    subs = [("POST", f"posts/{item['post_id']}", item["fields"]) for item in group]
+    responses = _send_batch(site_config, subs) if len(group) > 1 else None
+    if responses is None:
+        with ThreadPoolExecutor(max_workers=WP_BATCH_SETTINGS["max_workers"]) as pool:
+            return list(pool.map(
+                lambda item: generator.update_wp_post(item["post_id"], item["fields"], item["site_config"]), group
+            ))
+    logging.info(f"[WP-BATCH] {host}: zmiana {len(group)} wpisów jednym zapytaniem batch/v1.")
+    results = _post_results(host, [f"ID={item['post_id']}" for item in group], responses, "Zaktualizowano")
+    # Zmiana wpisu o znanym ID jest idempotentna – porcje o nieznanym wyniku powtarzamy pojedynczo
+    return [
+        generator.update_wp_post(item["post_id"], item["fields"], item["site_config"]) if status is None else result
+        for item, result, (status, _) in zip(group, results, responses)
+    ]
+
+
+def _publish_group(group):
+    import generator
+
+    site_config = group[0]["site_config"]
+    host = site_host(site_config)
+    tag_ids = resolve_terms(site_config, "tags", [t for item in group for t in item.get("tags") or ()])
+    posts = []
+    for item in group:
+        post = dict(item["post"])
+        tags = [tag_ids.get(t.strip().lower()) for t in item.get("tags") or () if t and t.strip()]
+        post["tags"] = list(dict.fromkeys(list(post.get("tags") or []) + [t for t in tags if t]))
+        posts.append(post)
+
+    responses = _send_batch(site_config, [("POST", "posts", post) for post in posts]) if len(posts) > 1 else None
+    if responses is None:
+        # Pojedynczy wpis albo host bez batch/v1: zwykłe POST /posts, równolegle
+        with ThreadPoolExecutor(max_workers=WP_BATCH_SETTINGS["max_workers"]) as pool:
+            return list(pool.map(
+                lambda pair: generator.publish_to_wp(pair[1], pair[0]["site_config"]), zip(group, posts)
+            ))
+
+    logging.info(f"[WP-BATCH] {host}: {len(posts)} wpisów jednym zapytaniem batch/v1 "
+                 f"(zadania: {', '.join(item.get('job_id') or '-' for item in group)}).")
+    return _post_results(host, [post.get("title") for post in posts], responses, "Zapisano")
+
+
+class _PendingBatch:
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.done = threading.Event()
+
+
+@traced_stage("publish")
+def publish(site_config, post, tags=()) -> Optional[dict]:
+    """
+    Publikuje jeden wpis, dołączając do otwartej grupy zapisów na ten sam host
+    (albo otwierając nową). Blokuje do czasu publikacji grupy i zwraca wynik
+    tego wpisu – tak jak generator.publish_to_wp.
+    """
+    item = {"site_config": site_config, "post": post, "tags": list(tags or ()),
+            "job_id": tracing.current_job().get("job_id")}
+    if not WP_BATCH_SETTINGS.get("enabled", True):
+        return publish_many([item])[0]
+
+    key = _group_key(site_config)
+    with _open_lock:
+        batch = _open_batches.get(key)
+        leader = batch is None or len(batch.items) >= WP_BATCH_SETTINGS["max_requests"]
+        if leader:
+            batch = _open_batches[key] = _PendingBatch()
+        index = len(batch.items)
+        batch.items.append(item)
+
+    if not leader:
+        batch.done.wait()
+        return batch.results[index]
+
+    # Lider grupy: czeka, aż dołączą pozostałe trwające zadania na ten host
+    # (najdłużej window_seconds), i wysyła całość
+    deadline = time.monotonic() + WP_BATCH_SETTINGS["window_seconds"]
+    while time.monotonic() < deadline:
+        with _open_lock:
+            joined = {i.get("job_id") for i in batch.items}
+        if not _pending_peers(key, joined):
+            break
+        time.sleep(0.05)
+    with _open_lock:
+        if _open_batches.get(key) is batch:
+            del _open_batches[key]
+    try:
+        batch.results = publish_many(batch.items)
+    except Exception as e:
+        logging.error(f"[WP-BATCH] Publikacja grupy nie powiodła się: {e}")
+        batch.results = [None] * len(batch.items)
+    finally:
+        batch.done.set()
+    return batch.results[index]
@@ -0,0 +1,45 @@
+# wp_http.py — wspólna sesja HTTP, nagłówki WP, parser HTML i cache terminów
+#
+# Pomocnicze funkcje używane przez moduły biblioteczne (llm, wp_batch,
+# post_index, sites, seo_gate) i przez generator.py. Wcześniej siedziały
+# w generator.py, przez co moduły niższego poziomu importowały moduł CLI
+# dla jego prywatnych funkcji. Ciężkie biblioteki (requests, bs4) ładowane są
+# przy pierwszym użyciu, jak w generator.py.
+
+import threading
+
+_session_lock = threading.Lock()
+_session = None
+
+# Id terminów WP (tagi, kategorie) w obrębie procesu: (url taksonomii, nazwa.lower()) -> id
+term_ids = {}
+
+
+def session():
+    """Współdzielona sesja requests (keep-alive do Perplexity i WordPressa)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                import tracing
+                import wp_limiter
+                s = requests.Session()
+                s.hooks["response"].append(tracing.log_http_response)
+                # Zapytania do hostów WP przez limiter współbieżności per host (AIMD)
+                adapter = wp_limiter.adapter()
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def get_auth_header(site_config):
+    """Kopia nagłówków autoryzacji policzonych raz w sites.SiteConfig (wołający je uzupełniają)."""
+    return dict(site_config.auth_headers)
+
+
+def soup(html):
+    """Drzewo BeautifulSoup (html.parser); wołający zwalnia je przez decompose() po użyciu."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser")
@@ -0,0 +1,186 @@
+# wp_limiter.py — limit współbieżności per host WordPressa, dostrajany AIMD
+#
+# Kilka portali z config.SITES publikuje na ten sam host (tylkoslask..4 →
+# tylkoslask.pl). Każde zapytanie do hosta WP z sesji wp_http.session() przechodzi
+# przez limiter tego hosta, wspólny dla wszystkich jego portali. Limiter
+# trzyma co najwyżej `limit` zapytań w locie, a `limit` dostraja na bieżąco:
+#   - udane zapytanie: +increase/limit (ok. +1 po każdej „rundzie” zapytań),
+#   - 429/503 albo błąd połączenia: ×decrease i pauza dla całego hosta
+#     (Retry-After albo wykładniczy backoff). Zapytanie z 429/503 jest
+#     ponawiane do `retries` razy – tylko metody idempotentne; POST (wpisy,
+#     media, batch/v1) wyłącznie po 429 z Retry-After, bo 503 z hostingu
+#     może przyjść już po zapisie i ponowienie zdublowałoby wpis,
+#   - zapytanie dużo wolniejsze od typowego (slow_factor × EWMA czasu dla tej
+#     metody HTTP): łagodne ×slow_decrease.
+# Zmniejszenie następuje najwyżej raz na „rundę” (typowy czas zapytania), żeby
+# seria odpowiedzi 429 z jednej chwili nie zbiła limitu od razu do minimum.
+# Inne hosty (Perplexity, obrazki, EventRegistry) idą bez limitu.
+
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import metrics
+from config import WP_HOST_LIMITS
+
+_SETTINGS_DEFAULTS = {
+    "initial": 4, "min": 1, "max": 16, "increase": 1.0, "decrease": 0.5,
+    "slow_factor": 3.0, "slow_decrease": 0.8, "retries": 2, "backoff_seconds": 2, "max_backoff_seconds": 60,
+}
+_OVERLOAD_STATUSES = (429, 503)
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+def _setting(name):
+    return WP_HOST_LIMITS.get(name, _SETTINGS_DEFAULTS[name])
+
+
+def _may_retry(method, status, retry_after):
+    """Czy zapytanie z odpowiedzią 429/503 można bezpiecznie wysłać ponownie."""
+    if (method or "").upper() in _IDEMPOTENT_METHODS:
+        return True
+    return status == 429 and retry_after is not None
+
+
+def _retry_after(value):
+    """Sekundy z nagłówka Retry-After (liczba albo data HTTP) albo None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    def __init__(self, host):
+        self.host = host
+        self.limit = float(_setting("initial"))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.overloads = 0           # kolejne przeciążenia (wykładnik backoffu)
+        self.last_decrease = 0.0
+        self.ewma = {}               # metoda HTTP -> (średni czas, liczba próbek)
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self.cond.wait(timeout=wait if wait > 0 else None)
+
+    def _round_seconds(self):
+        return max((avg for avg, _ in self.ewma.values()), default=1.0)
+
+    def _decrease(self, factor, now):
+        if now - self.last_decrease < self._round_seconds():
+            return
+        self.last_decrease = now
+        self.limit = max(float(_setting("min")), self.limit * factor)
+
+    def release(self, method, seconds, status=None, retry_after=None):
+        """Kończy zapytanie: `status` None = błąd połączenia/timeout."""
+        now = time.monotonic()
+        with self.cond:
+            self.in_flight -= 1
+            if status is None or status in _OVERLOAD_STATUSES:
+                self.overloads += 1
+                backoff = min(_setting("max_backoff_seconds"), retry_after if retry_after is not None
+                              else _setting("backoff_seconds") * 2 ** (self.overloads - 1))
+                self.paused_until = max(self.paused_until, now + backoff)
+                self._decrease(_setting("decrease"), now)
+                logging.warning(f"[WP-LIMIT] {self.host}: {status or 'błąd połączenia'} – limit {int(self.limit)}, pauza {backoff:.1f} s")
+            else:
+                self.overloads = 0
+                avg, n = self.ewma.get(method, (seconds, 0))
+                if n >= 10 and seconds > _setting("slow_factor") * avg:
+                    self._decrease(_setting("slow_decrease"), now)
+                else:
+                    self.limit = min(float(_setting("max")), self.limit + _setting("increase") / self.limit)
+                self.ewma[method] = (avg + 0.1 * (seconds - avg) if n else seconds, n + 1)
+            self.cond.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_wp_roots = None
+
+
+def _roots():
+    """host -> prefiksy /wp-json portali z tego hosta (inne ścieżki hosta nie są limitowane)."""
+    global _wp_roots
+    if _wp_roots is None:
+        from sites import SITES
+        roots = {}
+        for site in SITES.values():
+            roots.setdefault(site.host, set()).add(site["wp_api_url_base"].rsplit("/wp/v2", 1)[0])
+        _wp_roots = {host: tuple(prefixes) for host, prefixes in roots.items()}
+    return _wp_roots
+
+
+def for_url(url):
+    """Limiter hosta WP, do którego idzie `url`, albo None (adres spoza WordPressów z config.SITES)."""
+    host = urlparse(url).netloc.lower()
+    prefixes = _roots().get(host)
+    if not prefixes or not url.startswith(prefixes):
+        return None
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(host, HostLimiter(host))
+    return limiter
+
+
+def _collect(field):
+    def collect():
+        with _limiters_lock:
+            limiters = list(_limiters.values())
+        return {(limiter.host,): float(getattr(limiter, field)) for limiter in limiters}
+    return collect
+
+
+LIMIT = metrics.Gauge("writerpro_wp_concurrency_limit", "Bieżący limit równoległych zapytań do hosta WP.", ("host",), collect=_collect("limit"))
+IN_FLIGHT = metrics.Gauge("writerpro_wp_in_flight", "Zapytania do hosta WP w toku.", ("host",), collect=_collect("in_flight"))
+THROTTLED = metrics.Counter("writerpro_wp_throttled_total", "Odpowiedzi 429/503 i błędy połączenia z hostem WP.", ("host", "status"))
+
+
+def adapter():
+    """HTTPAdapter dla wp_http.session(): zapytania do hostów WP przez HostLimiter, z ponowieniem po 429/503 (zob. _may_retry)."""
+    from requests.adapters import HTTPAdapter
+
+    class LimitedAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            limiter = for_url(request.url)
+            if limiter is None:
+                return super().send(request, **kwargs)
+            for attempt in range(_setting("retries") + 1):
+                limiter.acquire()
+                start = time.monotonic()
+                try:
+                    response = super().send(request, **kwargs)
+                except Exception:
+                    limiter.release(request.method, time.monotonic() - start)
+                    THROTTLED.inc(host=limiter.host, status="error")
+                    raise
+                status = response.status_code
+                retry_after = _retry_after(response.headers.get("Retry-After"))
+                limiter.release(request.method, time.monotonic() - start, status, retry_after)
+                if status not in _OVERLOAD_STATUSES:
+                    return response
+                THROTTLED.inc(host=limiter.host, status=str(status))
+                if attempt == _setting("retries") or not _may_retry(request.method, status, retry_after):
+                    return response
+                metrics.RETRIES.inc(operation="wp_overloaded")
+                response.close()
+            return response
+
+    return LimitedAdapter(pool_maxsize=max(10, int(_setting("max"))))